@@ -1,129 +1,407 @@
 from dotenv import load_dotenv
 from livekit import agents
-from livekit.agents import AgentSession, Agent, RoomInputOptions
-from livekit.plugins import (
-    openai, cartesia, deepgram, noise_cancellation, silero, groq, elevenlabs
+from livekit.agents import AgentSession, RoomInputOptions
+from livekit.plugins import noise_cancellation
+from config_manager import load_worker_snapshot, WORKER_SNAPSHOT_FILE
+from assistant import Assistant
+from profile_store import invalidate_profile_cache
+from worker_control import serve_job_control, save_job_report
+from tts_cache import phrase_cache, cached_phrase, render_phrase
+from tts_fallback import provider_health
+from turn_metrics import TurnLatencyTracker
+from memory_accounting import SessionMemoryAccount, enabled as memory_accounting_enabled
+from providers import (
+    build_stt, build_llm, build_tts, build_provider, model_key,
+    resolve_job_profile, warm_tts
 )
-from livekit.plugins.turn_detector.multilingual import MultilingualModel
-import lamapbx
-import signal
+from collections import deque
 import os
-import json
 import asyncio
-import threading
-from flask import Flask, request, jsonify
+import time
+
+# Fixed, data-driven agent worker. All settings come from the validated
+# snapshot written by the control plane (config_manager.save_worker_snapshot);
+# providers are built through the factory registry in providers.py.
 
 load_dotenv()
 
-# Global session object for hot-reloading
-global_session = None
-global_room = None
+# Configuration used when a job does not select a profile in its metadata
+AGENT_CONFIG = load_worker_snapshot()
+snapshot_mtime = os.path.getmtime(WORKER_SNAPSHOT_FILE) if os.path.exists(WORKER_SNAPSHOT_FILE) else None
 
-# Create a Flask app for the worker API
-worker_api = Flask(__name__)
+# Settings that belong to each hot-swappable component
+COMPONENT_FIELDS = {
+    "stt": ["stt_provider", "stt_model", "stt_language"],
+    "llm": ["llm_provider", "llm_base_url", "llm_api_key", "llm_user", "llm_use_blocking_mode"],
+    "tts": ["tts_provider", "tts_model", "tts_language", "tts_elevenlabs_model", "tts_fallback", "tts_failover_ttfb"],
+}
 
-class Assistant(Agent):
-    def __init__(self) -> None:
-        super().__init__(instructions="You are a helpful voice AI assistant called llama, you talk with users with Voice.")
+COMPONENT_BUILDERS = {
+    "stt": build_stt,
+    "llm": build_llm,
+    "tts": build_tts,
+}
 
-@worker_api.route('/update-tts', methods=['POST'])
-def update_tts_endpoint():
-    """API endpoint to update TTS during runtime"""
-    data = request.json
-    provider = data.get('provider')
-    model = data.get('model', '')
-    language = data.get('language', 'en')
-    elevenlabs_model = data.get('elevenlabs_model', 'eleven_multilingual_v2')
+# A new TTS is connected (and primed) before it replaces the old one, so the
+# first utterance in the new voice does not pay connection setup
+TTS_WARMUP_TIMEOUT = float(os.environ.get("TTS_WARMUP_TIMEOUT", 5))
+# How long a replaced TTS may keep speaking its current utterance before it is closed
+TTS_CLOSE_GRACE = 30
+# How long the first greeting waits for the pre-render started at job start
+GREETING_RENDER_WAIT = float(os.environ.get("GREETING_RENDER_WAIT", 3))
 
-    # Schedule the async TTS update
-    asyncio.create_task(update_tts(provider, model, language, elevenlabs_model))
+async def warm_tts_component(instance, config):
+    await asyncio.wait_for(warm_tts(instance, config.get("tts_priming_text")), TTS_WARMUP_TIMEOUT)
 
-    return jsonify({
-        "message": f"TTS update scheduled to {provider} with model {model}"
-    })
+COMPONENT_WARMERS = {
+    "tts": warm_tts_component,
+}
 
-async def update_tts(provider, model, language, elevenlabs_model=None):
-    """Update TTS in the active session"""
-    global global_session
+# Models loaded once per process by prewarm() and shared by its jobs
+PREWARMED_KINDS = ("vad", "turn_detection")
 
-    if global_session is None:
-        print("Session not initialized yet, cannot update TTS")
-        return False
+# Recent job setup timings (entrypoint start -> session started)
+job_setup_times = deque(maxlen=100)
+
+class _TemplateValues(dict):
+    def __missing__(self, key):
+        return ""
+
+def render_greeting(config, **context):
+    """Opening line from config["greeting_text"] (a str.format template over config and job values), or None"""
+    template = (config.get("greeting_text") or "").strip()
+    if not template:
+        return None
+    values = _TemplateValues(config)
+    values.update(context)
+    try:
+        return template.format_map(values).strip() or None
+    except (ValueError, IndexError) as e:
+        print(f"Invalid greeting template, using it as plain text: {e}")
+        return template
 
+def prewarm(proc: agents.JobProcess):
+    """Load VAD and turn detection models once per process, before any job arrives"""
+    started = time.perf_counter()
+    for kind in PREWARMED_KINDS:
+        proc.userdata[kind] = (model_key(kind, AGENT_CONFIG), build_provider(kind, AGENT_CONFIG))
+
+    # The greeting needs provider clients, which only work inside a job; entrypoint renders it
+    print(f"Worker process prewarmed {', '.join(PREWARMED_KINDS)} in "
+          f"{round((time.perf_counter() - started) * 1000, 1)} ms")
+
+async def prerender_greeting(tts_instance, config, **context):
+    """Synthesize the greeting in the voice of a TTS so sessions can replay it"""
+    greeting = render_greeting(config, **context)
+    if not greeting or not config.get("tts_cache", True) or await cached_phrase(config, greeting):
+        return
+    started = time.perf_counter()
     try:
-        new_tts = None
-        if provider == 'cartesia':
-            if model:
-                new_tts = cartesia.TTS(voice=model, language=language)
-            else:
-                new_tts = cartesia.TTS(language=language)
-        elif provider == 'deepgram':
-            if model:
-                new_tts = deepgram.TTS(model=model)
-            else:
-                new_tts = deepgram.TTS()
-        elif provider == 'elevenlabs':
-            if model:
-                new_tts = elevenlabs.TTS(voice_id=model, model=elevenlabs_model)
-            else:
-                new_tts = elevenlabs.TTS()
-
-        if new_tts:
-            await global_session.update_tts(new_tts)
-            print(f"TTS updated to {provider} with model {model}")
-            return True
-        else:
-            print("Failed to create new TTS provider")
-            return False
+        await render_phrase(tts_instance, greeting)
+        print(f"Greeting rendered in {round((time.perf_counter() - started) * 1000, 1)} ms")
     except Exception as e:
-        print(f"Error updating TTS: {e}")
+        print(f"Error rendering greeting: {e}")
+
+async def play_greeting(session, config, prerender=None, **context):
+    """Open the call with the configured greeting (no LLM turn), else let the LLM greet"""
+    greeting = render_greeting(config, **context)
+    if greeting is None:
+        await session.generate_reply(
+            instructions="Greet the user and offer your assistance."
+        )
+        return
+    if prerender is not None:
+        # Started at job start; give it a moment to finish rather than synthesizing twice
+        try:
+            await asyncio.wait_for(asyncio.shield(prerender), GREETING_RENDER_WAIT)
+        except asyncio.TimeoutError:
+            print("Greeting is still rendering, speaking it live")
+    audio = await cached_phrase(config, greeting)
+    print(f"Playing {'pre-rendered' if audio else 'synthesized'} greeting")
+    # Without cached audio the TTS speaks it (and caches it for the next call)
+    await session.say(greeting, audio=audio.replay() if audio else None)
+
+def shared_model(proc, kind, config):
+    """Return the process-wide model of one kind, loading it only if the job needs a different one"""
+    key = model_key(kind, config)
+    cached = proc.userdata.get(kind)
+    if cached and cached[0] == key:
+        return cached[1], True
+    instance = build_provider(kind, config)
+    proc.userdata[kind] = (key, instance)
+    return instance, False
+
+def reload_snapshot(force=False):
+    """Re-read the config snapshot if it changed on disk; new jobs use the new settings"""
+    global AGENT_CONFIG, snapshot_mtime
+    if not os.path.exists(WORKER_SNAPSHOT_FILE):
+        return False
+    mtime = os.path.getmtime(WORKER_SNAPSHOT_FILE)
+    if not force and mtime == snapshot_mtime:
         return False
+    AGENT_CONFIG = load_worker_snapshot()
+    snapshot_mtime = mtime
+    invalidate_profile_cache()
+    print("Worker configuration snapshot reloaded")
+    return True
 
-def run_worker_api():
-    """Run the worker API in a separate thread"""
-    worker_api.run(host='localhost', port=8080, debug=False)
+def job_status(entry):
+    """Report a job's session, job setup timings and TTS cache/health"""
+    setup_ms = sorted(job["setup_ms"] for job in job_setup_times)
+    return {
+        "ok": True,
+        "active_session": True,
+        "room": entry["room"],
+        "job_id": entry["job_id"],
+        "tts_cache": phrase_cache.stats(),
+        "tts_active": getattr(entry["components"]["tts"], "active", None),
+        "tts_health": provider_health.stats(),
+        "job_setup": {
+            "count": len(setup_ms),
+            "avg_ms": round(sum(setup_ms) / len(setup_ms), 1) if setup_ms else None,
+            "max_ms": setup_ms[-1] if setup_ms else None,
+            "recent": list(job_setup_times)[-10:],
+        },
+    }
 
-async def entrypoint(ctx: agents.JobContext):
-    global global_session, global_room
+def reload_command(entry, payload):
+    """Reload the configuration snapshot for jobs started from now on"""
+    started = time.perf_counter()
+    reloaded = reload_snapshot(force=True)
+    return {
+        "ok": True,
+        "reloaded": reloaded,
+        "active_session": True,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def latency_command(entry, payload):
+    """Report the per-turn latency breakdown of a session"""
+    return {"ok": True, **entry["latency"].summary(int(payload.get("recent", 10)))}
+
+async def memory_command(entry, payload):
+    """Report the memory growth of a session since it started"""
+    if entry["memory"] is None:
+        return {"ok": False, "error": "Session memory accounting is off (session_memory_accounting)"}
+    # Collecting and snapshotting take a while; keep them off the job's event loop
+    report = await asyncio.to_thread(entry["memory"].report)
+    return {"ok": True, **report}
+
+async def update_tts_command(entry, payload):
+    """Swap the TTS of a session from provider/model/language settings"""
+    return await apply_config(entry, {
+        "tts_provider": payload.get('provider'),
+        "tts_model": payload.get('model', ''),
+        "tts_language": payload.get('language', 'en'),
+        "tts_elevenlabs_model": payload.get('elevenlabs_model', 'eleven_multilingual_v2'),
+    })
+
+async def handle_control(entry, command, payload):
+    """Run one control command against a job's session; called on the job's event loop"""
+    if command == "status":
+        return job_status(entry)
+    if command == "reload":
+        return reload_command(entry, payload)
+    if command == "latency":
+        return latency_command(entry, payload)
+    if command == "memory":
+        return await memory_command(entry, payload)
+    if command == "apply":
+        return await apply_config(entry, payload)
+    if command == "update-tts":
+        return await update_tts_command(entry, payload)
+    return {"ok": False, "error": f"Unknown command: {command}"}
+
+async def apply_config(entry, changes):
+    """Swap the session components whose settings changed, in place"""
+    started = time.perf_counter()
+    unknown = [k for k in changes if not any(k in fields for fields in COMPONENT_FIELDS.values())]
+    if unknown:
+        return {"ok": False, "applied": {}, "errors": {"request": f"Settings cannot be applied at runtime: {unknown}"}, "elapsed_ms": 0.0}
+
+    new_config = dict(entry["config"])
+    new_config.update(changes)
+    applied = {}
+    warmup = {}
+    errors = {}
+    for component, fields in COMPONENT_FIELDS.items():
+        if not any(field in changes for field in fields):
+            continue
+        component_started = time.perf_counter()
+        instance = None
+        try:
+            instance = COMPONENT_BUILDERS[component](new_config)
+            warmer = COMPONENT_WARMERS.get(component)
+            if warmer is not None:
+                # The old instance keeps serving until the new one is ready
+                await warmer(instance, new_config)
+                warmup[component] = round((time.perf_counter() - component_started) * 1000, 1)
+            await swap_component(entry, component, instance)
+            applied[component] = round((time.perf_counter() - component_started) * 1000, 1)
+        except Exception as e:
+            print(f"Error updating {component}: {e!r}")
+            errors[component] = str(e) or type(e).__name__
+            if instance is not None and hasattr(instance, "aclose"):
+                await instance.aclose()
+
+    # Only remember the settings of components that were actually swapped
+    for component in applied:
+        for field in COMPONENT_FIELDS[component]:
+            entry["config"][field] = new_config.get(field)
+    if "tts" in applied:
+        # The voice changed; render the greeting in it before the next call needs it
+        track_task(entry, prerender_greeting(
+            entry["components"]["tts"], entry["config"], room=entry["room"], job_id=entry["job_id"]))
+
+    return {
+        "ok": not errors,
+        "applied": applied,
+        "warmup_ms": warmup,
+        "errors": errors,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+async def swap_component(entry, component, instance):
+    """Replace one component of a live session (update_tts/update_stt/update_llm)"""
+    session = entry["session"]
+    update = getattr(session, f"update_{component}", None)
+    if update is None:
+        raise RuntimeError(f"AgentSession does not support swapping {component} at runtime")
+    await update(instance)
+    print(f"{component.upper()} updated in the running session")
 
-    # Start the worker API in a background thread
-    api_thread = threading.Thread(target=run_worker_api)
-    api_thread.daemon = True
-    api_thread.start()
+    previous = entry["components"].get(component)
+    entry["components"][component] = instance
+    if previous is not None:
+        track_task(entry, close_when_idle(session, previous))
+
+def track_task(entry, coro):
+    """Run a background coroutine for a session, keeping a reference until it is done"""
+    task = asyncio.create_task(coro)
+    entry["tasks"].add(task)
+    task.add_done_callback(entry["tasks"].discard)
+    return task
+
+async def close_when_idle(session, instance, grace=TTS_CLOSE_GRACE):
+    """Close a replaced component once the agent stops speaking (or after the grace period)"""
+    deadline = time.monotonic() + grace
+    while getattr(session, "agent_state", None) == "speaking" and time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+    try:
+        await instance.aclose()
+    except Exception as e:
+        print(f"Error closing replaced component: {e}")
+
+async def entrypoint(ctx: agents.JobContext):
+    job_started = time.perf_counter()
 
     await ctx.connect()
-    global_room = ctx.room
 
-    # STT configuration
-    stt = deepgram.STT(model="nova-3", language="multi")
-    llm = lamapbx.LLM(
-            base_url="https://api.dify.ai/v1",
-            api_key="app-URvw3WP41SrsNoNkLLITJjSr",
-            user="koumton1@gmail.com", use_blocking_mode=True)
-    tts = elevenlabs.TTS(voice_id="JBFqnCBsd6RMkjVDRZzb", model="eleven_multilingual_v2")
-    vad = silero.VAD.load()
+    # Pick up a snapshot written since the last job
+    reload_snapshot()
+
+    # Pick the agent profile for this job from job or room metadata
+    profile_key, agent_config = resolve_job_profile(ctx, AGENT_CONFIG)
+    print(f"Job {ctx.job.id} using profile {profile_key}")
+
+    # STT/LLM/TTS are built for this job; their clients are bound to its event loop
+    providers = {component: build(agent_config) for component, build in COMPONENT_BUILDERS.items()}
+
+    # Render the greeting while the session starts, so even a fresh worker's first call replays it
+    greeting_render = asyncio.create_task(prerender_greeting(
+        providers["tts"], agent_config, room=ctx.room.name, job_id=ctx.job.id))
+
+    # VAD and turn detection were loaded by prewarm() unless this profile needs other ones
+    vad, vad_prewarmed = shared_model(ctx.proc, "vad", agent_config)
+    turn_detection, turn_prewarmed = shared_model(ctx.proc, "turn_detection", agent_config)
+
+    # Opt-in memory accounting
+    memory = None
+    if memory_accounting_enabled(agent_config):
+        memory = SessionMemoryAccount(ctx.room.name, ctx.job.id)
+        await asyncio.to_thread(memory.start)
 
     session = AgentSession(
-        stt=stt,
-        llm=llm,
-        tts=tts,
+        stt=providers["stt"],
+        llm=providers["llm"],
+        tts=providers["tts"],
         vad=vad,
-        turn_detection=MultilingualModel(),
+        turn_detection=turn_detection,
+        min_endpointing_delay=agent_config.get("min_endpointing_delay", 0.5),
     )
 
-    # Store session globally for later updates
-    global_session = session
-    await session.start(
-        room=ctx.room,
-        agent=Assistant(),
-        room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),
-        ),
-    )
+    # The job's session state; LiveKit runs each job in a process of its own, so
+    # the control socket below (served on the job's loop) is the only way in
+    entry = {
+        "room": ctx.room.name,
+        "job_id": ctx.job.id,
+        "session": session,
+        "config": dict(agent_config),
+        "components": dict(providers),
+        "tasks": {greeting_render},  # background work of this session (closing replaced components, rendering)
+        "latency": TurnLatencyTracker(ctx.room.name),
+        "memory": memory,
+    }
+    entry["latency"].attach(session)
+    greeting_render.add_done_callback(entry["tasks"].discard)
 
-    await session.generate_reply(
-        instructions="Greet the user and offer your assistance."
-    )
+    async def handler(command, payload):
+        return await handle_control(entry, command, payload)
+
+    close_control = await serve_job_control(ctx.job.id, ctx.room.name, handler, profile=profile_key)
+
+    async def unregister_session():
+        await close_control()
+        await entry["session"].aclose()
+        for instance in entry["components"].values():
+            await instance.aclose()
+        # Drop the references to the session and its components so nothing of this call is kept
+        entry.clear()
+
+    ctx.add_shutdown_callback(unregister_session)
+
+    entrypoint_done = asyncio.Event()
+    if memory is not None:
+        async def finish_memory_account():
+            # Once the entrypoint has returned its locals no longer hold the session
+            try:
+                await asyncio.wait_for(entrypoint_done.wait(), 5)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                report = await asyncio.to_thread(memory.report, final=True)
+            finally:
+                memory.stop()
+            save_job_report(ctx.job.id, "memory", report)
+            print(f"Job {ctx.job.id} memory after cleanup: {report['size_diff_kb']} KB retained, "
+                  f"objects left behind: {report['leaked_objects'] or 'none'}")
+
+        ctx.add_shutdown_callback(finish_memory_account)
+
+    if agent_config.get("use_noise_cancellation", True):
+        await session.start(
+            room=ctx.room,
+            agent=Assistant(),
+            room_input_options=RoomInputOptions(
+                noise_cancellation=noise_cancellation.BVC(),
+            ),
+        )
+    else:
+        await session.start(
+            room=ctx.room,
+            agent=Assistant(),
+        )
+
+    setup_ms = round((time.perf_counter() - job_started) * 1000, 1)
+    job_setup_times.append({
+        "job_id": ctx.job.id,
+        "profile": profile_key,
+        "setup_ms": setup_ms,
+        "prewarmed": vad_prewarmed and turn_prewarmed,
+    })
+    print(f"Job {ctx.job.id} setup took {setup_ms} ms (prewarmed models: {vad_prewarmed and turn_prewarmed})")
+
+    await play_greeting(session, agent_config, prerender=greeting_render, room=ctx.room.name, job_id=ctx.job.id)
 
     # Keep the worker running
     try:
@@ -131,6 +409,15 @@ async def entrypoint(ctx: agents.JobContext):
         await ctx.wait_until_disconnected()
     except Exception as e:
         print(f"Agent disconnected with error: {e}")
+    finally:
+        entrypoint_done.set()
 
 if __name__ == "__main__":
-    agents.cli.run_app(agents.WorkerOptions(entrypoint_fnc=entrypoint))
+    # Each process of the worker pool gets its own health/HTTP port from worker_manager
+    agents.cli.run_app(agents.WorkerOptions(
+        entrypoint_fnc=entrypoint,
+        prewarm_fnc=prewarm,
+        port=int(os.environ.get("AGENT_WORKER_PORT", 8081)),
+        # On SIGTERM the worker stops taking jobs and waits this long for running ones
+        drain_timeout=int(float(os.environ.get("AGENT_WORKER_DRAIN_TIMEOUT", 1800))),
+    ))
@@ -1,9 +1,20 @@
 import os
+import re
 from flask import request, jsonify, Response
+from flask_socketio import join_room, leave_room
 import requests
-from config_manager import load_config, save_config, load_deepgram_models, load_cartesia_voices, load_elevenlabs_voices
-from worker_manager import restart_worker, start_worker, stop_worker, get_worker_status
-from agent_generator import generate_agent_code
+from config_manager import load_config, save_config, validate_config, ConfigValidationError
+from worker_manager import get_worker_status, get_pool_status
+from lifecycle_jobs import queue_start, queue_stop, queue_start_slot, queue_stop_slot, get_job, list_jobs
+from config_planner import apply_config_change, describe_plan
+from worker_control import send_command, list_job_reports
+from worker_logs import add_log_listener, tail_logs, search_logs
+from status_events import set_event_emitter, events_since
+from profile_store import (
+    list_profiles, get_profile, create_profile, update_profile, delete_profile,
+    get_profile_versions, ProfileConflict
+)
+from catalog_sync import get_catalog, get_merged_catalog, get_catalog_version, trigger_sync, get_sync_status, CATALOG_PROVIDERS
 
 # --- API Key Retrieval Functions ---
 # It's highly recommended to use environment variables for API keys
@@ -105,7 +116,47 @@ def call_cartesia_api(voice_id, text):
 
 def register_routes(app, socketio):
     """Register all API routes with the Flask application"""
-    
+
+    def invalid_config(config):
+        """The 400 response for a configuration that does not validate (None if it is valid)"""
+        try:
+            validate_config(config)
+        except ConfigValidationError as e:
+            return jsonify({"error": str(e), "errors": e.errors}), 400
+        return None
+
+    # Stream captured worker output to clients that subscribed to it
+    add_log_listener(lambda entry: socketio.emit("worker_log", entry, to="worker_logs"))
+
+    @socketio.on("subscribe_logs")
+    def subscribe_logs(data=None):
+        """Join the live worker log stream, optionally replaying lines after a sequence number"""
+        join_room("worker_logs")
+        since = (data or {}).get("since")
+        return {"lines": tail_logs(since=since) if since is not None else []}
+
+    @socketio.on("unsubscribe_logs")
+    def unsubscribe_logs(data=None):
+        """Leave the live worker log stream"""
+        leave_room("worker_logs")
+
+    # Push worker lifecycle, config change and restart progress events
+    set_event_emitter(lambda event: socketio.emit("status_event", event, to="status"))
+
+    @socketio.on("subscribe_status")
+    def subscribe_status(data=None):
+        """Join the status event stream, replaying the events after the client's last sequence number"""
+        join_room("status")
+        since = (data or {}).get("since")
+        if since is None:
+            return events_since()
+        try:
+            since = int(since)
+        except (TypeError, ValueError):
+            # Unusable position: the client has to reload the full state
+            return dict(events_since(), reset=True)
+        return events_since(since)
+
     @app.route("/api/config", methods=["GET"])
     def get_config():
         """Get current configuration"""
@@ -115,6 +166,7 @@ def register_routes(app, socketio):
     def update_config():
         """Update configuration"""
         current_config = load_config()
+        old_config = dict(current_config)
         new_config = request.json
 
         # Update configuration
@@ -123,18 +175,19 @@ def register_routes(app, socketio):
                 current_config[key] = value
 
         # Save updated configuration
+        error = invalid_config(current_config)
+        if error:
+            return error
         save_config(current_config)
 
-        # Generate new agent code
-        generate_agent_code(current_config)
-
-        # Restart worker
-        pid = restart_worker()
+        # Apply it with the cheapest action the change needs
+        plan = apply_config_change(old_config, current_config)
 
         return jsonify({
-            "message": "Configuration updated and worker restarted",
+            "message": f"Configuration updated: {describe_plan(plan)}",
             "config": current_config,
-            "worker_pid": pid
+            "worker_pid": plan["worker_pid"],
+            "plan": plan
         })
 
     @app.route("/api/tts", methods=["POST"])
@@ -150,6 +203,7 @@ def register_routes(app, socketio):
             return jsonify({"error": "Invalid TTS provider"}), 400
 
         config = load_config()
+        old_config = dict(config)
         config["tts_provider"] = provider
         config["tts_model"] = model # Ensure this is updated with the new model/voice ID
         config["tts_language"] = language # Ensure language is saved
@@ -158,21 +212,21 @@ def register_routes(app, socketio):
 
         # Provider-specific validation and settings
         if provider == "deepgram":
-            deepgram_models = load_deepgram_models()
+            deepgram_models = get_catalog("deepgram")
             if not any(v["id"] == model for v in deepgram_models):
                 return jsonify({"error": f"Invalid Deepgram voice model. Available models: {[v['id'] for v in deepgram_models]}"}), 400
             found_voice = next((v for v in deepgram_models if v["id"] == model), None)
             voice_name = found_voice.get("name", model) if found_voice else model
 
         elif provider == "cartesia":
-            cartesia_voices = load_cartesia_voices()
+            cartesia_voices = get_catalog("cartesia")
             found_voice = next((v for v in cartesia_voices if v["id"] == model), None)
             if not found_voice:
                 return jsonify({"error": f"Invalid Cartesia voice ID: {model}"}), 400
             voice_name = found_voice.get("name", model)
 
         elif provider == "elevenlabs":
-            elevenlabs_voices = load_elevenlabs_voices()
+            elevenlabs_voices = get_catalog("elevenlabs")
             found_voice = next((v for v in elevenlabs_voices if v.get("id") == model), None) # Use 'id' for ElevenLabs voices
             if not found_voice:
                 return jsonify({"error": f"Invalid ElevenLabs voice ID: {model}"}), 400
@@ -187,13 +241,16 @@ def register_routes(app, socketio):
 
             voice_name = found_voice.get("name", model)
 
+        error = invalid_config(config)
+        if error:
+            return error
         save_config(config) # Save the updated configuration
-        generate_agent_code(config) # Regenerate agent_worker.py with the new config
-        restart_worker() # Restart the worker to apply changes
+        plan = apply_config_change(old_config, config) # Hot-swap the voice when the worker allows it
 
         return jsonify({
-            "message": f"TTS provider updated to {provider} with model {model} and voice {voice_name}",
-            "current_session_updated": True
+            "message": f"TTS provider updated to {provider} with model {model} and voice {voice_name}: {describe_plan(plan)}",
+            "worker_pid": plan["worker_pid"],
+            "plan": plan
         })
 
 
@@ -201,7 +258,7 @@ def register_routes(app, socketio):
     @app.route("/api/deepgram/voices", methods=["GET"])
     def get_deepgram_voices():
         """Get available Deepgram voice models"""
-        voices = load_deepgram_models()
+        voices = get_catalog("deepgram")
         # Return the full list of voices directly
         return jsonify({
             "voices": voices
@@ -214,31 +271,33 @@ def register_routes(app, socketio):
         if not model:
             return jsonify({"error": "Model parameter is required"}), 400
 
-        deepgram_models = load_deepgram_models()
+        deepgram_models = get_catalog("deepgram")
         # Check if the model ID exists in the loaded models
         if not any(v["id"] == model for v in deepgram_models):
             return jsonify({"error": f"Invalid Deepgram voice model. Available models: {[v['id'] for v in deepgram_models]}"}), 400
 
         config = load_config()
+        old_config = dict(config)
         # Only update if provider is already deepgram or being set to deepgram
         if config["tts_provider"] == "deepgram" or request.json.get("provider") == "deepgram":
             config["tts_provider"] = "deepgram"
             config["tts_model"] = model
+            error = invalid_config(config)
+            if error:
+                return error
             save_config(config)
 
-            # Generate new agent code
-            generate_agent_code(config)
-
-            # Restart worker
-            pid = restart_worker()
+            # Apply the new voice with the cheapest action the change needs
+            plan = apply_config_change(old_config, config)
 
             # Extract name for response
             found_voice = next((v for v in deepgram_models if v["id"] == model), None)
             voice_name = found_voice.get("name", model) if found_voice else model
 
             return jsonify({
-                "message": f"Deepgram voice updated to \'{voice_name}\' (model: {model}) and worker restarted",
-                "worker_pid": pid
+                "message": f"Deepgram voice updated to \'{voice_name}\' (model: {model}): {describe_plan(plan)}",
+                "worker_pid": plan["worker_pid"],
+                "plan": plan
             })
         else:
             return jsonify({
@@ -249,7 +308,7 @@ def register_routes(app, socketio):
     def get_cartesia_voices():
         print("Received request for /api/cartesia/voices")
         try:
-            voices = load_cartesia_voices()
+            voices = get_catalog("cartesia")
             print(f"Loaded {len(voices)} voices from config_manager.")
             # Return the full list of voices directly
             return jsonify({
@@ -269,7 +328,7 @@ def register_routes(app, socketio):
             return jsonify({"error": "voice_id parameter is required"}), 400
 
         # Validate voice ID
-        cartesia_voices = load_cartesia_voices()
+        cartesia_voices = get_catalog("cartesia")
         found_voice = next((v for v in cartesia_voices if v["id"] == voice_id), None)
 
         if not found_voice:
@@ -280,24 +339,26 @@ def register_routes(app, socketio):
             language = found_voice.get("language")
 
         config = load_config()
+        old_config = dict(config)
         # Only update if provider is already cartesia or being set to cartesia
         if config["tts_provider"] == "cartesia" or request.json.get("provider") == "cartesia":
             config["tts_provider"] = "cartesia"
             config["tts_model"] = voice_id
             config["tts_language"] = language
+            error = invalid_config(config)
+            if error:
+                return error
             save_config(config)
 
-            # Generate new agent code
-            generate_agent_code(config)
-
-            # Restart worker
-            pid = restart_worker()
+            # Apply the new voice with the cheapest action the change needs
+            plan = apply_config_change(old_config, config)
 
             voice_name = found_voice.get("name", voice_id)
 
             return jsonify({
-                "message": f"Cartesia voice updated to \'{voice_name}\' (ID: {voice_id}) with language {language} and worker restarted",
-                "worker_pid": pid
+                "message": f"Cartesia voice updated to \'{voice_name}\' (ID: {voice_id}) with language {language}: {describe_plan(plan)}",
+                "worker_pid": plan["worker_pid"],
+                "plan": plan
             })
         else:
             return jsonify({
@@ -307,12 +368,40 @@ def register_routes(app, socketio):
     @app.route("/api/elevenlabs/voices", methods=["GET"])
     def get_elevenlabs_voices():
         """Get available ElevenLabs voices"""
-        voices = load_elevenlabs_voices()
+        voices = get_catalog("elevenlabs")
         # Return the full list of voices directly
         return jsonify({
             "voices": voices
         })
 
+    @app.route("/api/voices", methods=["GET"])
+    def get_all_voices():
+        """Get the merged voice list of all providers, or the changes since a version"""
+        version = get_catalog_version()
+        if request.headers.get("If-None-Match") == version:
+            return Response(status=304, headers={"ETag": version})
+
+        response = jsonify(get_merged_catalog(since=request.args.get("since")))
+        response.headers["ETag"] = version
+        return response
+
+    @app.route("/api/catalog/status", methods=["GET"])
+    def get_catalog_status():
+        """Get catalog sync state, latency and diff sizes"""
+        return jsonify(get_sync_status())
+
+    @app.route("/api/catalog/sync", methods=["POST"])
+    def sync_catalog():
+        """Trigger a background refresh of one or all provider catalogs"""
+        provider = (request.get_json(silent=True) or {}).get("provider")
+        if provider and provider not in CATALOG_PROVIDERS:
+            return jsonify({"error": f"Invalid catalog provider. Available providers: {CATALOG_PROVIDERS}"}), 400
+        providers = trigger_sync(provider)
+        return jsonify({
+            "message": f"Catalog sync started for {', '.join(providers)}",
+            "providers": providers
+        }), 202
+
     @app.route("/api/elevenlabs/voice", methods=["POST"])
     def update_elevenlabs_voice():
         """Update ElevenLabs voice"""
@@ -323,8 +412,8 @@ def register_routes(app, socketio):
             return jsonify({"error": "voice_id parameter is required"}), 400
 
         # Validate voice ID
-        elevenlabs_voices = load_elevenlabs_voices()
-        found_voice = next((v for v in elevenlabs_voices if v["voice_id"] == voice_id), None)
+        elevenlabs_voices = get_catalog("elevenlabs")
+        found_voice = next((v for v in elevenlabs_voices if v["id"] == voice_id), None)
 
         if not found_voice:
             return jsonify({"error": f"Invalid ElevenLabs voice ID"}), 400
@@ -339,22 +428,24 @@ def register_routes(app, socketio):
             }), 400
 
         config = load_config()
+        old_config = dict(config)
         # Only update if provider is already elevenlabs or being set to elevenlabs
         if config["tts_provider"] == "elevenlabs" or request.json.get("provider") == "elevenlabs":
             config["tts_provider"] = "elevenlabs"
             config["tts_model"] = voice_id
             config["tts_elevenlabs_model"] = model
+            error = invalid_config(config)
+            if error:
+                return error
             save_config(config)
 
-            # Generate new agent code
-            generate_agent_code(config)
-
-            # Restart worker
-            pid = restart_worker()
+            # Apply the new voice with the cheapest action the change needs
+            plan = apply_config_change(old_config, config)
 
             return jsonify({
-                "message": f"ElevenLabs voice updated to \'{voice_name}\' (ID: {voice_id}) with model {model} and worker restarted",
-                "worker_pid": pid
+                "message": f"ElevenLabs voice updated to \'{voice_name}\' (ID: {voice_id}) with model {model}: {describe_plan(plan)}",
+                "worker_pid": plan["worker_pid"],
+                "plan": plan
             })
         else:
             return jsonify({
@@ -369,6 +460,7 @@ def register_routes(app, socketio):
         language = request.json.get("language")
 
         config = load_config()
+        old_config = dict(config)
         if provider:
             config["stt_provider"] = provider
         if model:
@@ -376,17 +468,18 @@ def register_routes(app, socketio):
         if language:
             config["stt_language"] = language
 
+        error = invalid_config(config)
+        if error:
+            return error
         save_config(config)
 
-        # Generate new agent code
-        generate_agent_code(config)
-
-        # Restart worker
-        pid = restart_worker()
+        # Apply the change with the cheapest action it needs
+        plan = apply_config_change(old_config, config)
 
         return jsonify({
-            "message": "STT configuration updated and worker restarted",
-            "worker_pid": pid
+            "message": f"STT configuration updated: {describe_plan(plan)}",
+            "worker_pid": plan["worker_pid"],
+            "plan": plan
         })
 
     @app.route("/api/llm", methods=["POST"])
@@ -398,20 +491,22 @@ def register_routes(app, socketio):
             return jsonify({"error": "Invalid LLM provider"}), 400
 
         config = load_config()
+        old_config = dict(config)
         config["llm_provider"] = provider
         if api_key:
             config["llm_api_key"] = api_key
+        error = invalid_config(config)
+        if error:
+            return error
         save_config(config)
 
-        # Generate new agent code
-        generate_agent_code(config)
-
-        # Restart worker
-        pid = restart_worker()
+        # Apply the change with the cheapest action it needs
+        plan = apply_config_change(old_config, config)
 
         return jsonify({
-            "message": f"LLM provider updated to {provider} and worker restarted",
-            "worker_pid": pid
+            "message": f"LLM provider updated to {provider}: {describe_plan(plan)}",
+            "worker_pid": plan["worker_pid"],
+            "plan": plan
         })
 
     @app.route("/api/worker-mode", methods=["POST"])
@@ -424,21 +519,101 @@ def register_routes(app, socketio):
             return jsonify({"error": "Invalid worker mode"}), 400
 
         config = load_config()
+        old_config = dict(config)
         config["worker_mode"] = mode
         if room:
             config["room_name"] = room
 
+        error = invalid_config(config)
+        if error:
+            return error
         save_config(config)
 
-        # Generate new agent code
-        generate_agent_code(config)
+        # Apply the change with the cheapest action it needs
+        plan = apply_config_change(old_config, config)
+
+        return jsonify({
+            "message": f"Worker mode updated to {mode}: {describe_plan(plan)}",
+            "worker_pid": plan["worker_pid"],
+            "plan": plan
+        })
+
+    # --- Agent Profile Routes ---
+
+    @app.route("/api/profiles", methods=["GET"])
+    def get_profiles():
+        """List agent profiles, optionally filtered by tag"""
+        return jsonify({
+            "profiles": list_profiles(tag=request.args.get("tag"))
+        })
 
-        # Restart worker
-        pid = restart_worker()
+    @app.route("/api/profiles", methods=["POST"])
+    def add_profile():
+        """Create a new agent profile"""
+        data = request.json or {}
+        try:
+            profile = create_profile(data.get("name"), data.get("config", {}), data.get("tags"))
+        except ProfileConflict as e:
+            return jsonify({"error": str(e)}), 409
+        except ConfigValidationError as e:
+            return jsonify({"error": str(e), "errors": e.errors}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({
+            "message": f"Profile {profile['name']} created",
+            "profile": profile
+        }), 201
+
+    @app.route("/api/profiles/<name>", methods=["GET"])
+    def get_single_profile(name):
+        """Get one agent profile"""
+        profile = get_profile(name)
+        if profile is None:
+            return jsonify({"error": f"Profile {name} not found"}), 404
+        return jsonify(profile)
+
+    @app.route("/api/profiles/<name>", methods=["PUT"])
+    def replace_profile(name):
+        """Update an agent profile's config and/or tags, creating a new version"""
+        data = request.json or {}
+        try:
+            profile = update_profile(
+                name,
+                config=data.get("config"),
+                tags=data.get("tags"),
+                expected_version=data.get("expected_version")
+            )
+        except ProfileConflict as e:
+            return jsonify({"error": str(e)}), 409
+        except ConfigValidationError as e:
+            return jsonify({"error": str(e), "errors": e.errors}), 400
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if profile is None:
+            return jsonify({"error": f"Profile {name} not found"}), 404
+        return jsonify({
+            "message": f"Profile {name} updated to version {profile['version']}",
+            "profile": profile
+        })
+
+    @app.route("/api/profiles/<name>", methods=["DELETE"])
+    def remove_profile(name):
+        """Delete an agent profile"""
+        if not delete_profile(name):
+            return jsonify({"error": f"Profile {name} not found"}), 404
+        return jsonify({
+            "message": f"Profile {name} deleted"
+        })
 
+    @app.route("/api/profiles/<name>/versions", methods=["GET"])
+    def get_profile_history(name):
+        """Get the version history of an agent profile"""
+        versions = get_profile_versions(name)
+        if versions is None:
+            return jsonify({"error": f"Profile {name} not found"}), 404
         return jsonify({
-            "message": f"Worker mode updated to {mode} and worker restarted",
-            "worker_pid": pid
+            "name": name,
+            "versions": versions
         })
 
     @app.route("/api/status", methods=["GET"])
@@ -447,25 +622,187 @@ def register_routes(app, socketio):
         status = get_worker_status()
         return jsonify(status)
 
-    @app.route("/api/start", methods=["POST"])
-    def start():
-        """Start worker"""
-        config = load_config()
-        generate_agent_code(config)
-        pid = start_worker()
+    @app.route("/api/events", methods=["GET"])
+    def get_events():
+        """Get the status events after a sequence number (for clients without a socket)"""
+        return jsonify(events_since(request.args.get("since", type=int)))
 
+    @app.route("/api/workers", methods=["GET"])
+    def get_workers():
+        """Get PID, load and health of every worker in the pool"""
         return jsonify({
-            "message": "Worker started",
-            "worker_pid": pid
+            "workers": get_pool_status()
         })
 
+    @app.route("/api/workers", methods=["POST"])
+    def add_worker():
+        """Queue starting one more worker process in the first free pool slot"""
+        job = queue_start_slot()
+        return jsonify({
+            "message": f"Worker start queued (job {job['id']})",
+            "job": job
+        }), 202
+
+    @app.route("/api/workers/<int:worker_id>/start", methods=["POST"])
+    def start_single_worker(worker_id):
+        """Queue starting the worker in one pool slot"""
+        job = queue_start_slot(worker_id)
+        return jsonify({
+            "message": f"Worker {worker_id} start queued (job {job['id']})",
+            "job": job
+        }), 202
+
+    @app.route("/api/workers/<int:worker_id>/stop", methods=["POST"])
+    def stop_single_worker(worker_id):
+        """Queue stopping the worker in one pool slot"""
+        job = queue_stop_slot(worker_id)
+        return jsonify({
+            "message": f"Worker {worker_id} stop queued (job {job['id']})",
+            "job": job
+        }), 202
+
+    @app.route("/api/jobs", methods=["GET"])
+    def get_jobs():
+        """Get recent worker lifecycle jobs, newest first"""
+        return jsonify({
+            "jobs": list_jobs()
+        })
+
+    @app.route("/api/jobs/<job_id>", methods=["GET"])
+    def get_lifecycle_job(job_id):
+        """Get the status of one worker lifecycle job"""
+        job = get_job(job_id)
+        if job is None:
+            return jsonify({"error": f"Job {job_id} not found"}), 404
+        return jsonify(job)
+
+    @app.route("/api/workers/logs", methods=["GET"])
+    @app.route("/api/workers/<int:worker_id>/logs", methods=["GET"])
+    def get_worker_logs(worker_id=None):
+        """Get the last captured output lines of one worker, or of all workers"""
+        try:
+            lines = int(request.args.get("lines", 200))
+            since = request.args.get("since", type=int)
+        except ValueError:
+            return jsonify({"error": "lines must be an integer"}), 400
+        return jsonify({
+            "worker": worker_id,
+            "lines": tail_logs(worker_id, lines, request.args.get("stream"), since)
+        })
+
+    @app.route("/api/workers/logs/search", methods=["GET"])
+    @app.route("/api/workers/<int:worker_id>/logs/search", methods=["GET"])
+    def search_worker_logs(worker_id=None):
+        """Search the captured output of one worker, or of all workers"""
+        query = request.args.get("q")
+        if not query:
+            return jsonify({"error": "q is required"}), 400
+        try:
+            matches = search_logs(
+                query,
+                worker_id,
+                regex=request.args.get("regex") in ("1", "true"),
+                stream=request.args.get("stream"),
+                limit=int(request.args.get("limit", 200)),
+            )
+        except re.error as e:
+            return jsonify({"error": f"Invalid regular expression: {e}"}), 400
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        return jsonify({
+            "worker": worker_id,
+            "query": query,
+            "matches": matches
+        })
+
+    def session_target(source):
+        """The room or job a session control request is limited to (None for all)"""
+        return {"room": source.get("room") or None, "job_id": source.get("job_id") or None}
+
+    @app.route("/api/sessions", methods=["GET"])
+    def get_sessions():
+        """Get the live session of every running job (or of one room/job), keyed by job id"""
+        target = session_target(request.args)
+        result = send_command("status", **target)
+        if result.get("unreachable") and any(target.values()):
+            return jsonify({"error": result["error"]}), 404
+        return jsonify({
+            "sessions": result.get("jobs", {}),
+            "round_trip_ms": result["round_trip_ms"]
+        })
+
+    @app.route("/api/sessions/apply", methods=["POST"])
+    def apply_to_sessions():
+        """Change settings of live sessions in place, in one room/job or all; the saved configuration is not changed"""
+        data = request.json or {}
+        changes = data.get("changes")
+        if not isinstance(changes, dict) or not changes:
+            return jsonify({"error": "changes must be an object of settings to apply"}), 400
+        target = session_target(data)
+        result = send_command("apply", changes, **target)
+        if result.get("unreachable"):
+            return jsonify({"error": result["error"]}), 404
+        status = 200 if result["ok"] else 502
+        return jsonify({
+            "message": f"Applied to {len(result['jobs'])} session(s)" if result["ok"] else "Apply failed in some sessions",
+            "sessions": result["jobs"],
+            "errors": result.get("errors", {}),
+            "round_trip_ms": result["round_trip_ms"]
+        }), status
+
+    @app.route("/api/sessions/memory", methods=["GET"])
+    def get_session_memory():
+        """Get memory accounting of live sessions and the reports of finished ones"""
+        try:
+            limit = int(request.args.get("limit", 20))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        target = session_target(request.args)
+        result = send_command("memory", **target)
+        finished = list_job_reports("memory", limit)
+        if target["room"]:
+            finished = [report for report in finished if report.get("room") == target["room"]]
+        if target["job_id"]:
+            finished = [report for report in finished if report.get("job_id") == target["job_id"]]
+        return jsonify({
+            "live": result.get("jobs", {}),
+            "finished": finished,
+            "round_trip_ms": result["round_trip_ms"]
+        })
+
+    @app.route("/api/latency", methods=["GET"])
+    def get_latency():
+        """Get the per-turn latency breakdown (p50/p95/p99 per stage) of every live session, keyed by job id"""
+        try:
+            recent = int(request.args.get("recent", 10))
+        except ValueError:
+            return jsonify({"error": "recent must be an integer"}), 400
+        target = session_target(request.args)
+        result = send_command("latency", {"recent": recent}, **target)
+        if result.get("unreachable") and any(target.values()):
+            return jsonify({"error": result["error"]}), 404
+        return jsonify({
+            "sessions": {job_id: ack for job_id, ack in result.get("jobs", {}).items() if ack.get("ok")},
+            "round_trip_ms": result["round_trip_ms"]
+        })
+
+    @app.route("/api/start", methods=["POST"])
+    def start():
+        """Queue starting the worker"""
+        job = queue_start()
+        return jsonify({
+            "message": f"Worker start queued (job {job['id']})",
+            "job": job
+        }), 202
+
     @app.route("/api/stop", methods=["POST"])
     def stop():
-        """Stop worker"""
-        stop_worker()
+        """Queue stopping the worker"""
+        job = queue_stop()
         return jsonify({
-            "message": "Worker stopped"
-        })
+            "message": f"Worker stop queued (job {job['id']})",
+            "job": job
+        }), 202
 
     @app.route("/api/update_all", methods=["POST"])
     def update_all_config():
@@ -478,6 +815,7 @@ def register_routes(app, socketio):
         tts_language = data.get("language")
 
         config = load_config()
+        old_config = dict(config)
 
         if llm_provider:
             config["llm_provider"] = llm_provider
@@ -497,11 +835,16 @@ def register_routes(app, socketio):
             if elevenlabs_model:
                 config["tts_elevenlabs_model"] = elevenlabs_model
 
+        error = invalid_config(config)
+        if error:
+            return error
         save_config(config)
-        generate_agent_code(config)
-        restart_worker()
+        plan = apply_config_change(old_config, config)
 
-        return jsonify({"message": "All configuration updated successfully!"})
+        return jsonify({
+            "message": f"All configuration updated successfully: {describe_plan(plan)}",
+            "plan": plan
+        })
 
     # --- Voice Sample Generation Routes ---
 
@@ -3,7 +3,8 @@ from flask import Flask, send_from_directory
 from flask_socketio import SocketIO
 from flask_cors import CORS
 from config_manager import load_config, load_deepgram_models, load_cartesia_voices, load_elevenlabs_voices
-from worker_manager import start_worker
+from worker_manager import start_worker, start_supervisor
+from catalog_sync import start_catalog_sync
 from dotenv import load_dotenv
 from agent_generator import generate_agent_code
 from api_routes import register_routes
@@ -30,7 +31,10 @@ if __name__ == '__main__':
     load_cartesia_voices()
     load_elevenlabs_voices()
 
-    # Generate initial agent code
+    # Keep provider voice catalogs fresh in the background
+    start_catalog_sync()
+
+    # Write the initial worker configuration snapshot
     config = load_config()
     generate_agent_code(config)
 
@@ -40,6 +44,9 @@ if __name__ == '__main__':
     if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' or not app.debug: # Ensure worker starts if debug is off
         start_worker()
 
-    # Start Flask application with default Flask server
+    # Restart crashed workers and sample their resource usage
+    start_supervisor()
+
+    # Start Flask application through SocketIO so the log and status streams get WebSocket transport
     # Set use_reloader=False to prevent Flask from trying to restart the app itself
-    app.run(debug=True, port=5000, use_reloader=False)
+    socketio.run(app, debug=True, port=5000, use_reloader=False, allow_unsafe_werkzeug=True)
@@ -0,0 +1,9 @@
+from livekit.agents import Agent
+
+# The agent the worker runs, kept free of worker setup so the offline
+# simulator (pipeline_sim.py) can import it without loading the worker.
+
+
+class Assistant(Agent):
+    def __init__(self) -> None:
+        super().__init__(instructions="You are a helpful voice AI assistant called llama, you talk with users with Voice.")
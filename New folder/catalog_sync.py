@@ -0,0 +1,432 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from pathlib import Path
+import requests
+from config_manager import (
+    DEEPGRAM_MODELS_FILE,
+    CARTESIA_VOICES_FILE,
+    ELEVENLABS_VOICES_FILE,
+    load_deepgram_models,
+    load_cartesia_voices,
+    load_elevenlabs_voices
+)
+
+# Background sync of provider voice catalogs.
+# Readers always get the last good in-memory snapshot; a background thread
+# refreshes it from each provider's endpoint, diffs by voice id and only
+# rewrites the JSON file when something actually changed.
+
+CATALOG_PROVIDERS = ["deepgram", "cartesia", "elevenlabs"]
+
+CATALOG_FILES = {
+    "deepgram": DEEPGRAM_MODELS_FILE,
+    "cartesia": CARTESIA_VOICES_FILE,
+    "elevenlabs": ELEVENLABS_VOICES_FILE,
+}
+
+CATALOG_LOADERS = {
+    "deepgram": load_deepgram_models,
+    "cartesia": load_cartesia_voices,
+    "elevenlabs": load_elevenlabs_voices,
+}
+
+# Default provider endpoints. Each one can be overridden with an environment
+# variable (e.g. a local stand-in server) or at runtime with set_catalog_endpoint().
+DEFAULT_CATALOG_ENDPOINTS = {
+    "deepgram": "https://api.deepgram.com/v1/models",
+    "cartesia": "https://api.cartesia.ai/voices",
+    "elevenlabs": "https://api.elevenlabs.io/v1/voices",
+}
+
+CATALOG_ENDPOINT_ENV = {
+    "deepgram": "DEEPGRAM_CATALOG_URL",
+    "cartesia": "CARTESIA_CATALOG_URL",
+    "elevenlabs": "ELEVENLABS_CATALOG_URL",
+}
+
+SYNC_INTERVAL = float(os.environ.get("CATALOG_SYNC_INTERVAL", 3600))
+SYNC_TIMEOUT = float(os.environ.get("CATALOG_SYNC_TIMEOUT", 15))
+SYNC_HISTORY_SIZE = 50
+CHANGE_LOG_SIZE = 200  # catalog versions kept for delta responses
+
+_lock = threading.Lock()
+_snapshots = {}  # provider -> list of voices (last good snapshot)
+_endpoints = {}  # provider -> runtime endpoint override
+_sync_in_progress = set()
+_sync_history = {provider: deque(maxlen=SYNC_HISTORY_SIZE) for provider in CATALOG_PROVIDERS}
+_sync_thread = None
+_stop_event = threading.Event()
+
+# Version token for the merged catalog: "<epoch>.<n>". The epoch changes on every
+# server start so clients holding a token from an older process get a full list.
+_catalog_epoch = str(int(time.time()))
+_catalog_version = 0
+_change_log = deque(maxlen=CHANGE_LOG_SIZE)  # (version, provider, upserted ids, removed ids)
+
+
+def get_catalog_endpoint(provider):
+    """Return the endpoint used to fetch a provider's catalog"""
+    if provider in _endpoints:
+        return _endpoints[provider]
+    return os.environ.get(CATALOG_ENDPOINT_ENV[provider], DEFAULT_CATALOG_ENDPOINTS[provider])
+
+
+def set_catalog_endpoint(provider, url):
+    """Override the catalog endpoint for a provider (None restores the default)"""
+    if provider not in CATALOG_PROVIDERS:
+        raise ValueError(f"Unknown catalog provider: {provider}")
+    if url:
+        _endpoints[provider] = url
+    else:
+        _endpoints.pop(provider, None)
+
+
+def get_catalog(provider):
+    """Return the last good catalog snapshot for a provider without touching the network"""
+    if provider not in CATALOG_PROVIDERS:
+        raise ValueError(f"Unknown catalog provider: {provider}")
+    with _lock:
+        snapshot = _snapshots.get(provider)
+    if snapshot is None:
+        snapshot = CATALOG_LOADERS[provider]()
+        with _lock:
+            snapshot = _snapshots.setdefault(provider, snapshot)
+    return snapshot
+
+
+# --- Provider response normalizers ---
+# Provider responses go through the provider's normalizer. Only a list whose
+# entries already carry every catalog field (e.g. from a stand-in endpoint)
+# is passed through unchanged.
+
+CATALOG_FIELDS = ("id", "mode", "name", "description", "created_at", "gender", "language")
+CATALOG_REQUIRED_FIELDS = {
+    "deepgram": CATALOG_FIELDS,
+    "cartesia": CATALOG_FIELDS,
+    "elevenlabs": CATALOG_FIELDS + ("model_names",),
+}
+
+def _auth_headers(provider):
+    if provider == "deepgram":
+        api_key = os.environ.get("DEEPGRAM_API_KEY")
+        return {"Authorization": f"Token {api_key}"} if api_key else {}
+    if provider == "cartesia":
+        api_key = os.environ.get("CARTESIA_API_KEY")
+        headers = {"Cartesia-Version": "2025-04-16"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        return headers
+    if provider == "elevenlabs":
+        api_key = os.environ.get("ELEVEN_API_KEY")
+        return {"xi-api-key": api_key} if api_key else {}
+    return {}
+
+
+def _is_catalog_format(provider, payload):
+    required = CATALOG_REQUIRED_FIELDS[provider]
+    return isinstance(payload, list) and all(
+        isinstance(v, dict) and all(field in v for field in required) for v in payload)
+
+
+def _normalize_deepgram(payload):
+    voices = []
+    for model in payload.get("tts", []):
+        metadata = model.get("metadata", {})
+        languages = model.get("languages") or [""]
+        tags = metadata.get("tags", [])
+        voices.append({
+            "id": model.get("canonical_name") or model.get("name"),
+            "mode": "similarity",
+            "name": model.get("name", ""),
+            "description": ", ".join(tags),
+            "created_at": model.get("created_at", ""),
+            "gender": metadata.get("gender", ""),
+            "language": languages[0],
+        })
+    return voices
+
+
+def _normalize_cartesia(payload):
+    items = payload.get("data", []) if isinstance(payload, dict) else payload
+    return [{
+        "id": voice["id"],
+        "mode": "similarity",
+        "name": voice.get("name", ""),
+        "description": voice.get("description", ""),
+        "created_at": voice.get("created_at", ""),
+        "gender": voice.get("gender", ""),
+        "language": voice.get("language", ""),
+    } for voice in items]
+
+
+def _normalize_elevenlabs(payload):
+    voices = []
+    for voice in payload.get("voices", []):
+        labels = voice.get("labels") or {}
+        voices.append({
+            "id": voice["voice_id"],
+            "mode": "similarity",
+            "name": voice.get("name", ""),
+            "description": voice.get("description") or labels.get("description", ""),
+            "created_at": voice.get("created_at", ""),
+            "gender": labels.get("gender", ""),
+            "language": labels.get("language", "en"),
+            "model_names": voice.get("high_quality_base_model_ids", []),
+        })
+    return voices
+
+
+CATALOG_NORMALIZERS = {
+    "deepgram": _normalize_deepgram,
+    "cartesia": _normalize_cartesia,
+    "elevenlabs": _normalize_elevenlabs,
+}
+
+
+def fetch_catalog(provider):
+    """Fetch and normalize a provider's voice list from its catalog endpoint"""
+    endpoint = get_catalog_endpoint(provider)
+    if endpoint.startswith("file://"):
+        with open(endpoint[len("file://"):], "r") as f:
+            payload = json.load(f)
+    else:
+        response = requests.get(endpoint, headers=_auth_headers(provider), timeout=SYNC_TIMEOUT)
+        response.raise_for_status()
+        payload = response.json()
+
+    if not _is_catalog_format(provider, payload):
+        return CATALOG_NORMALIZERS[provider](payload)
+    return payload
+
+
+def diff_catalog(old_voices, new_voices):
+    """Diff two catalogs by voice id"""
+    old_by_id = {v["id"]: v for v in old_voices}
+    new_by_id = {v["id"]: v for v in new_voices}
+    added = [v for vid, v in new_by_id.items() if vid not in old_by_id]
+    removed = [v for vid, v in old_by_id.items() if vid not in new_by_id]
+    updated = [v for vid, v in new_by_id.items() if vid in old_by_id and old_by_id[vid] != v]
+    return {"added": added, "updated": updated, "removed": removed}
+
+
+def _merge_known_fields(old_voices, new_voices):
+    """Keep fields the endpoint does not report (e.g. model_names) from the stored entry"""
+    old_by_id = {v["id"]: v for v in old_voices}
+    merged = []
+    for voice in new_voices:
+        previous = old_by_id.get(voice["id"], {})
+        entry = dict(previous)
+        entry.update({k: v for k, v in voice.items() if v not in ("", [], None) or k not in previous})
+        merged.append(entry)
+    return merged
+
+
+def _record_change(provider, changes):
+    """Bump the merged catalog version and log which voices changed (caller holds _lock)"""
+    global _catalog_version
+    _catalog_version += 1
+    upserted = [v["id"] for v in changes["added"] + changes["updated"]]
+    removed = [v["id"] for v in changes["removed"]]
+    _change_log.append((_catalog_version, provider, upserted, removed))
+
+
+def _write_catalog(provider, voices):
+    """Atomically replace a provider's catalog file"""
+    path = Path(CATALOG_FILES[provider])
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(voices, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def sync_provider(provider):
+    """Refresh one provider's catalog, writing the file only when it changed"""
+    with _lock:
+        if provider in _sync_in_progress:
+            return None
+        _sync_in_progress.add(provider)
+
+    started = time.time()
+    run = {"provider": provider, "started_at": started, "endpoint": get_catalog_endpoint(provider)}
+    try:
+        current = get_catalog(provider)
+        fetched = fetch_catalog(provider)
+        if not fetched:
+            raise ValueError("Endpoint returned an empty catalog; keeping the current snapshot")
+
+        fetched = _merge_known_fields(current, fetched)
+        changes = diff_catalog(current, fetched)
+        changed = any(changes.values())
+        if changed:
+            _write_catalog(provider, fetched)
+            with _lock:
+                _snapshots[provider] = fetched
+                _record_change(provider, changes)
+
+        run.update({
+            "status": "ok",
+            "written": changed,
+            "added": len(changes["added"]),
+            "updated": len(changes["updated"]),
+            "removed": len(changes["removed"]),
+            "total": len(fetched),
+        })
+    except Exception as e:
+        print(f"Error syncing {provider} catalog: {e}")
+        run.update({"status": "error", "error": str(e), "written": False})
+    finally:
+        run["duration_ms"] = round((time.time() - started) * 1000, 1)
+        with _lock:
+            _sync_in_progress.discard(provider)
+            _sync_history[provider].append(run)
+
+    print(f"Catalog sync for {provider}: {run['status']} in {run['duration_ms']} ms")
+    return run
+
+
+def sync_all():
+    """Refresh every provider catalog"""
+    return {provider: sync_provider(provider) for provider in CATALOG_PROVIDERS}
+
+
+def trigger_sync(provider=None):
+    """Start a one-off sync in the background and return immediately"""
+    providers = [provider] if provider else CATALOG_PROVIDERS
+    thread = threading.Thread(target=lambda: [sync_provider(p) for p in providers], daemon=True)
+    thread.start()
+    return providers
+
+
+def _sync_loop(interval):
+    while not _stop_event.is_set():
+        sync_all()
+        _stop_event.wait(interval)
+
+
+def start_catalog_sync(interval=None):
+    """Start the periodic background sync thread"""
+    global _sync_thread
+    interval = SYNC_INTERVAL if interval is None else interval
+    if interval <= 0:
+        print("Catalog sync disabled")
+        return False
+    if _sync_thread and _sync_thread.is_alive():
+        return True
+
+    # Serve the stored catalogs right away; the first refresh happens in the background
+    for provider in CATALOG_PROVIDERS:
+        get_catalog(provider)
+
+    _stop_event.clear()
+    _sync_thread = threading.Thread(target=_sync_loop, args=(interval,), daemon=True)
+    _sync_thread.start()
+    print(f"Catalog sync started (every {interval} s)")
+    return True
+
+
+def stop_catalog_sync():
+    """Stop the periodic background sync thread"""
+    _stop_event.set()
+    return True
+
+
+def get_sync_status():
+    """Return sync state, latency and diff size of recent runs per provider"""
+    with _lock:
+        return {
+            "running": bool(_sync_thread and _sync_thread.is_alive()),
+            "interval": SYNC_INTERVAL,
+            "providers": {
+                provider: {
+                    "endpoint": get_catalog_endpoint(provider),
+                    "in_progress": provider in _sync_in_progress,
+                    "voices": len(_snapshots.get(provider) or []),
+                    "last_run": _sync_history[provider][-1] if _sync_history[provider] else None,
+                    "history": list(_sync_history[provider]),
+                }
+                for provider in CATALOG_PROVIDERS
+            }
+        }
+
+
+# --- Merged multi-provider catalog ---
+
+def normalize_voice(provider, voice):
+    """Map a provider catalog entry onto the common voice shape"""
+    normalized = {
+        "provider": provider,
+        "id": voice["id"],
+        "name": voice.get("name", voice["id"]),
+        "description": voice.get("description", ""),
+        "language": voice.get("language", ""),
+        "gender": voice.get("gender", ""),
+    }
+    if voice.get("model_names"):
+        normalized["model_names"] = voice["model_names"]
+    # The dashboards show a voice's modes; catalog files store a single "mode"
+    modes = voice.get("modes") or ([voice["mode"]] if voice.get("mode") else [])
+    if modes:
+        normalized["modes"] = modes
+    return normalized
+
+
+def get_catalog_version():
+    """Return the current version token of the merged catalog"""
+    with _lock:
+        return f"{_catalog_epoch}.{_catalog_version}"
+
+
+def _parse_version(token):
+    try:
+        epoch, version = token.split(".")
+        return epoch, int(version)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def get_merged_catalog(since=None):
+    """Return all providers' voices in one list, or only the changes since a version token"""
+    catalogs = {provider: get_catalog(provider) for provider in CATALOG_PROVIDERS}
+    with _lock:
+        version = f"{_catalog_epoch}.{_catalog_version}"
+        current = _catalog_version
+        log = list(_change_log)
+
+    epoch, since_version = _parse_version(since)
+    oldest = log[0][0] if log else current + 1
+    can_delta = (
+        epoch == _catalog_epoch
+        and since_version is not None
+        and since_version <= current
+        and (since_version == current or since_version >= oldest - 1)
+    )
+
+    if not can_delta:
+        voices = [normalize_voice(provider, voice)
+                  for provider in CATALOG_PROVIDERS
+                  for voice in catalogs[provider]]
+        return {"version": version, "delta": False, "voices": voices}
+
+    # Replay the log; the latest operation on a voice wins
+    ops = {}
+    for entry_version, provider, upserted, removed in log:
+        if entry_version <= since_version:
+            continue
+        for voice_id in upserted:
+            ops[(provider, voice_id)] = "upsert"
+        for voice_id in removed:
+            ops[(provider, voice_id)] = "remove"
+
+    upserts = []
+    removals = []
+    for (provider, voice_id), op in ops.items():
+        voice = next((v for v in catalogs[provider] if v["id"] == voice_id), None)
+        if op == "upsert" and voice is not None:
+            upserts.append(normalize_voice(provider, voice))
+        else:
+            removals.append({"provider": provider, "id": voice_id})
+
+    return {"version": version, "delta": True, "upserted": upserts, "removed": removals}
@@ -1,4 +1,7 @@
+import os
+import copy
 import json
+import time
 from pathlib import Path
 # At the top of the file
 from voice_models import (
@@ -11,6 +14,8 @@ CONFIG_FILE = 'agent_config.json'
 DEEPGRAM_MODELS_FILE = 'deepgram.json'
 CARTESIA_VOICES_FILE = 'cartesia_voices.json'
 ELEVENLABS_VOICES_FILE = 'elevenlabs_voices.json'
+# Validated configuration snapshot read by the running worker
+WORKER_SNAPSHOT_FILE = 'agent_worker_config.json'
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -22,21 +27,37 @@ DEFAULT_CONFIG = {
     "tts_model": "",
     "tts_language": "en",
     "vad_provider": "silero",
+    "turn_detection": "multilingual",
+    "vad_min_silence_duration": 0.55,
+    "vad_activation_threshold": 0.5,
+    "min_endpointing_delay": 0.5,
     "use_noise_cancellation": True,
     "worker_mode": "dev",
-    "room_name": "default-room"
+    "room_name": "default-room",
+    "worker_pool_size": 1,
+    "worker_cpu_pinning": False,
+    "worker_restart_strategy": "blue_green",
+    "worker_drain_timeout": 300,
+    "tts_priming_text": "Hi.",
+    "tts_cache": True,
+    "tts_fallback": [],
+    "tts_failover_ttfb": 1.5,
+    "greeting_text": "",
+    "session_memory_accounting": False
 }
 
 def load_config():
-    """Load configuration from file or create default if not exists"""
+    """Load configuration from file (merged over the defaults) or create default if not exists"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
     config_path = Path(CONFIG_FILE)
     if config_path.exists():
+        # Settings added since the file was written take their default value
         with open(config_path, 'r') as f:
-            return json.load(f)
+            config.update(json.load(f))
     else:
         with open(config_path, 'w') as f:
             json.dump(DEFAULT_CONFIG, f, indent=2)
-        return DEFAULT_CONFIG
+    return config
 
 
 def save_config(config):
@@ -48,6 +69,90 @@ def save_config(config):
     except Exception as e:
         print(f"Error saving configuration to {CONFIG_FILE}: {e}")
 
+# Providers the worker's factory registry supports (see providers.py)
+SUPPORTED_PROVIDERS = {
+    "stt_provider": ["deepgram"],
+    "llm_provider": ["groq", "openai", "lamapbx"],
+    "tts_provider": ["cartesia", "deepgram", "elevenlabs"],
+    "vad_provider": ["silero"],
+    "turn_detection": ["multilingual"],
+}
+
+# Settings a tts_fallback entry may override
+TTS_FALLBACK_FIELDS = {"tts_provider", "tts_model", "tts_elevenlabs_model", "tts_language"}
+
+class ConfigValidationError(ValueError):
+    """An invalid configuration, with one message per problem in errors"""
+
+    def __init__(self, errors):
+        super().__init__("Invalid configuration: " + "; ".join(errors))
+        self.errors = errors
+
+def validate_config(config):
+    """Return the configuration merged over the defaults, raising ValueError if it is invalid"""
+    merged = dict(DEFAULT_CONFIG)
+    merged.update(config)
+    errors = []
+    for key, supported in SUPPORTED_PROVIDERS.items():
+        if merged.get(key) not in supported:
+            errors.append(f"{key} must be one of {supported}, got {merged.get(key)!r}")
+    if merged.get("stt_provider") == "deepgram" and not merged.get("stt_model"):
+        errors.append("stt_model is required for deepgram STT")
+    if not isinstance(merged.get("use_noise_cancellation"), bool):
+        errors.append("use_noise_cancellation must be true or false")
+    pool_size = merged.get("worker_pool_size")
+    if pool_size != "auto" and not (isinstance(pool_size, int) and not isinstance(pool_size, bool) and pool_size >= 1):
+        errors.append("worker_pool_size must be a positive integer or \"auto\"")
+    if merged.get("worker_restart_strategy") not in ("blue_green", "stop_start"):
+        errors.append("worker_restart_strategy must be \"blue_green\" or \"stop_start\"")
+    drain_timeout = merged.get("worker_drain_timeout")
+    if isinstance(drain_timeout, bool) or not isinstance(drain_timeout, (int, float)) or drain_timeout < 0:
+        errors.append("worker_drain_timeout must be a number of seconds >= 0")
+    for key in ("vad_min_silence_duration", "min_endpointing_delay"):
+        value = merged.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            errors.append(f"{key} must be a number of seconds >= 0")
+    threshold = merged.get("vad_activation_threshold")
+    if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or not 0 < threshold < 1:
+        errors.append("vad_activation_threshold must be between 0 and 1")
+    if not isinstance(merged.get("session_memory_accounting"), bool):
+        errors.append("session_memory_accounting must be true or false")
+    fallback = merged.get("tts_fallback")
+    if not isinstance(fallback, list):
+        errors.append("tts_fallback must be a list of TTS provider settings")
+    else:
+        for index, entry in enumerate(fallback):
+            if not isinstance(entry, dict) or entry.get("tts_provider") not in SUPPORTED_PROVIDERS["tts_provider"]:
+                errors.append(f"tts_fallback[{index}] must set tts_provider to one of {SUPPORTED_PROVIDERS['tts_provider']}")
+            elif set(entry) - TTS_FALLBACK_FIELDS:
+                errors.append(f"tts_fallback[{index}] may only set {sorted(TTS_FALLBACK_FIELDS)}")
+    failover_ttfb = merged.get("tts_failover_ttfb")
+    if isinstance(failover_ttfb, bool) or not isinstance(failover_ttfb, (int, float)) or failover_ttfb <= 0:
+        errors.append("tts_failover_ttfb must be a number of seconds > 0")
+    if errors:
+        raise ConfigValidationError(errors)
+    return merged
+
+def save_worker_snapshot(config):
+    """Validate the configuration and atomically write the snapshot the worker runs with"""
+    snapshot = {
+        "written_at": time.time(),
+        "config": validate_config(config),
+    }
+    tmp_path = WORKER_SNAPSHOT_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, WORKER_SNAPSHOT_FILE)
+    return WORKER_SNAPSHOT_FILE
+
+def load_worker_snapshot():
+    """Load the worker configuration snapshot, falling back to the saved configuration"""
+    snapshot_path = Path(WORKER_SNAPSHOT_FILE)
+    if snapshot_path.exists():
+        with open(snapshot_path, 'r') as f:
+            return json.load(f)["config"]
+    return validate_config(load_config())
+
 def load_deepgram_models():
     """Load Deepgram voice models from file or create default if not exists"""
     models_path = Path(DEEPGRAM_MODELS_FILE)
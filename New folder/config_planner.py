@@ -0,0 +1,159 @@
+import time
+from agent_generator import generate_agent_code
+from worker_manager import running_worker_pid
+from lifecycle_jobs import queue_restart, queue_hot_apply
+from worker_control import HOT_COMPONENT_FIELDS
+from status_events import publish
+
+# Plans the cheapest way to apply a configuration change.
+# Each changed field is classified as no-op, hot-applicable (can be pushed
+# into the running worker) or restart-required; the plan runs a single action:
+#   none       - nothing changed
+#   regenerate - worker is not running, only the config snapshot is rewritten
+#   hot_apply  - snapshot rewritten, a job queued in which the worker reloads it and
+#                live sessions swap components (falling back to a restart)
+#   restart    - snapshot rewritten and a worker restart queued (see lifecycle_jobs)
+# Both queued actions return the lifecycle job, so HTTP handlers never wait on the worker.
+
+NOOP = "noop"
+HOT_APPLY = "hot_apply"
+RESTART_REQUIRED = "restart_required"
+
+ACTION_NONE = "none"
+ACTION_REGENERATE = "regenerate"
+ACTION_HOT_APPLY = "hot_apply"
+ACTION_RESTART = "restart"
+
+# Fields the running worker can apply in place; everything else needs a restart
+HOT_APPLICABLE_FIELDS = HOT_COMPONENT_FIELDS
+
+# Fields the worker picks up from a reloaded snapshot for new sessions
+RELOAD_FIELDS = {
+    "vad_provider", "turn_detection", "use_noise_cancellation", "tts_priming_text", "tts_cache", "greeting_text",
+    "vad_min_silence_duration", "vad_activation_threshold", "min_endpointing_delay",
+    "session_memory_accounting",
+}
+
+# Fields only the control plane reads. The drain timeout is handed to workers
+# when they start, so running workers keep theirs until their next restart.
+NOOP_FIELDS = {"worker_restart_strategy", "worker_drain_timeout", "worker_ready_timeout"}
+
+# Fields the worker only reads in one worker mode (room_name: the room "connect" joins)
+MODE_FIELDS = {"room_name": "connect"}
+
+# Values of these fields are masked in plans returned to API clients
+SECRET_FIELDS = {"llm_api_key"}
+
+
+def classify_field(field, config=None):
+    """Return how a change to a config field can be applied (in the worker mode of config)"""
+    if field in NOOP_FIELDS:
+        return NOOP
+    if field in MODE_FIELDS and (config or {}).get("worker_mode", "dev") != MODE_FIELDS[field]:
+        return NOOP
+    if field in RELOAD_FIELDS:
+        return HOT_APPLY
+    for fields in HOT_APPLICABLE_FIELDS.values():
+        if field in fields:
+            return HOT_APPLY
+    return RESTART_REQUIRED
+
+
+def diff_config(old_config, new_config):
+    """Return the fields whose value differs between two configurations"""
+    changes = {}
+    for key in sorted(set(old_config) | set(new_config)):
+        old_value = old_config.get(key)
+        new_value = new_config.get(key)
+        if old_value != new_value:
+            if key in SECRET_FIELDS:
+                old_value = "***" if old_value else old_value
+                new_value = "***" if new_value else new_value
+            changes[key] = {
+                "old": old_value,
+                "new": new_value,
+                "class": classify_field(key, new_config),
+            }
+    return changes
+
+
+def plan_config_change(old_config, new_config, worker_running=None):
+    """Classify the changes between two configurations and pick the cheapest action"""
+    if worker_running is None:
+        worker_running = running_worker_pid() is not None
+
+    changes = diff_config(old_config, new_config)
+    classes = {change["class"] for change in changes.values()}
+    components = sorted({
+        component
+        for component, fields in HOT_APPLICABLE_FIELDS.items()
+        if any(field in changes for field in fields)
+    })
+
+    if not changes or classes == {NOOP}:
+        action = ACTION_NONE
+    elif not worker_running:
+        action = ACTION_REGENERATE
+    elif RESTART_REQUIRED in classes:
+        action = ACTION_RESTART
+    else:
+        action = ACTION_HOT_APPLY
+
+    return {
+        "action": action,
+        "changes": changes,
+        "hot_components": components,
+        "worker_running": worker_running,
+    }
+
+
+def execute_config_plan(plan, config):
+    """Run the action chosen by plan_config_change and record the outcome on the plan"""
+    started = time.time()
+    action = plan["action"]
+    plan["worker_pid"] = running_worker_pid()
+    if action != ACTION_NONE:
+        publish("config_changed", {
+            "action": action,
+            "changes": plan["changes"],
+            "hot_components": plan["hot_components"],
+        })
+
+    if action == ACTION_REGENERATE:
+        generate_agent_code(config)
+    elif action == ACTION_HOT_APPLY:
+        # New jobs get the new settings from the snapshot; reloading it and
+        # swapping components in live sessions runs as a lifecycle job
+        generate_agent_code(config)
+        plan["job"] = queue_hot_apply(plan["hot_components"])
+    elif action == ACTION_RESTART:
+        # Restarts run in the background and merge with other pending restarts;
+        # restart_worker rewrites the snapshot from the latest config when it runs
+        plan["job"] = queue_restart()
+
+    plan["elapsed_ms"] = round((time.time() - started) * 1000, 1)
+    print(f"Config plan executed: {plan['action']} in {plan['elapsed_ms']} ms")
+    if action != ACTION_NONE:
+        publish("config_applied", {
+            "action": plan["action"],
+            "elapsed_ms": plan["elapsed_ms"],
+            "worker_pid": plan["worker_pid"],
+            "job_id": plan["job"]["id"] if plan.get("job") else None,
+        })
+    return plan
+
+
+def apply_config_change(old_config, new_config):
+    """Plan and apply a configuration change that has already been saved"""
+    plan = plan_config_change(old_config, new_config)
+    return execute_config_plan(plan, new_config)
+
+
+def describe_plan(plan):
+    """Short human readable description of what a plan did"""
+    return {
+        ACTION_NONE: "no changes were needed",
+        ACTION_REGENERATE: "worker configuration saved (worker not running)",
+        ACTION_HOT_APPLY: f"update of the running worker queued (job {plan['job']['id']})" if plan.get("job") else "update of the running worker queued",
+        ACTION_RESTART: f"worker restart queued (job {plan['job']['id']})" if plan.get("job") else "worker restart queued",
+    }[plan["action"]]
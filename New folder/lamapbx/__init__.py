@@ -1,10 +1,13 @@
 # __init__.py - Simplified for LiveKit Agents 1.0
 
-from .llm import LLM, LLMStream
+from .llm import LLM, LLMStream, create_http_client
+from .segmenter import split_segments
 
 __all__ = [
     "LLM", 
     "LLMStream",
+    "create_http_client",
+    "split_segments",
 ]
 
 __version__ = "0.1.0"
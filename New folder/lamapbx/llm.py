@@ -23,6 +23,7 @@ from livekit.rtc.event_emitter import EventEmitter
 from livekit.agents.utils import aio
 from livekit.agents._exceptions import APIError
 from livekit.agents.llm import CompletionUsage
+from .segmenter import split_segments
 
 # Basic logger for demonstration purposes. In a real application, use a proper logging setup.
 class Logger:
@@ -33,6 +34,31 @@ class Logger:
 
 logger = Logger()
 
+def create_http_client(api_key: str, timeout: float = 30.0) -> httpx.AsyncClient:
+    """Create the pooled HTTP client used to talk to the lamapbx (Dify) API.
+
+    The client can be shared by several LLM instances (e.g. one per call) so
+    they reuse warm keep-alive connections.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=10,
+            max_keepalive_connections=5,
+            keepalive_expiry=30,
+        ),
+        timeout=httpx.Timeout(
+            connect=15.0,
+            read=timeout,
+            write=15.0,
+            pool=5.0
+        ),
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        },
+    )
+
 @dataclass
 class LLMOptions:
     model: str
@@ -54,6 +80,8 @@ class LLM(llm.LLM, EventEmitter):
         max_retries: int = 3,
         timeout: float = 30.0,
         use_blocking_mode: bool = True,
+        segment_answers: bool = True,
+        segment_language: str | None = None,
     ) -> None:
         super().__init__()
         self.api_key = api_key or os.environ.get("lamapbx_API_KEY")
@@ -65,25 +93,13 @@ class LLM(llm.LLM, EventEmitter):
         self.timeout = timeout
         self.max_retries = max_retries
         self.use_blocking_mode = use_blocking_mode
+        # Answers are emitted sentence by sentence so TTS can start on the first one
+        self.segment_answers = segment_answers
+        self.segment_language = segment_language
         
-        self._client = client or httpx.AsyncClient(
-            limits=httpx.Limits(
-                max_connections=10,
-                max_keepalive_connections=5,
-                keepalive_expiry=30,
-            ),
-            timeout=httpx.Timeout(
-                connect=15.0,
-                read=timeout,
-                write=15.0,
-                pool=5.0
-            ),
-            headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            },
-        )
+        # A client passed in is shared with other instances and is not closed by us
+        self._owns_client = client is None
+        self._client = client or create_http_client(self.api_key, timeout)
         
         self._conversation_id = ""
         self._active_streams: set[LLMStream] = set()
@@ -211,7 +227,8 @@ class LLM(llm.LLM, EventEmitter):
         self._closed = True
         try:
             await self._cleanup_streams()
-            await self._client.aclose()
+            if self._owns_client:
+                await self._client.aclose()
         except Exception as e:
             logger.error("Error during close", exc_info=e)
 
@@ -292,19 +309,25 @@ class LLMStream(llm.LLMStream):
                 if "conversation_id" in response_data:
                     self._conversation_id_callback(response_data["conversation_id"])
                 
+                answer = response_data.get("answer", "")
+                segments = split_segments(answer, self.llm.segment_language) if self.llm.segment_answers else [answer]
+                usage = response_data.get("metadata", {}).get("usage", {})
                 try:
-                    await self._event_ch.send(ChatChunk(
-                        id=str(uuid.uuid4()),
-                        delta=ChoiceDelta(
-                            content=response_data.get("answer", ""),
-                            role="assistant"
-                        ),
-                        usage=CompletionUsage(
-                            completion_tokens=response_data.get("metadata", {}).get("usage", {}).get("completion_tokens", 0),
-                            prompt_tokens=response_data.get("metadata", {}).get("usage", {}).get("prompt_tokens", 0),
-                            total_tokens=response_data.get("metadata", {}).get("usage", {}).get("total_tokens", 0)
-                        )
-                    ))
+                    # One chunk per sentence/clause; usage goes with the last one
+                    for index, segment in enumerate(segments or [""]):
+                        last = index == len(segments or [""]) - 1
+                        await self._event_ch.send(ChatChunk(
+                            id=str(uuid.uuid4()),
+                            delta=ChoiceDelta(
+                                content=segment,
+                                role="assistant"
+                            ),
+                            usage=CompletionUsage(
+                                completion_tokens=usage.get("completion_tokens", 0),
+                                prompt_tokens=usage.get("prompt_tokens", 0),
+                                total_tokens=usage.get("total_tokens", 0)
+                            ) if last else None
+                        ))
                 except aio.ChanClosed:
                     logger.debug("Channel closed before response could be sent. Performing clean aclose.")
                     await self.aclose() # Explicitly close the stream
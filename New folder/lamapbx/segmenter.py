@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+# Splits a complete answer into sentence (and, for long sentences, clause)
+# segments so they can be emitted as separate chunks and TTS can start on the
+# first one. Segments keep their trailing whitespace: joined back together
+# they give the original text exactly.
+
+ABBREVIATIONS = {
+    "en": {
+        "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "etc", "e.g", "i.e",
+        "inc", "ltd", "co", "corp", "approx", "dept", "est", "fig", "min", "max",
+        "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+        "a.m", "p.m", "u.s", "u.k",
+    },
+    "de": {"z.b", "u.a", "bzw", "usw", "ca", "nr", "str", "dr", "prof", "hr", "fr", "d.h", "evtl", "ggf", "inkl", "vgl"},
+    "fr": {"m", "mme", "mlle", "dr", "pr", "st", "ste", "etc", "av", "bd", "n°", "p.ex", "c.-à-d"},
+    "es": {"sr", "sra", "srta", "dr", "dra", "ud", "uds", "etc", "pág", "núm", "av", "p.ej"},
+    "it": {"sig", "sig.ra", "dott", "prof", "ecc", "pag", "n"},
+    "pt": {"sr", "sra", "dr", "dra", "etc", "pág", "av", "n.º"},
+}
+ALL_ABBREVIATIONS = set().union(*ABBREVIATIONS.values())
+# Abbreviations that are also words ("No."), only taken as such before a number ("No. 5")
+NUMBER_ABBREVIATIONS = {"no"}
+
+# Sentence end: terminal punctuation and optional closing quotes/brackets, followed by
+# whitespace or the end of the text; CJK and Arabic full stops need no whitespace
+FULL_STOPS = "。！？؟"
+SENTENCE_END = re.compile(r'(?:(?P<punct>[.!?…]+)["\'”’»)\]]*(?:\s+|$))|(?:(?P<full>[' + FULL_STOPS + r']+)["\'”’»)\]]*\s*)')
+
+# Languages that write ordinals as "3." ("am 3. Mai")
+ORDINAL_PERIOD_LANGUAGES = {"de", "da", "no", "nb", "fi", "cs", "pl", "hu", "tr"}
+# Clause break inside a long sentence; commas between digits (1,000) are not breaks
+CLAUSE_END = re.compile(r'(?<!\d)([,;:،、，；]|\s[–—])(?!\d)\s+')
+
+MAX_SENTENCE_CHARS = 120
+MIN_SEGMENT_CHARS = 20
+
+
+def _is_abbreviation(text: str, end: int, abbreviations: set) -> bool:
+    """Whether the period ending at text[end] belongs to an abbreviation or an initial"""
+    start = end
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    word = text[start:end].lstrip("\"'“‘«([").lower()
+    if not word:
+        return False
+    if word in abbreviations:
+        return True
+    if word in NUMBER_ABBREVIATIONS:
+        return text[end + 1:].lstrip()[:1].isdigit()
+    # Single letters are initials ("J. R. R. Tolkien")
+    return len(word) == 1 and word.isalpha()
+
+
+def _is_sentence_break(text: str, match: re.Match, abbreviations: set, ordinal_periods: bool) -> bool:
+    if match.group("full") or match.end() >= len(text):
+        return True
+    if match.group("punct") != ".":
+        return True
+    period = match.start("punct")
+    if _is_abbreviation(text, period, abbreviations):
+        return False
+    if ordinal_periods and text[period - 1:period].isdigit():
+        return False
+    # A sentence rarely starts in lowercase; "approx. ten" style abbreviations we do not know
+    return not text[match.end()].islower()
+
+
+def _split_clauses(sentence: str) -> List[str]:
+    """Break a long sentence at clause punctuation into pieces of a useful length"""
+    pieces, start = [], 0
+    for match in CLAUSE_END.finditer(sentence):
+        if match.end() - start >= MIN_SEGMENT_CHARS and len(sentence) - match.end() >= MIN_SEGMENT_CHARS:
+            pieces.append(sentence[start:match.end()])
+            start = match.end()
+    pieces.append(sentence[start:])
+    return pieces
+
+
+def split_segments(text: str, language: Optional[str] = None) -> List[str]:
+    """Split text into sentence/clause segments that concatenate back to the original text"""
+    if not text:
+        return []
+    base_language = (language or "").split("-")[0].lower()
+    abbreviations = ABBREVIATIONS.get(base_language, ALL_ABBREVIATIONS)
+    if base_language:
+        # English abbreviations turn up in every language
+        abbreviations = abbreviations | ABBREVIATIONS["en"]
+    ordinal_periods = base_language in ORDINAL_PERIOD_LANGUAGES
+
+    sentences, start = [], 0
+    for match in SENTENCE_END.finditer(text):
+        if match.end() <= start or not _is_sentence_break(text, match, abbreviations, ordinal_periods):
+            continue
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+
+    segments: List[str] = []
+    for sentence in sentences:
+        pieces = _split_clauses(sentence) if len(sentence) > MAX_SENTENCE_CHARS else [sentence]
+        for piece in pieces:
+            # Stray punctuation or whitespace is not worth a separate synthesis
+            if segments and not any(c.isalnum() for c in piece):
+                segments[-1] += piece
+            else:
+                segments.append(piece)
+    return segments
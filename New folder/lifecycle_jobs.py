@@ -0,0 +1,217 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from status_events import publish
+from config_manager import load_config
+from agent_generator import generate_agent_code
+from worker_manager import start_worker, stop_worker, restart_worker, start_pool_worker, stop_pool_worker
+from worker_control import send_command, apply_components
+
+# Queue of worker lifecycle operations (start, stop, restart, ...). HTTP
+# handlers submit a job and return its handle right away; one runner thread
+# executes the jobs in order, so operations never overlap. A request for an
+# operation that is already waiting in the queue is merged into that job: a
+# burst of config changes becomes a single restart, and because the
+# operation reads the config when it runs, it uses the latest one.
+
+COALESCE_WINDOW = float(os.environ.get("LIFECYCLE_COALESCE_WINDOW", 0.5))
+JOB_HISTORY = 100
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_jobs = OrderedDict()  # job id -> job, oldest first
+_operations = {}  # job id -> callable
+_queue = []  # ids of queued jobs in run order
+_cond = threading.Condition()
+_runner = None
+
+
+def _public(job):
+    return dict(job)
+
+
+def _publish(job):
+    publish("lifecycle_job", _public(job))
+
+
+def submit_job(operation, func, target=None):
+    """Queue a lifecycle operation and return its job handle.
+
+    Jobs with the same operation and target that are still queued are merged,
+    so the caller may get back a job that was submitted by someone else.
+    """
+    global _runner
+    now = time.time()
+    with _cond:
+        # Only merge into the last queued job, so the order of operations is kept
+        last = _jobs[_queue[-1]] if _queue else None
+        if last and last["operation"] == operation and last["target"] == target:
+            last["requests"] += 1
+            _operations[last["id"]] = func # the latest request's operation wins
+            print(f"Lifecycle {operation} request merged into job {last['id']} ({last['requests']} requests)")
+            return _public(last)
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "operation": operation,
+            "target": target,
+            "status": QUEUED,
+            "requests": 1,
+            "created_at": now,
+            "run_at": now + COALESCE_WINDOW,
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        _jobs[job["id"]] = job
+        _operations[job["id"]] = func
+        _queue.append(job["id"])
+        while len(_jobs) > JOB_HISTORY:
+            oldest = next(iter(_jobs))
+            if _jobs[oldest]["status"] in (QUEUED, RUNNING):
+                break
+            _jobs.popitem(last=False)
+
+        if _runner is None or not _runner.is_alive():
+            _runner = threading.Thread(target=_run_jobs, daemon=True)
+            _runner.start()
+        _cond.notify()
+    _publish(job)
+    return _public(job)
+
+
+def _next_job():
+    with _cond:
+        while True:
+            if _queue:
+                job = _jobs[_queue[0]]
+                # Wait out the coalescing window so near-simultaneous requests merge
+                delay = job["run_at"] - time.time()
+                if delay <= 0:
+                    _queue.pop(0)
+                    job["status"] = RUNNING
+                    job["started_at"] = time.time()
+                    return job, _operations.pop(job["id"])
+                _cond.wait(delay)
+            else:
+                _cond.wait()
+
+
+def _run_jobs():
+    while True:
+        job, func = _next_job()
+        _publish(job)
+        print(f"Running lifecycle job {job['id']}: {job['operation']} ({job['requests']} requests)")
+        try:
+            job["result"] = func()
+            job["status"] = SUCCEEDED
+        except Exception as e:
+            print(f"Lifecycle job {job['id']} failed: {e}")
+            job["error"] = str(e)
+            job["status"] = FAILED
+        job["finished_at"] = time.time()
+        _publish(job)
+
+
+def get_job(job_id):
+    """Return a job by id, or None if it is unknown"""
+    with _cond:
+        job = _jobs.get(job_id)
+        return _public(job) if job else None
+
+
+def list_jobs():
+    """All remembered jobs, newest first"""
+    with _cond:
+        return [_public(job) for job in reversed(_jobs.values())]
+
+
+# Lifecycle operations offered to the API. Each reads the config when it
+# runs, not when it is queued.
+
+def _start_pool():
+    generate_agent_code(load_config())
+    pid = start_worker()
+    if pid is None:
+        raise RuntimeError("Failed to start worker")
+    return {"worker_pid": pid}
+
+
+def _stop_pool():
+    stop_worker()
+    return {}
+
+
+def _restart_pool():
+    pid = restart_worker()
+    if pid is None:
+        raise RuntimeError("Failed to restart worker")
+    return {"worker_pid": pid}
+
+
+def queue_start():
+    """Queue starting the worker pool"""
+    return submit_job("start", _start_pool)
+
+
+def queue_stop():
+    """Queue stopping the worker pool"""
+    return submit_job("stop", _stop_pool)
+
+
+def queue_restart():
+    """Queue a restart of the worker pool with the latest configuration"""
+    return submit_job("restart", _restart_pool)
+
+
+def queue_hot_apply(components):
+    """Queue pushing the latest configuration into the running worker.
+
+    The worker reloads its snapshot (for new jobs) and live sessions on the
+    default config swap the given components in place. If that fails a
+    restart is queued instead, and this job fails with the reason.
+    """
+    def run():
+        config = load_config()
+        result = send_command("reload")
+        if result.get("unreachable"):
+            # No job is running, so there is no live session to update; the
+            # worker reads the new snapshot when its next job starts
+            return {"ok": True, "active_session": False, "round_trip_ms": result["round_trip_ms"]}
+        if result.get("ok") and components:
+            result = apply_components(config, components)
+        if not result.get("ok"):
+            reason = result.get("error") or result.get("errors")
+            restart = queue_restart()
+            raise RuntimeError(f"Hot apply failed ({reason}), restart queued as job {restart['id']}")
+        return result
+    # Only identical component sets merge, so a merged job still swaps everything that changed
+    return submit_job("hot_apply", run, target=",".join(sorted(components)))
+
+
+def queue_start_slot(slot=None):
+    """Queue starting one worker (in the first free slot if none is given)"""
+    def run():
+        config = load_config()
+        generate_agent_code(config)
+        pid = start_pool_worker(slot, config)
+        if pid is None:
+            raise RuntimeError("Failed to start worker" + (f" {slot}" if slot is not None else ""))
+        return {"worker_pid": pid}
+    # Adding workers to free slots must not merge: each request adds one worker
+    return submit_job("start_worker", run, target=slot if slot is not None else uuid.uuid4().hex)
+
+
+def queue_stop_slot(slot):
+    """Queue stopping the worker in one slot"""
+    def run():
+        if not stop_pool_worker(slot):
+            raise RuntimeError(f"Worker {slot} is not running")
+        return {}
+    return submit_job("stop_worker", run, target=slot)
@@ -0,0 +1,138 @@
+import gc
+import os
+import time
+import threading
+import tracemalloc
+
+# Opt-in per-session memory accounting (session_memory_accounting in the
+# config). A tracemalloc snapshot and a count of the livekit objects that
+# carry per-call state (sessions, rooms, LLM/STT/TTS streams, lamapbx
+# active streams) are taken when the session starts and again after it has
+# been closed and unregistered. The diff shows which allocation sites grew
+# and which objects outlived the call. LiveKit runs each job in a process of
+# its own, so the counts belong to the measured call alone.
+# Tracing is started for the first accounted session and stopped when the
+# last one ends. Collecting and snapshotting block for a while, so the worker
+# runs them in a thread, off the job's event loop.
+
+TRACE_FRAMES = int(os.environ.get("MEMORY_TRACE_FRAMES", 5))
+TOP_ALLOCATIONS = 15
+# Allocations of the profiler and import machinery are noise
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0
+_started_tracing = False  # whether we started tracemalloc (and so may stop it)
+
+
+def enabled(config):
+    return bool(config.get("session_memory_accounting", False))
+
+
+def _tracked_types():
+    from livekit import rtc
+    from livekit.agents import AgentSession, llm, stt, tts
+    return {
+        "AgentSession": AgentSession,
+        "Room": rtc.Room,
+        "AudioStream": rtc.AudioStream,
+        "LLMStream": llm.LLMStream,
+        "SpeechStream": stt.SpeechStream,
+        "ChunkedStream": tts.ChunkedStream,
+        "SynthesizeStream": tts.SynthesizeStream,
+    }
+
+
+def count_objects():
+    """Live objects of each tracked type, plus the streams lamapbx LLMs still hold"""
+    import lamapbx
+    types = _tracked_types()
+    counts = {name: 0 for name in types}
+    counts["lamapbx_active_streams"] = 0
+    for obj in gc.get_objects():
+        for name, cls in types.items():
+            if isinstance(obj, cls):
+                counts[name] += 1
+        if isinstance(obj, lamapbx.LLM):
+            counts["lamapbx_active_streams"] += len(obj._active_streams)
+    return counts
+
+
+def _acquire_tracing():
+    global _tracing_sessions, _started_tracing
+    with _tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            _started_tracing = True
+        _tracing_sessions += 1
+
+
+def _release_tracing():
+    global _tracing_sessions, _started_tracing
+    with _tracing_lock:
+        _tracing_sessions -= 1
+        if _tracing_sessions == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in IGNORED_FILES])
+
+
+class SessionMemoryAccount:
+    """Memory of one session: a baseline at start, compared with the state after cleanup"""
+
+    def __init__(self, room, job_id):
+        self.room = room
+        self.job_id = job_id
+        self.started_at = None
+        self._baseline = None
+        self._baseline_counts = None
+        self._tracing = False
+
+    def start(self):
+        """Take the baseline; starts tracemalloc if the process is not tracing yet"""
+        _acquire_tracing()
+        self._tracing = True
+        gc.collect()
+        self.started_at = time.time()
+        self._baseline = _snapshot()
+        self._baseline_counts = count_objects()
+
+    def report(self, final=False):
+        """Diff against the baseline: grown allocation sites and tracked object counts"""
+        gc.collect()
+        snapshot = _snapshot()
+        counts = count_objects()
+        stats = snapshot.compare_to(self._baseline, "lineno")
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        deltas = {name: counts[name] - self._baseline_counts.get(name, 0) for name in counts}
+        return {
+            "room": self.room,
+            "job_id": self.job_id,
+            "final": final,
+            "started_at": self.started_at,
+            "duration_s": round(time.time() - self.started_at, 1),
+            "size_diff_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+            "traced_kb": round(traced_current / 1024, 1),
+            "traced_peak_kb": round(traced_peak / 1024, 1),
+            "top_allocations": [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:TOP_ALLOCATIONS] if stat.size_diff > 0
+            ],
+            "objects": {"start": self._baseline_counts, "end": counts, "diff": deltas},
+            "leaked_objects": {name: delta for name, delta in deltas.items() if delta > 0},
+        }
+
+    def stop(self):
+        """End the account; tracing stops once no other session is being accounted"""
+        if self._tracing:
+            self._tracing = False
+            self._baseline = None
+            _release_tracing()
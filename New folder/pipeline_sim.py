@@ -0,0 +1,307 @@
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from livekit import rtc
+from livekit.agents import AgentSession, llm, tts, utils
+from livekit.agents.llm import ChatChunk, ChoiceDelta
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+from livekit.agents.voice import io
+from assistant import Assistant
+from turn_metrics import percentile, PERCENTILES
+
+# Offline end-to-end pipeline simulator. The Assistant agent runs in a real
+# AgentSession, but with stand-in STT, LLM and TTS that answer locally after
+# a configurable latency (mean and jitter), and with an audio output that only
+# records when frames arrive. No room and no network are involved, so the
+# turn latency of pipeline changes can be benchmarked and checked anywhere.
+#
+#   python pipeline_sim.py --turns 20 --llm-ttft 400:80 --tts-ttfb 150:40
+#   python pipeline_sim.py --script turns.json --max-first-audio-p95 900
+#
+# A script is a JSON list of turns (strings, or objects with "text" and
+# optionally "reply" and "audio", a WAV file whose length is the time the
+# user speaks) or a text file with one user turn per line.
+
+STAGES = ("stt_final", "llm_ttft", "tts_ttfb", "first_audio", "total")
+DEFAULT_TURNS = [
+    "Hi, can you hear me?",
+    "What are your opening hours?",
+    "Can I book an appointment for tomorrow morning?",
+    "Thanks, that's all.",
+]
+DEFAULT_REPLY = "Sure. {text} That is a good question, and here is a short answer to it. Is there anything else?"
+TTS_SAMPLE_RATE = 24000
+TTS_FRAME_MS = 20
+# Speaking rate of the stand-in TTS, per character of text
+TTS_MS_PER_CHAR = 60
+
+
+class SimulatedLatency:
+    """Latency drawn from a normal distribution, never negative"""
+
+    def __init__(self, mean_ms, jitter_ms=0, rng=None):
+        self.mean_ms = mean_ms
+        self.jitter_ms = jitter_ms
+        self.rng = rng or random.Random()
+
+    @classmethod
+    def parse(cls, spec, rng=None):
+        """Parse "mean" or "mean:jitter" in milliseconds"""
+        mean, _, jitter = str(spec).partition(":")
+        return cls(float(mean), float(jitter or 0), rng)
+
+    def sample(self):
+        """One latency in seconds"""
+        return max(0.0, self.rng.gauss(self.mean_ms, self.jitter_ms)) / 1000
+
+    async def wait(self):
+        await asyncio.sleep(self.sample())
+
+    def __str__(self):
+        return f"{self.mean_ms:g}±{self.jitter_ms:g} ms"
+
+
+class SimulatedSTT:
+    """Stand-in STT: the final transcript of a scripted turn arrives after the recognition latency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def transcribe(self, text):
+        await self.latency.wait()
+        return text
+
+
+class SimulatedLLM(llm.LLM):
+    """Stand-in LLM streaming a scripted reply word by word"""
+
+    def __init__(self, ttft, token_interval):
+        super().__init__()
+        self.ttft = ttft
+        self.token_interval = token_interval
+        self.next_reply = ""
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=DEFAULT_API_CONNECT_OPTIONS, **kwargs):
+        return SimulatedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class SimulatedLLMStream(llm.LLMStream):
+    async def _run(self):
+        reply = self._llm.next_reply
+        await self._llm.ttft.wait()
+        for index, word in enumerate(reply.split()):
+            if index:
+                await self._llm.token_interval.wait()
+            self._event_ch.send_nowait(ChatChunk(
+                id=str(uuid.uuid4()),
+                delta=ChoiceDelta(role="assistant", content=word if not index else " " + word),
+            ))
+
+
+class SimulatedTTS(tts.TTS):
+    """Stand-in TTS producing silence as long as the text would take to speak"""
+
+    def __init__(self, ttfb):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=TTS_SAMPLE_RATE,
+            num_channels=1,
+        )
+        self.ttfb = ttfb
+
+    def synthesize(self, text, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return SimulatedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class SimulatedChunkedStream(tts.ChunkedStream):
+    async def _run(self):
+        request_id = utils.shortuuid()
+        await self._tts.ttfb.wait()
+        samples = TTS_SAMPLE_RATE * TTS_FRAME_MS // 1000
+        frames = max(1, len(self._input_text) * TTS_MS_PER_CHAR // TTS_FRAME_MS)
+        for _ in range(frames):
+            frame = rtc.AudioFrame(
+                data=bytes(samples * 2),
+                sample_rate=TTS_SAMPLE_RATE,
+                num_channels=1,
+                samples_per_channel=samples,
+            )
+            self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+
+class SimulatedAudioOutput(io.AudioOutput):
+    """Audio output that records when the agent's audio starts instead of playing it.
+
+    With realtime=True playback takes as long as the audio, otherwise it ends
+    as soon as the segment is flushed.
+    """
+
+    def __init__(self, realtime=False):
+        super().__init__(next_in_chain=None, sample_rate=TTS_SAMPLE_RATE)
+        self.realtime = realtime
+        self.first_frame_at = None
+        self._pushed_duration = 0.0
+        self._playback = None
+
+    def start_turn(self):
+        self.first_frame_at = None
+
+    async def capture_frame(self, frame):
+        await super().capture_frame(frame)
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter()
+        self._pushed_duration += frame.samples_per_channel / frame.sample_rate
+
+    def flush(self):
+        super().flush()
+        duration, self._pushed_duration = self._pushed_duration, 0.0
+        if self.realtime:
+            self._playback = asyncio.create_task(self._play(duration))
+        else:
+            self.on_playback_finished(playback_position=duration, interrupted=False)
+
+    async def _play(self, duration):
+        await asyncio.sleep(duration)
+        self.on_playback_finished(playback_position=duration, interrupted=False)
+
+    def clear_buffer(self):
+        if self._playback is not None and not self._playback.done():
+            self._playback.cancel()
+            self.on_playback_finished(playback_position=0.0, interrupted=True)
+        self._pushed_duration = 0.0
+
+
+def _audio_duration(path):
+    from vad_tuning import read_wav
+    samples, sample_rate = read_wav(path)
+    return len(samples) / sample_rate
+
+
+def load_script(path):
+    """Turns of a script file as dicts with "text" and optional "reply"/"audio"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            entries = json.load(f)
+        else:
+            entries = [line.strip() for line in f if line.strip()]
+    turns = []
+    for entry in entries:
+        turn = {"text": entry} if isinstance(entry, str) else dict(entry)
+        if not turn.get("text"):
+            raise ValueError(f"Script turn without text: {entry!r}")
+        turns.append(turn)
+    return turns
+
+
+async def simulate(turns, stt_latency, llm_ttft, llm_token_interval, tts_ttfb, realtime=False):
+    """Run scripted turns through an AgentSession with the stand-in providers.
+
+    Returns one dict of stage timings (milliseconds) per turn. All stages but
+    llm_ttft and tts_ttfb are measured from the end of the user's speech.
+    """
+    stt = SimulatedSTT(stt_latency)
+    sim_llm = SimulatedLLM(llm_ttft, llm_token_interval)
+    audio_output = SimulatedAudioOutput(realtime)
+    session = AgentSession(llm=sim_llm, tts=SimulatedTTS(tts_ttfb))
+    session.output.audio = audio_output
+
+    current = {}
+
+    def on_metrics(event):
+        kind = getattr(event.metrics, "type", "")
+        if kind == "llm_metrics":
+            current.setdefault("llm_ttft", round(event.metrics.ttft * 1000, 1))
+        elif kind == "tts_metrics":
+            current.setdefault("tts_ttfb", round(event.metrics.ttfb * 1000, 1))
+
+    session.on("metrics_collected", on_metrics)
+    await session.start(agent=Assistant())
+
+    results = []
+    try:
+        for turn in turns:
+            if realtime and turn.get("audio"):
+                await asyncio.sleep(_audio_duration(turn["audio"])) # the user speaking
+            current.clear()
+            audio_output.start_turn()
+            sim_llm.next_reply = turn.get("reply") or DEFAULT_REPLY.format(text=turn["text"])
+
+            end_of_speech = time.perf_counter()
+            text = await stt.transcribe(turn["text"])
+            current["stt_final"] = round((time.perf_counter() - end_of_speech) * 1000, 1)
+            handle = session.generate_reply(user_input=text)
+            await handle.wait_for_playout()
+            finished = time.perf_counter()
+
+            if audio_output.first_frame_at is not None:
+                current["first_audio"] = round((audio_output.first_frame_at - end_of_speech) * 1000, 1)
+            current["total"] = round((finished - end_of_speech) * 1000, 1)
+            results.append(dict(current, text=turn["text"]))
+    finally:
+        await session.aclose()
+    return results
+
+
+def summarize(results):
+    """p50/p95/p99 and mean per stage"""
+    summary = {}
+    for stage in STAGES:
+        values = sorted(r[stage] for r in results if r.get(stage) is not None)
+        summary[stage] = {"count": len(values), "mean": round(sum(values) / len(values), 1) if values else None}
+        summary[stage].update({f"p{p}": percentile(values, p) for p in PERCENTILES})
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate agent turns offline with stand-in STT, LLM and TTS")
+    parser.add_argument("--script", help="JSON or text file with the user turns")
+    parser.add_argument("--turns", type=int, default=None, help="number of turns to run (the script repeats)")
+    parser.add_argument("--stt-latency", default="250:50", help="end of speech -> final transcript, ms[:jitter]")
+    parser.add_argument("--llm-ttft", default="500:100", help="LLM time to first token, ms[:jitter]")
+    parser.add_argument("--llm-token-interval", default="20:5", help="time between LLM tokens, ms[:jitter]")
+    parser.add_argument("--tts-ttfb", default="200:50", help="TTS time to first byte, ms[:jitter]")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible jitter")
+    parser.add_argument("--realtime", action="store_true",
+                        help="play agent audio (and scripted user audio) in real time")
+    parser.add_argument("--max-first-audio-p95", type=float, default=None,
+                        help="exit with an error if the p95 latency to first audio exceeds this (ms)")
+    parser.add_argument("--json", action="store_true", help="print per-turn results and the summary as JSON")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    turns = load_script(args.script) if args.script else [{"text": text} for text in DEFAULT_TURNS]
+    count = args.turns or len(turns)
+    turns = [turns[i % len(turns)] for i in range(count)]
+    latencies = {
+        "stt_latency": SimulatedLatency.parse(args.stt_latency, rng),
+        "llm_ttft": SimulatedLatency.parse(args.llm_ttft, rng),
+        "llm_token_interval": SimulatedLatency.parse(args.llm_token_interval, rng),
+        "tts_ttfb": SimulatedLatency.parse(args.tts_ttfb, rng),
+    }
+
+    started = time.perf_counter()
+    results = asyncio.run(simulate(turns, realtime=args.realtime, **latencies))
+    summary = summarize(results)
+
+    if args.json:
+        print(json.dumps({"turns": results, "summary": summary}, indent=2))
+    else:
+        print(f"{len(results)} turns in {time.perf_counter() - started:.1f}s "
+              f"({', '.join(f'{name} {latency}' for name, latency in latencies.items())})")
+        print(f"{'stage':<12} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for stage, stats in summary.items():
+            print(f"{stage:<12} " + " ".join(f"{str(stats[key]):>8}" for key in ("mean", "p50", "p95", "p99")))
+
+    p95 = summary["first_audio"]["p95"]
+    if args.max_first_audio_p95 is not None and (p95 is None or p95 > args.max_first_audio_p95):
+        print(f"First audio p95 {p95} ms exceeds {args.max_first_audio_p95} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
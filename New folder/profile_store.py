@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from config_manager import DEFAULT_CONFIG, validate_config
+
+# SQLite store of named agent profiles (STT/LLM/TTS settings), so one control
+# plane can serve many agent configurations. Profiles are versioned, indexed
+# by name and tag, and compiled profiles are cached in memory so resolving a
+# profile at job start does not touch the database.
+
+PROFILE_DB_FILE = os.environ.get("PROFILE_DB_FILE", "agent_profiles.db")
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", 30))
+
+# Settings a profile may carry; process-level settings (worker_mode, room_name) stay in agent_config.json
+PROFILE_FIELDS = {
+    "stt_provider", "stt_model", "stt_language",
+    "llm_provider", "llm_base_url", "llm_api_key", "llm_user", "llm_use_blocking_mode",
+    "tts_provider", "tts_model", "tts_language", "tts_elevenlabs_model",
+    "tts_fallback", "tts_failover_ttfb",
+    "vad_provider", "turn_detection", "use_noise_cancellation",
+    "vad_min_silence_duration", "vad_activation_threshold", "min_endpointing_delay",
+    "greeting_text",
+}
+
+PROFILE_DEFAULTS = {k: v for k, v in DEFAULT_CONFIG.items() if k in PROFILE_FIELDS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    version INTEGER NOT NULL DEFAULT 1,
+    config TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_tags (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (profile_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_profile_tags_tag ON profile_tags(tag);
+CREATE TABLE IF NOT EXISTS profile_versions (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL,
+    config TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (profile_id, version)
+);
+"""
+
+
+class ProfileConflict(ValueError):
+    """Raised when a profile write is based on an outdated version or the name is taken"""
+
+
+_cache_lock = threading.Lock()
+_compiled_cache = {}  # name -> (expires_at, compiled profile)
+_initialized = set()
+
+
+def _connect():
+    conn = sqlite3.connect(PROFILE_DB_FILE, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    if PROFILE_DB_FILE not in _initialized:
+        # WAL lets worker processes read while the control plane writes
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+        _initialized.add(PROFILE_DB_FILE)
+    return conn
+
+
+@contextmanager
+def _db():
+    """Open a connection, commit on success and always close it"""
+    conn = _connect()
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def validate_profile_config(config):
+    """Reject unknown settings, and values that would fail at job start (ConfigValidationError)"""
+    if not isinstance(config, dict):
+        raise ValueError("Profile config must be an object")
+    unknown = sorted(set(config) - PROFILE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown profile settings: {unknown}. Allowed settings: {sorted(PROFILE_FIELDS)}")
+    merged = dict(PROFILE_DEFAULTS)
+    merged.update(config)
+    validate_config(merged)
+    return config
+
+
+def _normalize_tags(tags):
+    if tags is None:
+        return []
+    if not isinstance(tags, list) or not all(isinstance(t, str) and t for t in tags):
+        raise ValueError("tags must be a list of non-empty strings")
+    return sorted(set(tags))
+
+
+def _row_to_profile(conn, row):
+    tags = [r["tag"] for r in conn.execute(
+        "SELECT tag FROM profile_tags WHERE profile_id = ? ORDER BY tag", (row["id"],))]
+    return {
+        "name": row["name"],
+        "version": row["version"],
+        "tags": tags,
+        "config": json.loads(row["config"]),
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+    }
+
+
+def _write_tags(conn, profile_id, tags):
+    conn.execute("DELETE FROM profile_tags WHERE profile_id = ?", (profile_id,))
+    conn.executemany("INSERT INTO profile_tags (profile_id, tag) VALUES (?, ?)",
+                     [(profile_id, tag) for tag in tags])
+
+
+def _write_version(conn, profile_id, version, config, tags, now):
+    conn.execute(
+        "INSERT INTO profile_versions (profile_id, version, config, tags, created_at) VALUES (?, ?, ?, ?, ?)",
+        (profile_id, version, json.dumps(config), json.dumps(tags), now))
+
+
+def list_profiles(tag=None):
+    """List profiles, optionally only those carrying a tag"""
+    with _db() as conn:
+        if tag:
+            rows = conn.execute(
+                "SELECT p.* FROM profiles p JOIN profile_tags t ON t.profile_id = p.id "
+                "WHERE t.tag = ? ORDER BY p.name", (tag,)).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM profiles ORDER BY name").fetchall()
+        return [_row_to_profile(conn, row) for row in rows]
+
+
+def get_profile(name):
+    """Return a profile by name, or None if it does not exist"""
+    with _db() as conn:
+        row = conn.execute("SELECT * FROM profiles WHERE name = ?", (name,)).fetchone()
+        return _row_to_profile(conn, row) if row else None
+
+
+def create_profile(name, config, tags=None):
+    """Create a new profile at version 1"""
+    if not name or not isinstance(name, str):
+        raise ValueError("Profile name is required")
+    config = validate_profile_config(config)
+    tags = _normalize_tags(tags)
+    now = time.time()
+    try:
+        with _db() as conn:
+            cursor = conn.execute(
+                "INSERT INTO profiles (name, version, config, created_at, updated_at) VALUES (?, 1, ?, ?, ?)",
+                (name, json.dumps(config), now, now))
+            _write_tags(conn, cursor.lastrowid, tags)
+            _write_version(conn, cursor.lastrowid, 1, config, tags, now)
+    except sqlite3.IntegrityError:
+        raise ProfileConflict(f"Profile '{name}' already exists")
+    invalidate_profile_cache(name)
+    return get_profile(name)
+
+
+def update_profile(name, config=None, tags=None, expected_version=None):
+    """Replace a profile's config and/or tags, bumping its version"""
+    with _db() as conn:
+        # Take the write lock up front so concurrent updates cannot reuse a version number
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT * FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        if expected_version is not None and row["version"] != expected_version:
+            raise ProfileConflict(
+                f"Profile '{name}' is at version {row['version']}, not {expected_version}")
+
+        current = _row_to_profile(conn, row)
+        config = validate_profile_config(config) if config is not None else current["config"]
+        tags = _normalize_tags(tags) if tags is not None else current["tags"]
+        version = row["version"] + 1
+        now = time.time()
+        conn.execute(
+            "UPDATE profiles SET version = ?, config = ?, updated_at = ? WHERE id = ?",
+            (version, json.dumps(config), now, row["id"]))
+        _write_tags(conn, row["id"], tags)
+        _write_version(conn, row["id"], version, config, tags, now)
+    invalidate_profile_cache(name)
+    return get_profile(name)
+
+
+def delete_profile(name):
+    """Delete a profile and its history; returns False if it did not exist"""
+    with _db() as conn:
+        deleted = conn.execute("DELETE FROM profiles WHERE name = ?", (name,)).rowcount
+    invalidate_profile_cache(name)
+    return bool(deleted)
+
+
+def get_profile_versions(name):
+    """Return the stored history of a profile, newest first"""
+    with _db() as conn:
+        row = conn.execute("SELECT id FROM profiles WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        rows = conn.execute(
+            "SELECT version, config, tags, created_at FROM profile_versions "
+            "WHERE profile_id = ? ORDER BY version DESC", (row["id"],)).fetchall()
+        return [{
+            "version": r["version"],
+            "config": json.loads(r["config"]),
+            "tags": json.loads(r["tags"]),
+            "created_at": r["created_at"],
+        } for r in rows]
+
+
+def compile_profile(profile):
+    """Merge a profile over the default settings into a complete, ready-to-use config"""
+    config = dict(PROFILE_DEFAULTS)
+    config.update(profile["config"])
+    return {
+        "name": profile["name"],
+        "version": profile["version"],
+        "tags": profile["tags"],
+        "config": config,
+    }
+
+
+def resolve_profile(name):
+    """Return the compiled profile for a name, served from memory when cached"""
+    now = time.time()
+    with _cache_lock:
+        cached = _compiled_cache.get(name)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    profile = get_profile(name)
+    if profile is None:
+        return None
+    compiled = compile_profile(profile)
+    with _cache_lock:
+        _compiled_cache[name] = (now + PROFILE_CACHE_TTL, compiled)
+    return compiled
+
+
+def invalidate_profile_cache(name=None):
+    """Drop one compiled profile (or all of them) from the cache"""
+    with _cache_lock:
+        if name is None:
+            _compiled_cache.clear()
+        else:
+            _compiled_cache.pop(name, None)
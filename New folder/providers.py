@@ -0,0 +1,220 @@
+import json
+from livekit.plugins import openai, cartesia, deepgram, groq, elevenlabs, silero
+from livekit.plugins.turn_detector.multilingual import MultilingualModel
+import lamapbx
+from profile_store import resolve_profile
+from tts_cache import CachedTTS, voice_key_for
+from tts_fallback import FallbackTTS
+
+# Worker-side construction of STT/LLM/TTS/VAD/turn detection providers from
+# a config dict. STT/LLM/TTS clients are built per job: LiveKit runs every
+# job on an event loop of its own (in a process of its own by default) and
+# the clients are bound to that loop, so they cannot outlive the job.
+
+# Factory registry: kind -> provider name -> factory(config, **kwargs).
+# The worker builds every component through these, so supporting a new
+# provider means registering one factory instead of editing worker code.
+PROVIDER_KINDS = ["stt", "llm", "tts", "vad", "turn_detection"]
+PROVIDER_CONFIG_KEYS = {
+    "stt": "stt_provider",
+    "llm": "llm_provider",
+    "tts": "tts_provider",
+    "vad": "vad_provider",
+    "turn_detection": "turn_detection",
+}
+PROVIDER_DEFAULTS = {
+    "vad": "silero",
+    "turn_detection": "multilingual",
+}
+_factories = {kind: {} for kind in PROVIDER_KINDS}
+
+
+def register_provider(kind, name):
+    """Decorator registering a factory that builds a provider of one kind from config"""
+    def decorator(factory):
+        _factories[kind][name] = factory
+        return factory
+    return decorator
+
+
+def provider_name(kind, config):
+    """Name of the provider of one kind selected by config"""
+    return config.get(PROVIDER_CONFIG_KEYS[kind]) or PROVIDER_DEFAULTS.get(kind)
+
+
+# Settings besides the provider name that change a model built once per process
+MODEL_SETTINGS = {
+    "vad": ("vad_min_silence_duration", "vad_activation_threshold"),
+}
+
+
+def model_key(kind, config):
+    """Identity of the model of one kind a config builds: its provider name and settings"""
+    return (provider_name(kind, config),) + tuple(config.get(field) for field in MODEL_SETTINGS.get(kind, ()))
+
+
+def build_provider(kind, config, **kwargs):
+    """Build the provider of one kind selected by config"""
+    name = provider_name(kind, config)
+    factory = _factories[kind].get(name)
+    if factory is None:
+        raise ValueError(f"Unsupported {kind} provider: {name}. Available: {sorted(_factories[kind])}")
+    return factory(config, **kwargs)
+
+
+@register_provider("stt", "deepgram")
+def _deepgram_stt(config):
+    return deepgram.STT(model=config["stt_model"], language=config["stt_language"])
+
+
+@register_provider("llm", "groq")
+def _groq_llm(config):
+    return groq.LLM()
+
+
+@register_provider("llm", "openai")
+def _openai_llm(config):
+    return openai.LLM()
+
+
+@register_provider("llm", "lamapbx")
+def _lamapbx_llm(config):
+    return lamapbx.LLM(
+        base_url=config.get("llm_base_url", "https://api.dify.ai/v1"),
+        api_key=config.get("llm_api_key"),
+        user=config.get("llm_user", "livekit-agent"),
+        use_blocking_mode=config.get("llm_use_blocking_mode", True),
+        segment_language=config.get("tts_language"))
+
+
+@register_provider("tts", "cartesia")
+def _cartesia_tts(config):
+    model = config.get("tts_model", "")
+    language = config.get("tts_language", "en")
+    if model:
+        return cartesia.TTS(voice=model, language=language)
+    return cartesia.TTS(language=language)
+
+
+@register_provider("tts", "deepgram")
+def _deepgram_tts(config):
+    model = config.get("tts_model", "")
+    if model:
+        return deepgram.TTS(model=model)
+    return deepgram.TTS()
+
+
+@register_provider("tts", "elevenlabs")
+def _elevenlabs_tts(config):
+    model = config.get("tts_model", "")
+    elevenlabs_model = config.get("tts_elevenlabs_model", "eleven_multilingual_v2")
+    if model:
+        return elevenlabs.TTS(voice_id=model, model=elevenlabs_model)
+    return elevenlabs.TTS(model=elevenlabs_model)
+
+
+@register_provider("vad", "silero")
+def _silero_vad(config):
+    return silero.VAD.load(
+        min_silence_duration=config.get("vad_min_silence_duration", 0.55),
+        activation_threshold=config.get("vad_activation_threshold", 0.5),
+    )
+
+
+@register_provider("turn_detection", "multilingual")
+def _multilingual_turn_detection(config):
+    return MultilingualModel()
+
+
+def build_stt(config):
+    """Create the STT provider described by config"""
+    return build_provider("stt", config)
+
+
+def build_llm(config):
+    """Create the LLM provider described by config"""
+    return build_provider("llm", config)
+
+
+def _build_single_tts(config):
+    instance = build_provider("tts", config)
+    if config.get("tts_cache", True):
+        return CachedTTS(instance, voice_key_for(config))
+    return instance
+
+
+def tts_chain(config):
+    """Configs of the TTS providers to try in order: tts_provider, then the tts_fallback entries.
+
+    A fallback entry overrides the provider settings (tts_provider, tts_model,
+    tts_elevenlabs_model, tts_language); the voice is not inherited, since a
+    voice id of one provider means nothing to another.
+    """
+    chain = [config]
+    for fallback in config.get("tts_fallback") or []:
+        chain.append(dict(config, tts_model="", **fallback))
+    return chain
+
+
+def build_tts(config):
+    """Create the TTS provider described by config, behind the phrase cache unless disabled.
+
+    With a tts_fallback chain the providers are wrapped in a FallbackTTS;
+    each one keeps its own cache, since they speak with different voices.
+    """
+    chain = tts_chain(config)
+    if len(chain) == 1:
+        return _build_single_tts(config)
+    providers = [(voice_key_for(entry), _build_single_tts(entry)) for entry in chain]
+    return FallbackTTS(providers, ttfb_threshold=config.get("tts_failover_ttfb"))
+
+
+async def warm_tts(tts, priming_text=None):
+    """Open the TTS connection ahead of its first utterance.
+
+    Providers with a connection pool (Cartesia, ElevenLabs and Deepgram
+    websockets) open it in prewarm(); with priming_text a short phrase is also
+    synthesized and discarded, which proves the connection and voice work.
+    """
+    # Wrappers pass prewarm() on to every provider they hold
+    prewarm = getattr(tts, "prewarm", None)
+    if prewarm is not None:
+        prewarm()
+    # Prime the primary provider itself; a cached priming phrase would not touch the connection
+    while getattr(tts, "wrapped", None) is not None:
+        tts = tts.wrapped
+    if priming_text:
+        async with tts.synthesize(priming_text) as stream:
+            async for _ in stream:
+                break # the first audio chunk is enough
+
+
+def _parse_profile_name(metadata):
+    """Read a profile name from job/room metadata: a JSON object with "profile" or a bare name"""
+    if not metadata:
+        return None
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        return metadata.strip() or None
+    if isinstance(data, dict):
+        return data.get("profile")
+    if isinstance(data, str):
+        return data or None
+    return None
+
+
+def resolve_job_profile(ctx, default_config):
+    """Pick the profile for a job from job metadata, then room metadata, else the default config"""
+    for metadata in (ctx.job.metadata, ctx.room.metadata):
+        name = _parse_profile_name(metadata)
+        if not name:
+            continue
+        compiled = resolve_profile(name)
+        if compiled is None:
+            print(f"Profile {name} not found, using default configuration")
+            break
+        config = dict(default_config)
+        config.update(compiled["config"])
+        return f"{compiled['name']}@{compiled['version']}", config
+    return "default", dict(default_config)
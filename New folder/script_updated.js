@@ -31,6 +31,7 @@ const elements = {
     currentSttProvider: document.getElementById('current-stt-provider'),
     currentLlmProvider: document.getElementById('current-llm-provider'),
     currentWorkerMode: document.getElementById('current-worker-mode'),
+    turnLatency: document.getElementById('turn-latency'),
     
     // Quick Actions
     startWorkerBtn: document.getElementById('start-worker-btn'),
@@ -221,29 +222,154 @@ async function stopWorker() {
     }
 }
 
+// Status events pushed by the server over Socket.IO; the sequence number lets
+// a reconnecting client ask only for the events it missed
+let statusEventSeq = null;
+let statusRefreshTimer = null;
+
+function scheduleStatusRefresh(reloadConfig = false) {
+    // Events come in bursts (e.g. during a restart), refresh once per burst
+    clearTimeout(statusRefreshTimer);
+    statusRefreshTimer = setTimeout(() => {
+        loadWorkerStatus().catch(() => {});
+        loadTurnLatency();
+        if (reloadConfig) {
+            loadConfig().catch(() => {});
+        }
+    }, 250);
+}
+
+function handleStatusEvent(event) {
+    if (event.seq !== null) {
+        if (statusEventSeq !== null && event.seq <= statusEventSeq) {
+            return; // already seen (replayed and pushed at the same time)
+        }
+        statusEventSeq = event.seq;
+    }
+
+    if (event.type === 'worker_telemetry') {
+        return;
+    }
+    if (event.type === 'config_applied') {
+        scheduleStatusRefresh(true);
+        return;
+    }
+    if (event.type === 'restart_progress' && event.data.phase === 'finished') {
+        showToast(event.data.status === 'ok' ? 'info' : 'warning', 'Worker restart',
+            `${event.data.strategy} restart ${event.data.status}`);
+    }
+    if (event.type === 'worker_crashed' || event.type === 'worker_crash_loop') {
+        showToast('error', 'Worker crashed', `Worker ${event.data.worker} exited with code ${event.data.exit_code}`);
+    }
+    scheduleStatusRefresh();
+}
+
+function connectStatusEvents() {
+    if (typeof io === 'undefined') {
+        // Socket.IO client not loaded, fall back to polling
+        setInterval(() => {
+            loadWorkerStatus();
+        }, 30000);
+        return;
+    }
+
+    const socket = io(API_BASE_URL.replace(/\/api$/, ''));
+    socket.on('status_event', handleStatusEvent);
+    socket.on('connect', () => {
+        socket.emit('subscribe_status', { since: statusEventSeq }, (result) => {
+            if (statusEventSeq === null || result.reset) {
+                // First connect, or we missed more than the server kept: reload everything
+                statusEventSeq = result.seq;
+                scheduleStatusRefresh(true);
+                return;
+            }
+            result.events.forEach(handleStatusEvent);
+        });
+    });
+}
+
+// Per-turn latency breakdown of the live sessions
+const LATENCY_STAGES = {
+    stt_final: 'STT final',
+    eou_delay: 'End of turn',
+    llm_ttft: 'LLM first token',
+    tts_ttfb: 'TTS first byte',
+    first_audio: 'First audio'
+};
+
+async function loadTurnLatency() {
+    try {
+        const latency = await apiRequest('/latency');
+        renderTurnLatency(latency.sessions);
+    } catch (error) {
+        console.error('Failed to load turn latency:', error);
+    }
+}
+
+function renderTurnLatency(sessions) {
+    if (!elements.turnLatency) return;
+
+    const entries = Object.values(sessions || {});
+    if (entries.length === 0) {
+        elements.turnLatency.innerHTML = '<p>No live sessions</p>';
+        return;
+    }
+
+    const ms = value => value === null ? '-' : `${Math.round(value)} ms`;
+    elements.turnLatency.innerHTML = entries.map(session => `
+        <table class="latency-table">
+            <caption></caption>
+            <tr><th>Stage</th><th>p50</th><th>p95</th><th>p99</th></tr>
+            ${Object.entries(LATENCY_STAGES).map(([stage, label]) => {
+                const stats = session.stages[stage];
+                return `<tr><td>${label}</td><td>${ms(stats.p50)}</td><td>${ms(stats.p95)}</td><td>${ms(stats.p99)}</td></tr>`;
+            }).join('')}
+        </table>
+    `).join('');
+    // Room names come from clients; set them as text so they are never parsed as HTML
+    elements.turnLatency.querySelectorAll('caption').forEach((caption, index) => {
+        caption.textContent = `${entries[index].room} (${entries[index].turns} turns)`;
+    });
+}
+
+// Merged voice catalog of all providers, kept current with delta requests
+let voiceCatalogVersion = null;
+
+async function syncVoiceCatalog() {
+    const query = voiceCatalogVersion ? `?since=${encodeURIComponent(voiceCatalogVersion)}` : '';
+    const catalog = await apiRequest(`/voices${query}`);
+
+    if (catalog.delta) {
+        catalog.removed.forEach(removed => {
+            voices[removed.provider] = voices[removed.provider].filter(v => v.id !== removed.id);
+        });
+        catalog.upserted.forEach(voice => {
+            const list = voices[voice.provider];
+            const index = list.findIndex(v => v.id === voice.id);
+            if (index >= 0) {
+                list[index] = voice;
+            } else {
+                list.push(voice);
+            }
+        });
+    } else {
+        voices = { elevenlabs: [], deepgram: [], cartesia: [] };
+        catalog.voices.forEach(voice => {
+            if (voices[voice.provider]) {
+                voices[voice.provider].push(voice);
+            }
+        });
+    }
+
+    voiceCatalogVersion = catalog.version;
+    return voices;
+}
+
 async function loadVoices(provider) {
     try {
         showLoading();
-        let voicesData;
-        
-        switch (provider) {
-            case 'elevenlabs':
-                voicesData = await apiRequest('/elevenlabs/voices');
-                voices.elevenlabs = voicesData.voices || voicesData;
-                renderVoices('elevenlabs', voices.elevenlabs);
-                break;
-            case 'deepgram':
-                voicesData = await apiRequest('/deepgram/voices');
-                voices.deepgram = voicesData.voices || voicesData;
-                renderVoices('deepgram', voices.deepgram);
-                break;
-            case 'cartesia':
-                voicesData = await apiRequest('/cartesia/voices');
-                voices.cartesia = voicesData.voices || voicesData;
-                renderVoices('cartesia', voices.cartesia);
-                break;
-        }
-        
+        await syncVoiceCatalog();
+        renderVoices(provider, voices[provider]);
         showToast('success', 'Success', `Loaded ${provider} voices`);
     } catch (error) {
         showToast('error', 'Error', `Failed to load ${provider} voices`);
@@ -809,6 +935,7 @@ document.addEventListener('DOMContentLoaded', function() {
         elements.refreshStatusBtn.addEventListener('click', () => {
             loadConfig();
             loadWorkerStatus();
+            loadTurnLatency();
         });
     }
     
@@ -929,9 +1056,11 @@ document.addEventListener('DOMContentLoaded', function() {
     loadConfig();
     loadWorkerStatus();
     
-    // Auto-refresh status every 30 seconds
-    setInterval(() => {
-        loadWorkerStatus();
-    }, 30000);
+    // Keep status current from server-pushed events instead of polling
+    connectStatusEvents();
+
+    // Turns complete continuously without status events, so latency is polled
+    loadTurnLatency();
+    setInterval(loadTurnLatency, 15000);
 });
 
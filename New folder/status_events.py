@@ -0,0 +1,63 @@
+import os
+import time
+import threading
+from collections import deque
+
+# Push channel for dashboard updates: worker lifecycle, config changes and
+# restart progress. Every event gets a sequence number and is kept in a
+# bounded history, so a client that lost its connection can ask for the
+# events after the last sequence number it saw instead of polling.
+
+EVENT_HISTORY = int(os.environ.get("STATUS_EVENT_HISTORY", 500))
+
+_events = deque(maxlen=EVENT_HISTORY)
+_lock = threading.Lock()
+_emitter = None
+_seq = 0
+
+
+def set_event_emitter(emitter):
+    """Set the function that pushes each event to clients (the SocketIO emit)"""
+    global _emitter
+    _emitter = emitter
+
+
+def publish(event_type, data=None, retain=True):
+    """Record an event and push it to connected clients.
+
+    Transient events (retain=False) are pushed without a sequence number and
+    are not replayed to resuming clients.
+    """
+    global _seq
+    if not retain:
+        event = {"seq": None, "time": time.time(), "type": event_type, "data": data or {}}
+    else:
+        with _lock:
+            _seq += 1
+            event = {"seq": _seq, "time": time.time(), "type": event_type, "data": data or {}}
+            _events.append(event)
+    if _emitter is not None:
+        try:
+            _emitter(event)
+        except Exception as e:
+            print(f"Error pushing {event_type} event: {e}")
+    return event
+
+
+def events_since(since=None):
+    """Events after a sequence number.
+
+    "reset" is true when events after `since` have already been dropped from
+    the history; the client should then reload the full state over REST.
+    """
+    with _lock:
+        events = list(_events)
+        latest = _seq
+    if since is None:
+        return {"seq": latest, "reset": False, "events": []}
+    oldest = events[0]["seq"] if events else latest + 1
+    return {
+        "seq": latest,
+        "reset": since > latest or since + 1 < oldest,
+        "events": [e for e in events if e["seq"] > since],
+    }
@@ -0,0 +1,150 @@
+from collections import deque
+import pytest
+import catalog_sync
+from catalog_sync import (
+    diff_catalog, _merge_known_fields, _record_change, _parse_version, _is_catalog_format,
+    normalize_voice, get_merged_catalog, get_catalog_version,
+)
+
+
+def voice(voice_id, **fields):
+    entry = {"id": voice_id, "mode": "similarity", "name": voice_id, "description": "",
+             "created_at": "", "gender": "", "language": "en"}
+    entry.update(fields)
+    return entry
+
+
+@pytest.fixture
+def catalogs(monkeypatch):
+    """In-memory catalogs at version 0, independent of the catalog files"""
+    snapshots = {
+        "deepgram": [voice("aura-asteria")],
+        "cartesia": [voice("c1"), voice("c2")],
+        "elevenlabs": [voice("e1", model_names=["eleven_turbo_v2_5"])],
+    }
+    monkeypatch.setattr(catalog_sync, "_snapshots", snapshots)
+    monkeypatch.setattr(catalog_sync, "_catalog_version", 0)
+    monkeypatch.setattr(catalog_sync, "_change_log", deque(maxlen=catalog_sync.CHANGE_LOG_SIZE))
+    return snapshots
+
+
+def apply_change(snapshots, provider, new_voices):
+    """Replace a provider's catalog the way sync_provider does"""
+    changes = diff_catalog(snapshots[provider], new_voices)
+    snapshots[provider] = new_voices
+    with catalog_sync._lock:
+        _record_change(provider, changes)
+    return changes
+
+
+def test_diff_catalog():
+    old = [voice("a"), voice("b"), voice("c")]
+    new = [voice("a"), voice("b", name="Bee"), voice("d")]
+    changes = diff_catalog(old, new)
+    assert [v["id"] for v in changes["added"]] == ["d"]
+    assert [v["id"] for v in changes["updated"]] == ["b"]
+    assert [v["id"] for v in changes["removed"]] == ["c"]
+
+
+def test_diff_catalog_without_changes():
+    assert diff_catalog([voice("a")], [voice("a")]) == {"added": [], "updated": [], "removed": []}
+
+
+def test_merge_keeps_fields_the_endpoint_does_not_report():
+    old = [voice("e1", model_names=["eleven_turbo_v2_5"], description="Warm")]
+    new = [voice("e1", model_names=[], description="")]
+    merged = _merge_known_fields(old, new)
+    assert merged[0]["model_names"] == ["eleven_turbo_v2_5"]
+    assert merged[0]["description"] == "Warm"
+    assert diff_catalog(old, merged)["updated"] == []
+
+
+def test_merge_takes_reported_values():
+    merged = _merge_known_fields([voice("a", name="Old")], [voice("a", name="New"), voice("b")])
+    assert [v["name"] for v in merged] == ["New", "b"]
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("1700000000.5", ("1700000000", 5)),
+    ("1700000000.x", (None, None)),
+    ("5", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_version(token, expected):
+    assert _parse_version(token) == expected
+
+
+def test_is_catalog_format():
+    assert _is_catalog_format("cartesia", [voice("c1")])
+    assert not _is_catalog_format("cartesia", {"data": [voice("c1")]})
+    assert not _is_catalog_format("cartesia", [{"id": "c1"}])
+    # Elevenlabs entries also need their model names
+    assert not _is_catalog_format("elevenlabs", [voice("e1")])
+    assert _is_catalog_format("elevenlabs", [voice("e1", model_names=[])])
+
+
+def test_normalize_voice_modes():
+    assert normalize_voice("cartesia", voice("c1"))["modes"] == ["similarity"]
+    assert normalize_voice("cartesia", voice("c1", modes=["similarity", "stability"]))["modes"] == ["similarity", "stability"]
+    assert "modes" not in normalize_voice("cartesia", {"id": "c1"})
+
+
+def test_full_catalog_without_version(catalogs):
+    result = get_merged_catalog()
+    assert result["delta"] is False
+    assert result["version"] == get_catalog_version()
+    assert [(v["provider"], v["id"]) for v in result["voices"]] == [
+        ("deepgram", "aura-asteria"), ("cartesia", "c1"), ("cartesia", "c2"), ("elevenlabs", "e1"),
+    ]
+
+
+def test_delta_at_current_version_is_empty(catalogs):
+    result = get_merged_catalog(get_catalog_version())
+    assert result == {"version": get_catalog_version(), "delta": True, "upserted": [], "removed": []}
+
+
+def test_delta_lists_changes_since_version(catalogs):
+    since = get_catalog_version()
+    apply_change(catalogs, "cartesia", [voice("c1", name="Renamed"), voice("c3")])
+    result = get_merged_catalog(since)
+    assert result["delta"] is True
+    assert sorted(v["id"] for v in result["upserted"]) == ["c1", "c3"]
+    assert result["removed"] == [{"provider": "cartesia", "id": "c2"}]
+
+
+def test_delta_latest_operation_wins(catalogs):
+    since = get_catalog_version()
+    apply_change(catalogs, "cartesia", [voice("c1")])
+    apply_change(catalogs, "cartesia", [voice("c1"), voice("c2")])
+    result = get_merged_catalog(since)
+    assert [v["id"] for v in result["upserted"]] == ["c2"]
+    assert result["removed"] == []
+
+
+def test_delta_skips_changes_before_version(catalogs):
+    apply_change(catalogs, "cartesia", [voice("c1")])
+    since = get_catalog_version()
+    apply_change(catalogs, "deepgram", [voice("aura-asteria"), voice("aura-luna")])
+    result = get_merged_catalog(since)
+    assert [(v["provider"], v["id"]) for v in result["upserted"]] == [("deepgram", "aura-luna")]
+    assert result["removed"] == []
+
+
+def test_version_from_another_epoch_gets_full_catalog(catalogs):
+    result = get_merged_catalog("1.0")
+    assert result["delta"] is False
+
+
+def test_version_from_the_future_gets_full_catalog(catalogs):
+    result = get_merged_catalog(f"{catalog_sync._catalog_epoch}.5")
+    assert result["delta"] is False
+
+
+def test_version_older_than_the_change_log_gets_full_catalog(catalogs, monkeypatch):
+    monkeypatch.setattr(catalog_sync, "_change_log", deque(maxlen=2))
+    epoch = catalog_sync._catalog_epoch
+    apply_change(catalogs, "cartesia", [voice("c1")])
+    apply_change(catalogs, "cartesia", [voice("c1"), voice("c4")])
+    apply_change(catalogs, "cartesia", [voice("c4")])
+    assert get_merged_catalog(f"{epoch}.0")["delta"] is False
+    assert get_merged_catalog(f"{epoch}.1")["delta"] is True
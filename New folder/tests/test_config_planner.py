@@ -0,0 +1,95 @@
+import pytest
+import config_planner
+from config_planner import (
+    classify_field, plan_config_change, NOOP, HOT_APPLY, RESTART_REQUIRED,
+    ACTION_NONE, ACTION_REGENERATE, ACTION_HOT_APPLY, ACTION_RESTART,
+)
+
+BASE = {
+    "worker_mode": "dev",
+    "room_name": "lobby",
+    "tts_provider": "cartesia",
+    "tts_model": "sonic-2",
+    "stt_model": "nova-3",
+    "greeting_text": "Hello!",
+    "worker_drain_timeout": 30,
+    "llm_api_key": "secret",
+}
+
+
+@pytest.mark.parametrize("field, expected", [
+    ("worker_drain_timeout", NOOP),
+    ("worker_restart_strategy", NOOP),
+    ("worker_ready_timeout", NOOP),
+    ("tts_model", HOT_APPLY),
+    ("stt_language", HOT_APPLY),
+    ("llm_api_key", HOT_APPLY),
+    ("greeting_text", HOT_APPLY),
+    ("vad_min_silence_duration", HOT_APPLY),
+    ("worker_mode", RESTART_REQUIRED),
+    ("agent_instructions", RESTART_REQUIRED),
+])
+def test_classify_field(field, expected):
+    assert classify_field(field) == expected
+
+
+def test_room_name_only_matters_in_connect_mode():
+    assert classify_field("room_name", {"worker_mode": "dev"}) == NOOP
+    assert classify_field("room_name") == NOOP
+    assert classify_field("room_name", {"worker_mode": "connect"}) == RESTART_REQUIRED
+
+
+def test_no_changes():
+    plan = plan_config_change(BASE, dict(BASE), worker_running=True)
+    assert plan["action"] == ACTION_NONE
+    assert plan["changes"] == {}
+
+
+def test_noop_only_changes():
+    new = dict(BASE, worker_drain_timeout=60, room_name="other")
+    plan = plan_config_change(BASE, new, worker_running=True)
+    assert plan["action"] == ACTION_NONE
+    assert set(plan["changes"]) == {"worker_drain_timeout", "room_name"}
+
+
+def test_hot_apply_lists_components():
+    new = dict(BASE, tts_model="sonic-3", stt_model="nova-2")
+    plan = plan_config_change(BASE, new, worker_running=True)
+    assert plan["action"] == ACTION_HOT_APPLY
+    assert plan["hot_components"] == ["stt", "tts"]
+
+
+def test_reload_field_is_hot_applied_without_components():
+    plan = plan_config_change(BASE, dict(BASE, greeting_text="Hi!"), worker_running=True)
+    assert plan["action"] == ACTION_HOT_APPLY
+    assert plan["hot_components"] == []
+
+
+def test_restart_wins_over_hot_apply():
+    new = dict(BASE, tts_model="sonic-3", worker_mode="connect")
+    plan = plan_config_change(BASE, new, worker_running=True)
+    assert plan["action"] == ACTION_RESTART
+
+
+def test_room_name_in_connect_mode_restarts():
+    old = dict(BASE, worker_mode="connect")
+    plan = plan_config_change(old, dict(old, room_name="other"), worker_running=True)
+    assert plan["action"] == ACTION_RESTART
+
+
+def test_stopped_worker_only_regenerates():
+    plan = plan_config_change(BASE, dict(BASE, worker_mode="connect"), worker_running=False)
+    assert plan["action"] == ACTION_REGENERATE
+
+
+def test_worker_state_is_looked_up_when_not_given(monkeypatch):
+    monkeypatch.setattr(config_planner, "running_worker_pid", lambda: None)
+    plan = plan_config_change(BASE, dict(BASE, tts_model="sonic-3"))
+    assert plan["worker_running"] is False
+    assert plan["action"] == ACTION_REGENERATE
+
+
+def test_secrets_are_masked():
+    plan = plan_config_change(BASE, dict(BASE, llm_api_key="other"), worker_running=True)
+    assert plan["changes"]["llm_api_key"]["old"] == "***"
+    assert plan["changes"]["llm_api_key"]["new"] == "***"
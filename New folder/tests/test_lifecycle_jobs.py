@@ -0,0 +1,76 @@
+import time
+import pytest
+import lifecycle_jobs
+from lifecycle_jobs import submit_job, get_job, queue_hot_apply, SUCCEEDED, QUEUED
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """An empty job queue whose jobs wait long enough to be merged"""
+    monkeypatch.setattr(lifecycle_jobs, "COALESCE_WINDOW", 60)
+    monkeypatch.setattr(lifecycle_jobs, "_publish", lambda job: None)
+    with lifecycle_jobs._cond:
+        lifecycle_jobs._jobs.clear()
+        lifecycle_jobs._operations.clear()
+        lifecycle_jobs._queue.clear()
+    yield lifecycle_jobs
+    with lifecycle_jobs._cond:
+        lifecycle_jobs._queue.clear()
+        lifecycle_jobs._operations.clear()
+
+
+def _wait_for(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = get_job(job_id)
+        if job["status"] not in (QUEUED, "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_same_operation_merges(jobs):
+    first = submit_job("restart", lambda: 1)
+    second = submit_job("restart", lambda: 2)
+    assert second["id"] == first["id"]
+    assert second["requests"] == 2
+    assert jobs._queue == [first["id"]]
+
+
+def test_different_targets_do_not_merge(jobs):
+    first = submit_job("stop_worker", lambda: None, target=0)
+    second = submit_job("stop_worker", lambda: None, target=1)
+    assert first["id"] != second["id"]
+    assert len(jobs._queue) == 2
+
+
+def test_only_the_last_queued_job_is_merged(jobs):
+    restart = submit_job("restart", lambda: None)
+    stop = submit_job("stop", lambda: None)
+    again = submit_job("restart", lambda: None)
+    assert again["id"] not in (restart["id"], stop["id"])
+    assert jobs._queue == [restart["id"], stop["id"], again["id"]]
+
+
+def test_merged_job_runs_the_latest_operation(jobs, monkeypatch):
+    monkeypatch.setattr(jobs, "COALESCE_WINDOW", 0.05)
+    calls = []
+    job = submit_job("restart", lambda: calls.append("first") or "first")
+    submit_job("restart", lambda: calls.append("second") or "second")
+    job = _wait_for(job["id"])
+    assert job["status"] == SUCCEEDED
+    assert job["result"] == "second"
+    assert calls == ["second"]
+
+
+def test_hot_apply_target_is_order_independent(jobs):
+    first = queue_hot_apply(["tts", "stt"])
+    second = queue_hot_apply(["stt", "tts"])
+    assert first["target"] == "stt,tts"
+    assert second["id"] == first["id"]
+
+
+def test_hot_apply_with_other_components_is_not_merged(jobs):
+    first = queue_hot_apply(["tts"])
+    second = queue_hot_apply(["stt", "tts"])
+    assert first["id"] != second["id"]
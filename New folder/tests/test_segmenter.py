@@ -0,0 +1,55 @@
+import pytest
+from lamapbx.segmenter import split_segments
+
+
+@pytest.mark.parametrize("text", [
+    "Hello there. How are you? Fine!",
+    "No. 5 is on the left. Take it.",
+    "你好。再见。",
+    "It costs 1,000 dollars, which is a lot of money for a ticket, and the train leaves at noon, so we should hurry up now.",
+])
+def test_segments_join_back_to_text(text):
+    assert "".join(split_segments(text, "en")) == text
+
+
+def test_empty_text():
+    assert split_segments("") == []
+
+
+def test_sentences_are_split():
+    assert split_segments("Hello there. How are you? Fine!", "en") == ["Hello there. ", "How are you? ", "Fine!"]
+
+
+def test_abbreviations_do_not_end_a_sentence():
+    assert split_segments("Dr. Smith arrived. He sat down.", "en") == ["Dr. Smith arrived. ", "He sat down."]
+
+
+def test_initials_do_not_end_a_sentence():
+    assert split_segments("J. R. R. Tolkien wrote it. True.", "en") == ["J. R. R. Tolkien wrote it. ", "True."]
+
+
+def test_no_before_a_number_is_an_abbreviation():
+    assert split_segments("No. 5 is on the left. Take it.", "en") == ["No. 5 is on the left. ", "Take it."]
+
+
+def test_no_as_a_word_ends_a_sentence():
+    assert split_segments("No. I disagree. Fine.", "en") == ["No. ", "I disagree. ", "Fine."]
+
+
+def test_cjk_full_stops_need_no_whitespace():
+    assert split_segments("你好。再见！", "zh") == ["你好。", "再见！"]
+
+
+def test_ordinal_periods_in_german():
+    assert split_segments("Am 3. Mai kommt er. Gut.", "de") == ["Am 3. Mai kommt er. ", "Gut."]
+
+
+def test_long_sentence_is_split_at_clauses():
+    text = "The first clause is reasonably long here, and the second clause is also quite long, and a third one goes on until the end."
+    segments = split_segments(text, "en")
+    assert segments == [
+        "The first clause is reasonably long here, ",
+        "and the second clause is also quite long, ",
+        "and a third one goes on until the end.",
+    ]
+
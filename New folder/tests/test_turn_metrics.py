@@ -0,0 +1,21 @@
+import pytest
+from turn_metrics import percentile
+
+
+def test_empty_list():
+    assert percentile([], 50) is None
+
+
+def test_single_value():
+    assert percentile([42], 50) == 42
+    assert percentile([42], 99) == 42
+
+
+@pytest.mark.parametrize("p, expected", [(0, 1), (10, 1), (50, 5), (51, 6), (95, 10), (99, 10), (100, 10)])
+def test_nearest_rank(p, expected):
+    assert percentile(list(range(1, 11)), p) == expected
+
+
+def test_small_sample_p95_is_the_maximum():
+    assert percentile([100, 200, 300], 95) == 300
+    assert percentile([100, 200, 300], 50) == 200
@@ -0,0 +1,416 @@
+import os
+import json
+import asyncio
+import hashlib
+import unicodedata
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from livekit import rtc
+from livekit.agents import tokenize, tts, utils
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+# Cache of synthesized phrases. CachedTTS wraps a provider TTS; every
+# sentence it is asked to speak is looked up by provider, voice, model,
+# language and normalized text, first in an in-memory LRU and then in an LRU
+# directory on disk (shared by all worker processes). Hits are replayed as
+# the original audio frames without calling the provider. With a streaming
+# provider the wrapper streams too: text is split into sentences as it
+# arrives, and the sentences missing from the cache go through one stream of
+# the provider, with the cached ones spliced in between. Disk reads run in a
+# thread and disk writes on a single writer thread, never on the event loop.
+
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MEMORY_MB = float(os.environ.get("TTS_CACHE_MEMORY_MB", 64))
+TTS_CACHE_DISK_MB = float(os.environ.get("TTS_CACHE_DISK_MB", 512))
+# Long sentences rarely repeat; caching them would only push out useful entries
+TTS_CACHE_MAX_CHARS = int(os.environ.get("TTS_CACHE_MAX_CHARS", 200))
+# Cache entries are sentences as this tokenizer splits them (the session's default one)
+SENTENCE_TOKENIZER = tokenize.basic.SentenceTokenizer()
+
+
+def normalize_text(text):
+    """Text as used in cache keys: Unicode-normalized with collapsed whitespace"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def cache_key(voice_key, text):
+    """Cache key of one phrase spoken by one voice"""
+    return hashlib.sha256(f"{voice_key}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _cache_key_of(voice_key, text):
+    """Cache key of a sentence, or None if it is not worth caching"""
+    if len(text) <= TTS_CACHE_MAX_CHARS and text.strip():
+        return cache_key(voice_key, text)
+    return None
+
+
+def voice_key_for(config):
+    """Identity of the voice a TTS config produces: provider, voice, model and language"""
+    return "|".join(str(config.get(field) or "") for field in (
+        "tts_provider", "tts_model", "tts_elevenlabs_model", "tts_language"))
+
+
+async def split_sentences(text):
+    """Sentences of a text as CachedSynthesizeStream (and the session's stream adapter) split it"""
+    stream = SENTENCE_TOKENIZER.stream()
+    stream.push_text(text)
+    stream.end_input()
+    return [sentence.token async for sentence in stream]
+
+
+async def cached_phrase(config, text):
+    """Audio of a phrase already synthesized with the voice of a config, or None.
+
+    The TTS caches sentence by sentence, so the phrase is found only if all
+    of its sentences are.
+    """
+    if not config.get("tts_cache", True):
+        return None
+    voice_key = voice_key_for(config)
+    parts = []
+    for sentence in await split_sentences(text):
+        key = _cache_key_of(voice_key, sentence)
+        audio = await phrase_cache.aget(key) if key else None
+        if audio is None:
+            return None
+        parts.append(audio)
+    if not parts or any((a.sample_rate, a.num_channels) != (parts[0].sample_rate, parts[0].num_channels) for a in parts):
+        return None
+    return CachedAudio(parts[0].sample_rate, parts[0].num_channels, [frame for a in parts for frame in a.frames])
+
+
+async def render_phrase(tts_instance, text):
+    """Synthesize a phrase through a CachedTTS, sentence by sentence, so it is stored for later replay"""
+    async def render(sentence):
+        async with tts_instance.synthesize(sentence) as stream:
+            async for _ in stream:
+                pass
+
+    await asyncio.gather(*(render(sentence) for sentence in await split_sentences(text)))
+
+
+class CachedAudio:
+    """PCM frames of one synthesized phrase"""
+
+    def __init__(self, sample_rate, num_channels, frames):
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+        self.frames = frames  # list of (pcm bytes, samples per channel)
+
+    @property
+    def size(self):
+        return sum(len(data) for data, _ in self.frames)
+
+    def to_bytes(self):
+        header = {
+            "sample_rate": self.sample_rate,
+            "num_channels": self.num_channels,
+            "frames": [samples for _, samples in self.frames],
+        }
+        return json.dumps(header).encode() + b"\n" + b"".join(data for data, _ in self.frames)
+
+    @classmethod
+    def from_bytes(cls, raw):
+        header, _, pcm = raw.partition(b"\n")
+        header = json.loads(header)
+        frames, offset = [], 0
+        for samples in header["frames"]:
+            length = samples * header["num_channels"] * 2  # 16-bit PCM
+            frames.append((pcm[offset:offset + length], samples))
+            offset += length
+        return cls(header["sample_rate"], header["num_channels"], frames)
+
+    def audio_frames(self):
+        for data, samples in self.frames:
+            yield rtc.AudioFrame(
+                data=data,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=samples,
+            )
+
+    async def replay(self):
+        """The frames as an async iterable, as session.say(audio=...) expects"""
+        for frame in self.audio_frames():
+            yield frame
+
+
+class PhraseCache:
+    """Two-tier LRU cache (memory, then disk) of synthesized phrases"""
+
+    def __init__(self, directory=TTS_CACHE_DIR, memory_mb=TTS_CACHE_MEMORY_MB, disk_mb=TTS_CACHE_DISK_MB):
+        self.directory = directory
+        self.memory_limit = int(memory_mb * 1024 * 1024)
+        self.disk_limit = int(disk_mb * 1024 * 1024)
+        self._memory = OrderedDict()  # key -> CachedAudio
+        self._memory_bytes = 0
+        self._disk_bytes = None  # measured on first write, then kept up to date by the writer
+        self._lock = threading.Lock()
+        # One writer thread: writes and evictions never run concurrently, so the byte count stays right
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-cache-writer")
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".pcm")
+
+    def _remember(self, key, audio):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return
+            self._memory[key] = audio
+            self._memory_bytes += audio.size
+            while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size
+
+    def _get_memory(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+            return audio
+
+    def get(self, key):
+        """Return the cached audio of a key, or None; blocks on disk, so not for the event loop"""
+        audio = self._get_memory(key)
+        return audio if audio is not None else self._get_disk(key)
+
+    async def aget(self, key):
+        """Return the cached audio of a key, or None, reading the disk tier in a thread"""
+        audio = self._get_memory(key)
+        return audio if audio is not None else await asyncio.to_thread(self._get_disk, key)
+
+    def _get_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = CachedAudio.from_bytes(f.read())
+            os.utime(path) # the mtime is the LRU clock of the disk tier
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        self.hits["disk"] += 1
+        self._remember(key, audio)
+        return audio
+
+    def put(self, key, audio):
+        """Store audio in memory now and on disk in the background; returns the write's future"""
+        self._remember(key, audio)
+        return self._writer.submit(self._put_disk, key, audio)
+
+    def _put_disk(self, key, audio):
+        path = self._path(key)
+        raw = audio.to_bytes()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write TTS cache entry: {e}")
+            return
+        # The directory is scanned once; after that the writer keeps a running count
+        if self._disk_bytes is None:
+            disk_bytes = self._scan_disk_bytes()
+        else:
+            disk_bytes = self._disk_bytes + len(raw) - replaced
+        with self._lock:
+            self._disk_bytes = disk_bytes
+        if disk_bytes > self.disk_limit:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pcm"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_disk_bytes(self):
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def _evict_disk(self):
+        # Other worker processes write to the same directory, so rescan before evicting
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.disk_limit * 0.9:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                continue
+        with self._lock:
+            self._disk_bytes = total
+
+    def stats(self):
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 1),
+                "disk_mb": round(self._disk_bytes / 1024 / 1024, 1) if self._disk_bytes is not None else None,
+                "hits": dict(self.hits),
+                "misses": self.misses,
+            }
+
+
+phrase_cache = PhraseCache()
+
+
+class CachedTTS(tts.TTS):
+    """TTS wrapper that serves repeated phrases from the phrase cache.
+
+    It streams when the wrapped provider streams. Either way every sentence
+    is looked up on its own, so the same phrase hits the same cache entry
+    whether it was synthesized or streamed.
+    """
+
+    def __init__(self, wrapped, voice_key, cache=None):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=wrapped.capabilities.streaming),
+            sample_rate=wrapped.sample_rate,
+            num_channels=wrapped.num_channels,
+        )
+        self.wrapped = wrapped
+        self.voice_key = voice_key
+        self.cache = cache or phrase_cache
+
+    def synthesize(self, text, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return CachedChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def stream(self, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return CachedSynthesizeStream(tts=self, conn_options=conn_options)
+
+    def prewarm(self):
+        prewarm = getattr(self.wrapped, "prewarm", None)
+        if prewarm is not None:
+            prewarm()
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+class CachedChunkedStream(tts.ChunkedStream):
+    """Replays a cached phrase, or synthesizes it with the wrapped TTS and caches the frames"""
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        key = _cache_key_of(self._tts.voice_key, self._input_text)
+
+        cached = await self._tts.cache.aget(key) if key else None
+        if cached is not None:
+            for frame in cached.audio_frames():
+                self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+            return
+
+        frames = []
+        sample_rate = num_channels = None
+        async with self._tts.wrapped.synthesize(self._input_text, conn_options=self._conn_options) as stream:
+            async for audio in stream:
+                frame = audio.frame
+                sample_rate, num_channels = frame.sample_rate, frame.num_channels
+                frames.append((bytes(frame.data), frame.samples_per_channel))
+                self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+        if key and frames:
+            self._tts.cache.put(key, CachedAudio(sample_rate, num_channels, frames))
+
+
+class CachedSynthesizeStream(tts.SynthesizeStream):
+    """Splits streamed text into sentences; replays cached ones and streams the rest through the wrapped TTS.
+
+    All misses go through a single stream of the wrapped TTS, one flushed
+    segment per sentence, so its connection setup and first-byte latency are
+    paid once per reply. The provider works on the next miss while cached
+    sentences before it are replayed. Audio is emitted in sentence order.
+    """
+
+    def __init__(self, *, tts, conn_options):
+        super().__init__(tts=tts, conn_options=conn_options)
+        self._sentences = SENTENCE_TOKENIZER.stream()
+        self._upstream = None
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        plan = asyncio.Queue()  # per sentence in order: ("cached", audio) or ("streamed", cache key), then None
+
+        async def forward_input():
+            async for data in self._input_ch:
+                if isinstance(data, self._FlushSentinel):
+                    self._sentences.flush()
+                else:
+                    self._sentences.push_text(data)
+            self._sentences.end_input()
+
+        async def plan_sentences():
+            async for sentence in self._sentences:
+                key = _cache_key_of(self._tts.voice_key, sentence.token)
+                cached = await self._tts.cache.aget(key) if key else None
+                if cached is not None:
+                    plan.put_nowait(("cached", cached))
+                    continue
+                if self._upstream is None:
+                    self._upstream = self._tts.wrapped.stream(conn_options=self._conn_options)
+                self._upstream.push_text(sentence.token)
+                self._upstream.flush()
+                plan.put_nowait(("streamed", key))
+            if self._upstream is not None:
+                self._upstream.end_input()
+            plan.put_nowait(None)
+
+        async def emit():
+            while (item := await plan.get()) is not None:
+                kind, value = item
+                if kind == "cached":
+                    self._replay(request_id, value)
+                else:
+                    await self._forward_segment(request_id, value)
+
+        tasks = [asyncio.create_task(task()) for task in (forward_input, plan_sentences, emit)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await utils.aio.cancel_and_wait(*tasks)
+            if self._upstream is not None:
+                await self._upstream.aclose()
+
+    def _replay(self, request_id, cached):
+        frames = list(cached.audio_frames())
+        for index, frame in enumerate(frames):
+            self._event_ch.send_nowait(tts.SynthesizedAudio(
+                request_id=request_id, frame=frame, is_final=index == len(frames) - 1))
+
+    async def _forward_segment(self, request_id, key):
+        """Pass on the wrapped stream's audio up to the end of its current segment, and cache it"""
+        frames = []
+        sample_rate = num_channels = None
+        async for audio in self._upstream:
+            frame = audio.frame
+            sample_rate, num_channels = frame.sample_rate, frame.num_channels
+            frames.append((bytes(frame.data), frame.samples_per_channel))
+            self._event_ch.send_nowait(tts.SynthesizedAudio(
+                request_id=request_id, frame=frame, is_final=audio.is_final))
+            if audio.is_final:
+                break
+
+        if key and frames:
+            self._tts.cache.put(key, CachedAudio(sample_rate, num_channels, frames))
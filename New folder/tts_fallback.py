@@ -0,0 +1,196 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from livekit import rtc
+from livekit.agents import tts, utils, APIConnectionError
+from livekit.agents.types import DEFAULT_API_CONNECT_OPTIONS
+
+# Ordered TTS failover. FallbackTTS speaks every sentence with the first
+# healthy provider of the chain (tts_provider, then the tts_fallback entries).
+# When a provider errors, or sends no audio within the time-to-first-byte
+# threshold, the sentence is retried with the next one and the provider is
+# marked down for a cooldown that grows with repeated failures. Once the
+# cooldown is over it is tried again first, so the chain returns to the
+# primary as soon as the primary recovers.
+
+DEFAULT_FAILOVER_TTFB = 1.5
+COOLDOWN_BASE = float(os.environ.get("TTS_FAILOVER_COOLDOWN", 10))
+COOLDOWN_MAX = float(os.environ.get("TTS_FAILOVER_COOLDOWN_MAX", 300))
+HEALTH_HISTORY = 50
+
+
+class ProviderHealth:
+    """Recent outcomes and cooldowns of TTS providers, shared by all sessions of a process"""
+
+    def __init__(self):
+        self._providers = {}  # provider key -> record
+        self._lock = threading.Lock()
+
+    def _record(self, key):
+        record = self._providers.get(key)
+        if record is None:
+            record = {
+                "recent": deque(maxlen=HEALTH_HISTORY),  # (time, ok, ttfb seconds or None)
+                "consecutive_failures": 0,
+                "down_until": 0,
+                "last_error": None,
+            }
+            self._providers[key] = record
+        return record
+
+    def is_down(self, key):
+        with self._lock:
+            return self._record(key)["down_until"] > time.time()
+
+    def mark_success(self, key, ttfb):
+        with self._lock:
+            record = self._record(key)
+            if record["consecutive_failures"]:
+                print(f"TTS provider {key} recovered")
+            record["recent"].append((time.time(), True, ttfb))
+            record["consecutive_failures"] = 0
+            record["down_until"] = 0
+
+    def mark_failure(self, key, error):
+        with self._lock:
+            record = self._record(key)
+            record["recent"].append((time.time(), False, None))
+            record["consecutive_failures"] += 1
+            cooldown = min(COOLDOWN_BASE * 2 ** (record["consecutive_failures"] - 1), COOLDOWN_MAX)
+            record["down_until"] = time.time() + cooldown
+            record["last_error"] = error
+        print(f"TTS provider {key} failed ({error}), skipping it for {cooldown:.0f}s")
+
+    def stats(self):
+        """Health of every provider seen so far"""
+        now = time.time()
+        with self._lock:
+            report = {}
+            for key, record in self._providers.items():
+                ttfbs = sorted(ttfb for _, ok, ttfb in record["recent"] if ok and ttfb is not None)
+                failures = sum(1 for _, ok, _ in record["recent"] if not ok)
+                report[key] = {
+                    "state": "down" if record["down_until"] > now else "healthy",
+                    "down_for_s": round(max(0, record["down_until"] - now), 1),
+                    "consecutive_failures": record["consecutive_failures"],
+                    "recent_failures": failures,
+                    "recent_requests": len(record["recent"]),
+                    "median_ttfb_ms": round(ttfbs[len(ttfbs) // 2] * 1000, 1) if ttfbs else None,
+                    "last_error": record["last_error"],
+                }
+            return report
+
+
+provider_health = ProviderHealth()
+
+
+class FallbackTTS(tts.TTS):
+    """TTS that fails over along an ordered chain of providers per sentence.
+
+    Providers are given as (key, instance) pairs, primary first. Audio of
+    providers with a lower sample rate is resampled to the highest rate of
+    the chain, so the session sees a single output format.
+    """
+
+    def __init__(self, providers, ttfb_threshold=None, health=None):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=max(instance.sample_rate for _, instance in providers),
+            num_channels=1,
+        )
+        self.providers = providers
+        self.ttfb_threshold = ttfb_threshold or DEFAULT_FAILOVER_TTFB
+        self.health = health or provider_health
+        self.active = providers[0][0]
+
+    @property
+    def wrapped(self):
+        """The primary provider"""
+        return self.providers[0][1]
+
+    def candidates(self):
+        """Providers in the order to try them: healthy ones first, those cooling down as a last resort"""
+        healthy = [p for p in self.providers if not self.health.is_down(p[0])]
+        return healthy + [p for p in self.providers if p not in healthy]
+
+    def synthesize(self, text, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return FallbackChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+    def prewarm(self):
+        # Open every provider's connection so a failover does not pay for it
+        for _, instance in self.providers:
+            prewarm = getattr(instance, "prewarm", None)
+            if prewarm is not None:
+                prewarm()
+
+    async def aclose(self):
+        for _, instance in self.providers:
+            await instance.aclose()
+
+
+class FallbackChunkedStream(tts.ChunkedStream):
+    """Synthesizes one sentence with the first provider that answers in time"""
+
+    async def _run(self):
+        request_id = utils.shortuuid()
+        candidates = self._tts.candidates()
+        errors = []
+        for index, (key, instance) in enumerate(candidates):
+            # The last candidate gets all the time it needs: late audio beats silence
+            threshold = self._tts.ttfb_threshold if index < len(candidates) - 1 else None
+            try:
+                await self._speak(request_id, key, instance, threshold)
+                return
+            except _SwitchProvider as e:
+                errors.append(f"{key}: {e}")
+                self._tts.health.mark_failure(key, str(e))
+        raise APIConnectionError("All TTS providers failed: " + "; ".join(errors))
+
+    async def _speak(self, request_id, key, instance, threshold):
+        resampler = None
+        if instance.sample_rate != self._tts.sample_rate:
+            resampler = rtc.AudioResampler(
+                input_rate=instance.sample_rate,
+                output_rate=self._tts.sample_rate,
+                num_channels=1,
+            )
+
+        started = time.perf_counter()
+        first_audio = True
+        async with instance.synthesize(self._input_text, conn_options=self._conn_options) as stream:
+            frames = stream.__aiter__()
+            while True:
+                try:
+                    if first_audio:
+                        audio = await asyncio.wait_for(frames.__anext__(), threshold)
+                    else:
+                        audio = await frames.__anext__()
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise _SwitchProvider(f"no audio after {threshold}s")
+                except Exception as e:
+                    if first_audio:
+                        raise _SwitchProvider(str(e) or type(e).__name__)
+                    # Part of the sentence has been spoken already, it cannot be retried elsewhere
+                    self._tts.health.mark_failure(key, str(e) or type(e).__name__)
+                    raise
+
+                if first_audio:
+                    first_audio = False
+                    self._tts.health.mark_success(key, time.perf_counter() - started)
+                    if self._tts.active != key:
+                        print(f"TTS switched from {self._tts.active} to {key}")
+                        self._tts.active = key
+                for frame in resampler.push(audio.frame) if resampler else [audio.frame]:
+                    self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+        if resampler:
+            for frame in resampler.flush():
+                self._event_ch.send_nowait(tts.SynthesizedAudio(request_id=request_id, frame=frame))
+
+
+class _SwitchProvider(Exception):
+    """The provider failed before sending audio; the next one should take the sentence"""
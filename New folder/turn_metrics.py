@@ -0,0 +1,104 @@
+import os
+import math
+import time
+from collections import deque
+
+# Per-turn latency breakdown of a live session. A turn starts when the user
+# stops speaking and ends when the agent has finished its reply. In between
+# the tracker timestamps the final transcript and the first agent audio, and
+# takes the end-of-utterance delay, LLM time to first token and TTS time to
+# first byte from the session's metrics events. Completed turns go into a
+# bounded ring buffer per room, from which rolling percentiles are computed.
+
+TURN_HISTORY = int(os.environ.get("TURN_METRICS_HISTORY", 200))
+
+# Stages reported per turn, all in milliseconds:
+#   stt_final   - end of user speech -> final transcript
+#   eou_delay   - end of user speech -> turn detector decided the turn is over
+#   llm_ttft    - LLM request -> first token
+#   tts_ttfb    - TTS request -> first audio byte
+#   first_audio - end of user speech -> agent starts speaking (what the caller hears)
+STAGES = ("stt_final", "eou_delay", "llm_ttft", "tts_ttfb", "first_audio")
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class TurnLatencyTracker:
+    """Collects the latency breakdown of every turn in one room"""
+
+    def __init__(self, room, history=TURN_HISTORY):
+        self.room = room
+        self.turns = deque(maxlen=history)
+        self._current = None
+
+    def attach(self, session):
+        """Subscribe to the AgentSession events the breakdown is built from"""
+        session.on("user_state_changed", self._on_user_state)
+        session.on("user_input_transcribed", self._on_transcript)
+        session.on("agent_state_changed", self._on_agent_state)
+        session.on("metrics_collected", self._on_metrics)
+
+    def _on_user_state(self, event):
+        if event.old_state == "speaking" and event.new_state != "speaking":
+            self._finish()
+            self._current = {"started_at": time.time(), "_eos": time.perf_counter()}
+
+    def _on_transcript(self, event):
+        turn = self._current
+        if turn is not None and event.is_final and "first_audio" not in turn:
+            turn["stt_final"] = _ms(time.perf_counter() - turn["_eos"])
+
+    def _on_agent_state(self, event):
+        turn = self._current
+        if turn is None:
+            return
+        if event.new_state == "speaking" and "first_audio" not in turn:
+            turn["first_audio"] = _ms(time.perf_counter() - turn["_eos"])
+        elif event.old_state == "speaking":
+            self._finish()
+
+    def _on_metrics(self, event):
+        turn = self._current
+        metrics = event.metrics
+        if turn is None:
+            return
+        kind = getattr(metrics, "type", "")
+        # Only the first LLM/TTS request of a turn counts (tool calls can add more)
+        if kind == "eou_metrics":
+            turn.setdefault("eou_delay", _ms(metrics.end_of_utterance_delay))
+        elif kind == "llm_metrics":
+            turn.setdefault("llm_ttft", _ms(metrics.ttft))
+        elif kind == "tts_metrics":
+            turn.setdefault("tts_ttfb", _ms(metrics.ttfb))
+
+    def _finish(self):
+        turn, self._current = self._current, None
+        if turn is None or "first_audio" not in turn:
+            return # the user spoke but the agent never answered (interrupted or ignored)
+        turn.pop("_eos")
+        self.turns.append(turn)
+
+    def summary(self, recent=10):
+        """Rolling p50/p95/p99 per stage over the buffered turns, plus the latest turns"""
+        stages = {}
+        for stage in STAGES:
+            values = sorted(t[stage] for t in self.turns if t.get(stage) is not None)
+            stages[stage] = {"count": len(values)}
+            stages[stage].update({f"p{p}": percentile(values, p) for p in PERCENTILES})
+        return {
+            "room": self.room,
+            "turns": len(self.turns),
+            "stages": stages,
+            "recent": list(self.turns)[-recent:],
+        }
@@ -0,0 +1,300 @@
+import os
+import sys
+import json
+import struct
+import argparse
+import numpy as np
+from livekit.plugins.silero import onnx_model
+from config_manager import load_config, save_config, validate_config
+from agent_generator import generate_agent_code
+
+# Offline tuning of VAD endpointing on recorded calls. Every WAV file in the
+# given directories is one user turn followed by silence. Silero speech
+# probabilities are computed once per file; the silero plugin's speech/silence
+# state machine is then replayed for every combination of activation
+# threshold and min silence duration. For each combination the harness
+# reports the endpointing delay (true end of speech -> turn committed) and the
+# false cut-offs (turn committed during a pause, before the speaker finished).
+#
+# The true end of speech comes from a sidecar <name>.json with "speech_end"
+# (seconds) when there is one, otherwise from the signal energy.
+#
+#   python vad_tuning.py recordings/ --max-cutoff-rate 0.02 --write
+
+VAD_SAMPLE_RATE = 16000
+# Defaults of the silero plugin that are not swept
+MIN_SPEECH_DURATION = 0.05
+DEFAULT_MIN_SILENCE = [0.2, 0.3, 0.4, 0.55, 0.7, 0.85, 1.0]
+DEFAULT_ACTIVATION_THRESHOLD = [0.3, 0.4, 0.5, 0.6, 0.7]
+# Energy-based end of speech: 20 ms frames within this many dB of the loudest frame are speech
+ENERGY_FRAME = 0.02
+ENERGY_RANGE_DB = 35
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def read_wav(path):
+    """Read a WAV file as mono float32 samples in [-1, 1] and its sample rate.
+
+    Parses the RIFF chunks directly, since the wave module rejects float and
+    WAVE_FORMAT_EXTENSIBLE files (which is what the sample route writes).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError(f"{path} is not a WAV file")
+
+    fmt = pcm = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, size = struct.unpack("<4sI", data[offset:offset + 8])
+        body = data[offset + 8:offset + 8 + size] # streamed files leave the data size at 0xFFFFFFFF
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", body[:16])
+            if fmt[0] == WAVE_FORMAT_EXTENSIBLE:
+                fmt = (struct.unpack("<H", body[24:26])[0],) + fmt[1:]
+        elif chunk_id == b"data":
+            pcm = body
+            break
+        offset += 8 + size + (size & 1)
+    if fmt is None or pcm is None:
+        raise ValueError(f"{path} has no audio data")
+
+    format_tag, channels, sample_rate, _, _, bits = fmt
+    if format_tag == WAVE_FORMAT_FLOAT and bits == 32:
+        samples = np.frombuffer(pcm[:len(pcm) // 4 * 4], dtype="<f4")
+    elif format_tag == WAVE_FORMAT_PCM and bits in (16, 32):
+        dtype = "<i2" if bits == 16 else "<i4"
+        samples = np.frombuffer(pcm[:len(pcm) // (bits // 8) * (bits // 8)], dtype=dtype) / float(2 ** (bits - 1))
+    else:
+        raise ValueError(f"{path}: unsupported WAV format {format_tag} with {bits} bits")
+    samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32), sample_rate
+
+
+def resample(samples, sample_rate, target_rate=VAD_SAMPLE_RATE):
+    """Linear resampling, which is accurate enough for voice activity detection"""
+    if sample_rate == target_rate:
+        return samples
+    duration = len(samples) / sample_rate
+    target_times = np.arange(int(duration * target_rate)) / target_rate
+    return np.interp(target_times, np.arange(len(samples)) / sample_rate, samples).astype(np.float32)
+
+
+def energy_speech_end(samples, sample_rate):
+    """End of the last frame whose energy is within ENERGY_RANGE_DB of the loudest one"""
+    frame = int(ENERGY_FRAME * sample_rate)
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+    if not len(frames):
+        return None
+    db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    voiced = np.nonzero(db >= db.max() - ENERGY_RANGE_DB)[0]
+    return (voiced[-1] + 1) * ENERGY_FRAME if len(voiced) else None
+
+
+def speech_end_label(path, samples, sample_rate):
+    """True end of speech of a recording, from its sidecar label or the signal energy"""
+    label_path = os.path.splitext(path)[0] + ".json"
+    if os.path.exists(label_path):
+        with open(label_path, "r") as f:
+            return float(json.load(f)["speech_end"]), "label"
+    return energy_speech_end(samples, sample_rate), "energy"
+
+
+def speech_probabilities(model, samples):
+    """Silero speech probability of every window of a 16 kHz recording"""
+    window = model.window_size_samples
+    return np.array([model(samples[i:i + window]) for i in range(0, len(samples) - window + 1, window)])
+
+
+def simulate_vad(probabilities, window_s, activation_threshold, min_silence,
+                 min_speech=MIN_SPEECH_DURATION):
+    """Replay the silero plugin's state machine over speech probabilities.
+
+    Returns (time, "start" | "end") events at the moment the plugin would emit
+    START_OF_SPEECH / END_OF_SPEECH.
+    """
+    events = []
+    speaking = False
+    speech_duration = silence_duration = 0.0
+    for index, probability in enumerate(probabilities):
+        now = (index + 1) * window_s
+        if probability >= activation_threshold:
+            speech_duration += window_s
+            silence_duration = 0.0
+            if not speaking and speech_duration >= min_speech:
+                speaking = True
+                events.append((now, "start"))
+        else:
+            silence_duration += window_s
+            speech_duration = 0.0
+            if speaking and silence_duration >= min_silence:
+                speaking = False
+                events.append((now, "end"))
+    return events
+
+
+def evaluate(events, speech_end, endpointing_delay):
+    """Outcome of one recording: the turn is committed endpointing_delay after an
+    end of speech, unless speech starts again before that"""
+    result = {"cutoffs": 0, "delay": None, "missed": False}
+    if not any(kind == "start" for _, kind in events):
+        result["missed"] = True
+        return result
+    for index, (time, kind) in enumerate(events):
+        if kind != "end":
+            continue
+        committed_at = time + endpointing_delay
+        resumed = any(k == "start" and t <= committed_at for t, k in events[index + 1:])
+        if resumed:
+            continue
+        if committed_at < speech_end:
+            result["cutoffs"] += 1
+        elif result["delay"] is None:
+            result["delay"] = committed_at - speech_end
+    if result["delay"] is None and not result["cutoffs"]:
+        # The recording ends before the silence is long enough to end the turn
+        result["missed"] = True
+    return result
+
+
+def load_recordings(directories, model):
+    recordings = []
+    window_s = model.window_size_samples / VAD_SAMPLE_RATE
+    for directory in directories:
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith(".wav"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                samples, sample_rate = read_wav(path)
+            except ValueError as e:
+                print(f"Skipping {path}: {e}")
+                continue
+            speech_end, source = speech_end_label(path, samples, sample_rate)
+            if speech_end is None:
+                print(f"Skipping {path}: no speech found")
+                continue
+            recordings.append({
+                "path": path,
+                "speech_end": speech_end,
+                "speech_end_source": source,
+                "probabilities": speech_probabilities(model, resample(samples, sample_rate)),
+            })
+    return recordings, window_s
+
+
+def sweep(recordings, window_s, min_silences, thresholds, endpointing_delay):
+    """Evaluate every parameter combination over all recordings"""
+    results = []
+    for threshold in thresholds:
+        for min_silence in min_silences:
+            outcomes = [
+                evaluate(simulate_vad(r["probabilities"], window_s, threshold, min_silence),
+                         r["speech_end"], endpointing_delay)
+                for r in recordings
+            ]
+            delays = sorted(o["delay"] for o in outcomes if o["delay"] is not None)
+            cut_files = sum(1 for o in outcomes if o["cutoffs"])
+            results.append({
+                "vad_activation_threshold": threshold,
+                "vad_min_silence_duration": min_silence,
+                "files": len(outcomes),
+                "cutoff_files": cut_files,
+                "cutoff_rate": round(cut_files / len(outcomes), 3),
+                "missed": sum(1 for o in outcomes if o["missed"]),
+                "mean_delay_ms": round(sum(delays) / len(delays) * 1000) if delays else None,
+                "p95_delay_ms": round(delays[min(len(delays) - 1, int(len(delays) * 0.95))] * 1000) if delays else None,
+            })
+    return results
+
+
+def choose(results, max_cutoff_rate):
+    """Lowest mean delay among the combinations within the cut-off budget that miss the fewest turns"""
+    allowed = [r for r in results if r["cutoff_rate"] <= max_cutoff_rate and r["mean_delay_ms"] is not None]
+    if not allowed:
+        return None
+    fewest_missed = min(r["missed"] for r in allowed)
+    return min(
+        (r for r in allowed if r["missed"] == fewest_missed),
+        key=lambda r: (r["mean_delay_ms"], r["cutoff_rate"]),
+    )
+
+
+def write_parameters(chosen):
+    """Save the chosen VAD parameters into agent_config.json and the worker snapshot"""
+    config = load_config()
+    config["vad_activation_threshold"] = chosen["vad_activation_threshold"]
+    config["vad_min_silence_duration"] = chosen["vad_min_silence_duration"]
+    validate_config(config)
+    save_config(config)
+    generate_agent_code(config)
+
+
+def _float_list(value):
+    return [float(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune VAD endpointing on directories of WAV recordings")
+    parser.add_argument("directories", nargs="+", help="directories with one user turn per WAV file")
+    parser.add_argument("--min-silence", type=_float_list, default=DEFAULT_MIN_SILENCE,
+                        help="comma-separated min silence durations to try (seconds)")
+    parser.add_argument("--threshold", type=_float_list, default=DEFAULT_ACTIVATION_THRESHOLD,
+                        help="comma-separated activation thresholds to try")
+    parser.add_argument("--endpointing-delay", type=float, default=None,
+                        help="delay after end of speech before the turn is committed "
+                             "(default: min_endpointing_delay from agent_config.json)")
+    parser.add_argument("--max-cutoff-rate", type=float, default=0.0,
+                        help="highest share of recordings allowed to be cut off")
+    parser.add_argument("--json", action="store_true", help="print the full results as JSON")
+    parser.add_argument("--write", action="store_true", help="write the chosen parameters into agent_config.json")
+    args = parser.parse_args(argv)
+
+    config = validate_config(load_config())
+    endpointing_delay = args.endpointing_delay
+    if endpointing_delay is None:
+        endpointing_delay = config["min_endpointing_delay"]
+
+    model = onnx_model.OnnxModel(
+        onnx_session=onnx_model.new_inference_session(force_cpu=True),
+        sample_rate=VAD_SAMPLE_RATE,
+    )
+    recordings, window_s = load_recordings(args.directories, model)
+    if not recordings:
+        print("No usable WAV recordings found")
+        return 1
+    labelled = sum(1 for r in recordings if r["speech_end_source"] == "label")
+    print(f"{len(recordings)} recordings ({labelled} with labelled speech end), "
+          f"endpointing delay {endpointing_delay}s")
+
+    results = sweep(recordings, window_s, args.min_silence, args.threshold, endpointing_delay)
+    chosen = choose(results, args.max_cutoff_rate)
+    current = (config["vad_activation_threshold"], config["vad_min_silence_duration"])
+
+    if args.json:
+        print(json.dumps({"results": results, "chosen": chosen}, indent=2))
+    else:
+        print(f"{'threshold':>9} {'min_silence':>11} {'cutoff':>7} {'missed':>6} {'mean_ms':>8} {'p95_ms':>7}")
+        for r in results:
+            marks = ("*" if r is chosen else " ") + ("c" if (r["vad_activation_threshold"], r["vad_min_silence_duration"]) == current else " ")
+            print(f"{r['vad_activation_threshold']:>9} {r['vad_min_silence_duration']:>11} {r['cutoff_rate']:>7} "
+                  f"{r['missed']:>6} {str(r['mean_delay_ms']):>8} {str(r['p95_delay_ms']):>7} {marks}")
+        print("* chosen, c current configuration")
+
+    if chosen is None:
+        print(f"No combination stays within a cut-off rate of {args.max_cutoff_rate}")
+        return 1
+    print(f"Chosen: activation threshold {chosen['vad_activation_threshold']}, "
+          f"min silence {chosen['vad_min_silence_duration']}s "
+          f"(mean endpointing delay {chosen['mean_delay_ms']} ms, cut-off rate {chosen['cutoff_rate']})")
+    if args.write:
+        write_parameters(chosen)
+        print("Parameters written to agent_config.json; the worker uses them from its next job")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
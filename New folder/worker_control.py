@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import socket
+import asyncio
+
+# Control channel between the control plane and running agent jobs.
+# Every job serves its own Unix domain socket on the job's event loop and
+# registers it (with the room it serves) in CONTROL_DIR. The control plane
+# sends newline-delimited JSON commands to the registered sockets; the job
+# applies them to its live session in place and acknowledges each one with
+# its timings. Jobs never share a port, so any number can run per process.
+
+CONTROL_DIR = os.environ.get("AGENT_CONTROL_DIR", "worker_control")
+CONTROL_TIMEOUT = 15
+# Profile key of jobs that run on the default configuration (see providers.resolve_job_profile)
+DEFAULT_PROFILE = "default"
+# Reports jobs leave behind when they end (e.g. memory accounting), newest kept
+REPORT_DIR = os.path.join(CONTROL_DIR, "reports")
+REPORT_HISTORY = int(os.environ.get("AGENT_REPORT_HISTORY", 50))
+MAX_MESSAGE_BYTES = 1024 * 1024
+
+# Settings the worker can swap in the live session, per component
+HOT_COMPONENT_FIELDS = {
+    "stt": ["stt_provider", "stt_model", "stt_language"],
+    "llm": ["llm_provider", "llm_base_url", "llm_api_key", "llm_user", "llm_use_blocking_mode"],
+    "tts": ["tts_provider", "tts_model", "tts_language", "tts_elevenlabs_model", "tts_fallback", "tts_failover_ttfb"],
+}
+
+
+def _safe_name(job_id):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(job_id))
+
+
+def socket_path(job_id):
+    """Path of the control socket of one job"""
+    return os.path.join(CONTROL_DIR, f"{_safe_name(job_id)}.sock")
+
+
+def _registration_path(job_id):
+    return os.path.join(CONTROL_DIR, f"{_safe_name(job_id)}.json")
+
+
+# --- Job side -------------------------------------------------------------
+
+async def serve_job_control(job_id, room, handler, profile=DEFAULT_PROFILE):
+    """Start the control socket of a job on the running loop and register it.
+
+    handler(command, payload) is a coroutine returning the acknowledgement
+    dict; it runs on the job's own loop, so it can touch the session directly.
+    Returns a coroutine function that stops the server and unregisters the job.
+    """
+    os.makedirs(CONTROL_DIR, exist_ok=True)
+    path = socket_path(job_id)
+    if os.path.exists(path):
+        os.unlink(path)
+
+    async def on_connection(reader, writer):
+        try:
+            line = await reader.readline()
+            try:
+                message = json.loads(line)
+                ack = await handler(message["command"], message.get("payload") or {})
+            except (ValueError, KeyError, TypeError) as e:
+                ack = {"ok": False, "error": f"Bad control message: {e}"}
+            except Exception as e:
+                ack = {"ok": False, "error": str(e)}
+            writer.write(json.dumps(ack).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(on_connection, path=path, limit=MAX_MESSAGE_BYTES)
+
+    registration = {
+        "job_id": job_id,
+        "room": room,
+        "profile": profile,
+        "pid": os.getpid(),
+        "worker_id": os.environ.get("AGENT_WORKER_ID"),
+        "socket": path,
+        "registered_at": time.time(),
+    }
+    tmp_path = _registration_path(job_id) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registration, f)
+    os.replace(tmp_path, _registration_path(job_id))
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+        _unregister(job_id)
+
+    return close
+
+
+def _unregister(job_id):
+    for path in (_registration_path(job_id), socket_path(job_id)):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def save_job_report(job_id, kind, report):
+    """Store a report of a finished job; its control socket is gone, so the control plane reads the file"""
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"{_safe_name(job_id)}.{kind}.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(dict(report, job_id=job_id, saved_at=time.time()), f)
+    os.replace(path + ".tmp", path)
+
+    reports = sorted(
+        (entry for entry in os.scandir(REPORT_DIR) if entry.name.endswith(f".{kind}.json")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in reports[:-REPORT_HISTORY]:
+        try:
+            os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+# --- Control plane side ---------------------------------------------------
+
+def list_jobs():
+    """Registered jobs with their room, pid and socket"""
+    if not os.path.isdir(CONTROL_DIR):
+        return []
+    jobs = []
+    for name in sorted(os.listdir(CONTROL_DIR)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(CONTROL_DIR, name)) as f:
+                jobs.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return jobs
+
+
+def list_job_reports(kind, limit=20):
+    """Reports of one kind left by finished jobs, newest first"""
+    if not os.path.isdir(REPORT_DIR):
+        return []
+    reports = []
+    for name in os.listdir(REPORT_DIR):
+        if not name.endswith(f".{kind}.json"):
+            continue
+        try:
+            with open(os.path.join(REPORT_DIR, name)) as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    reports.sort(key=lambda report: report.get("saved_at", 0), reverse=True)
+    return reports[:limit]
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _send_to_job(job, command, payload):
+    started = time.time()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONTROL_TIMEOUT)
+            sock.connect(job["socket"])
+            sock.sendall(json.dumps({"command": command, "payload": payload}).encode() + b"\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        ack = json.loads(data)
+    except (ConnectionRefusedError, FileNotFoundError) as e:
+        if not _pid_alive(job["pid"]):
+            # The job process died without cleaning up after itself
+            _unregister(job["job_id"])
+        return {"ok": False, "unreachable": True, "error": str(e),
+                "round_trip_ms": round((time.time() - started) * 1000, 1)}
+    except (OSError, ValueError) as e:
+        return {"ok": False, "error": str(e), "round_trip_ms": round((time.time() - started) * 1000, 1)}
+
+    ack["round_trip_ms"] = round((time.time() - started) * 1000, 1)
+    return ack
+
+
+def send_command(command, payload=None, room=None, job_id=None, profile=None):
+    """Send one control command to the running jobs and return the combined acknowledgement.
+
+    Without room, job_id or profile every job gets the command; otherwise
+    only the jobs in that room, the one job, or the jobs on that profile.
+    """
+    started = time.time()
+    jobs = [
+        job for job in list_jobs()
+        if (room is None or job["room"] == room)
+        and (job_id is None or job["job_id"] == job_id)
+        and (profile is None or job.get("profile", DEFAULT_PROFILE) == profile)
+    ]
+    if not jobs:
+        # Jobs register their control socket only while they run
+        error = "No running jobs"
+        if room is not None or job_id is not None:
+            error += f" for {'room ' + room if room is not None else 'job ' + job_id}"
+        return {"ok": False, "unreachable": True, "error": error, "jobs": {},
+                "round_trip_ms": round((time.time() - started) * 1000, 1)}
+
+    acks = {job["job_id"]: dict(_send_to_job(job, command, payload or {}), room=job["room"]) for job in jobs}
+    reachable = {job_id: ack for job_id, ack in acks.items() if not ack.get("unreachable")}
+    errors = {job_id: ack.get("error") or ack.get("errors") for job_id, ack in reachable.items() if not ack.get("ok")}
+    result = {
+        "ok": bool(reachable) and not errors,
+        "jobs": acks,
+        "round_trip_ms": round((time.time() - started) * 1000, 1),
+    }
+    if not reachable:
+        result.update({"unreachable": True, "error": "No running jobs"})
+    elif errors:
+        result["errors"] = errors
+    return result
+
+
+def apply_components(config, components, room=None):
+    """Push the full settings of the given components from the default config to the running jobs on it.
+
+    Jobs on a profile keep their profile's settings and are left alone.
+    """
+    changes = {}
+    for component in components:
+        for field in HOT_COMPONENT_FIELDS[component]:
+            if field in config:
+                changes[field] = config[field]
+    ack = send_command("apply", changes, room=room, profile=DEFAULT_PROFILE)
+    if ack.get("unreachable") and not ack["jobs"]:
+        # No live session runs on the default config, so there is nothing to swap
+        return {"ok": True, "jobs": {}, "round_trip_ms": ack["round_trip_ms"]}
+    if ack.get("ok"):
+        slowest = max((job.get("elapsed_ms") or 0.0 for job in ack["jobs"].values()), default=0.0)
+        print(f"{len(ack['jobs'])} job(s) applied {', '.join(components)} in up to {slowest} ms "
+              f"(round trip {ack['round_trip_ms']} ms)")
+    return ack
@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import threading
+import selectors
+from collections import deque
+
+# Captures the stdout/stderr of worker processes. One pump thread reads all
+# worker pipes through a selector (the pipes are non-blocking, so a quiet or
+# stuck worker never holds up the others) and appends each line to a bounded
+# ring buffer per worker slot. Listeners (the SocketIO stream) get every line
+# as it arrives.
+
+LOG_BUFFER_LINES = int(os.environ.get("WORKER_LOG_BUFFER_LINES", 2000))
+LOG_ECHO = os.environ.get("WORKER_LOG_ECHO", "0") == "1"  # also print worker lines to our stdout
+MAX_LINE_BYTES = 16 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+worker_logs = {}  # slot id -> deque of log entries, kept across restarts of the slot
+_listeners = []
+_lock = threading.Lock()
+_selector = selectors.DefaultSelector()
+_pump_thread = None
+_seq = 0
+
+
+def add_log_listener(callback):
+    """Call callback(entry) for every captured line"""
+    _listeners.append(callback)
+
+
+def _append(slot, pid, stream, raw):
+    global _seq
+    line = raw.decode("utf-8", errors="replace").rstrip("\r")
+    with _lock:
+        _seq += 1
+        entry = {"seq": _seq, "time": time.time(), "worker": slot, "pid": pid, "stream": stream, "line": line}
+        worker_logs.setdefault(slot, deque(maxlen=LOG_BUFFER_LINES)).append(entry)
+    if LOG_ECHO:
+        print(f"[worker {slot}] {line}")
+    for callback in list(_listeners):
+        try:
+            callback(entry)
+        except Exception as e:
+            print(f"Worker log listener error: {e}")
+
+
+def _read(key):
+    slot, pid, stream, pending = key.data
+    try:
+        data = os.read(key.fd, READ_CHUNK_BYTES)
+    except BlockingIOError:
+        return
+    except OSError:
+        data = b""
+
+    if not data:
+        # EOF: the worker exited (or closed the stream)
+        if pending[0]:
+            _append(slot, pid, stream, pending[0])
+        _selector.unregister(key.fileobj)
+        key.fileobj.close()
+        return
+
+    lines = (pending[0] + data).split(b"\n")
+    pending[0] = lines.pop()
+    if len(pending[0]) > MAX_LINE_BYTES:
+        lines.append(pending[0])
+        pending[0] = b""
+    for raw in lines:
+        _append(slot, pid, stream, raw)
+
+
+def _pump():
+    while True:
+        if not _selector.get_map():
+            time.sleep(0.2)
+            continue
+        for key, _ in _selector.select(timeout=0.5):
+            _read(key)
+
+
+def capture_output(slot, process):
+    """Start capturing the piped stdout/stderr of a worker process"""
+    global _pump_thread
+    for stream, pipe in (("stdout", process.stdout), ("stderr", process.stderr)):
+        if pipe is None:
+            continue
+        os.set_blocking(pipe.fileno(), False)
+        _selector.register(pipe, selectors.EVENT_READ, (slot, process.pid, stream, [b""]))
+    with _lock:
+        if _pump_thread is None or not _pump_thread.is_alive():
+            _pump_thread = threading.Thread(target=_pump, daemon=True)
+            _pump_thread.start()
+
+
+def _entries(slot, stream=None):
+    with _lock:
+        if slot is None:
+            entries = sorted((e for logs in worker_logs.values() for e in logs), key=lambda e: e["seq"])
+        else:
+            entries = list(worker_logs.get(slot, ()))
+    if stream:
+        entries = [e for e in entries if e["stream"] == stream]
+    return entries
+
+
+def tail_logs(slot=None, lines=200, stream=None, since=None):
+    """Last lines of one worker (or all workers), optionally only those after a sequence number"""
+    entries = _entries(slot, stream)
+    if since is not None:
+        entries = [e for e in entries if e["seq"] > since]
+    return entries[-lines:] if lines > 0 else []
+
+
+def search_logs(query, slot=None, regex=False, stream=None, limit=200):
+    """Buffered lines matching a case-insensitive substring or regular expression (raises re.error)"""
+    if regex:
+        pattern = re.compile(query, re.IGNORECASE)
+        matches = [e for e in _entries(slot, stream) if pattern.search(e["line"])]
+    else:
+        needle = query.lower()
+        matches = [e for e in _entries(slot, stream) if needle in e["line"].lower()]
+    return matches[-limit:] if limit > 0 else []
@@ -1,108 +1,540 @@
+import os
+import time
 import subprocess
 import signal
+import threading
+from collections import deque
+import requests
 from config_manager import load_config
 from agent_generator import generate_agent_code
+from worker_logs import capture_output
+from status_events import publish
 
 # MultipleFiles/worker_manager.py
 
-# ... (imports)
+# Pool of agent_worker.py processes. Each worker gets a slot id, its own
+# LiveKit health/HTTP port and, optionally, a pinned CPU core. The LiveKit
+# server spreads jobs across all registered workers.
 
-worker_process = None
+BASE_WORKER_PORT = int(os.environ.get("AGENT_WORKER_BASE_PORT", 8081))
+HEALTH_CHECK_TIMEOUT = 0.5
+READY_POLL_INTERVAL = 0.2
 
-def start_worker():
-    """Start the worker process based on configuration"""
-    global worker_process
-    config = load_config() # Load the latest config
+# Restart strategies: "blue_green" starts the replacement, waits until it is
+# ready, then drains the old worker; "stop_start" stops first (no overlap)
+DEFAULT_RESTART_STRATEGY = "blue_green"
+DEFAULT_READY_TIMEOUT = 30
+DEFAULT_DRAIN_TIMEOUT = 300
+
+# Supervisor: resource sampling interval, crash-restart backoff and crash-loop limits
+SUPERVISOR_INTERVAL = float(os.environ.get("WORKER_SUPERVISOR_INTERVAL", 5))
+TELEMETRY_HISTORY = int(os.environ.get("WORKER_TELEMETRY_HISTORY", 120))
+RESTART_BACKOFF_BASE = 1
+RESTART_BACKOFF_MAX = 60
+CRASH_LOOP_WINDOW = 300
+CRASH_LOOP_THRESHOLD = 5
+STABLE_UPTIME = 60  # a worker up this long resets its backoff
+
+workers = {}  # slot id -> worker info dict
+restart_history = deque(maxlen=20)
+_pool_lock = threading.RLock()
+_supervisor_thread = None
+_supervisor_stop = threading.Event()
+
+def get_pool_size(config):
+    """Number of worker processes to run: configured, or one per CPU core with "auto" """
+    if config.get('worker_mode', 'dev') in ('connect', 'console'):
+        # These modes join a single room or the terminal; more than one process makes no sense
+        return 1
+    size = config.get('worker_pool_size', 1)
+    if size == 'auto':
+        return max(1, os.cpu_count() or 1)
+    return max(1, int(size))
 
+def _worker_command(config):
+    worker_mode = config.get('worker_mode', 'dev')
+    if worker_mode == 'connect':
+        room_name = config.get('room_name', 'default-room')
+        return ['python', 'agent_worker.py', 'connect', '--room', room_name]
+    if worker_mode == 'console':
+        return ['python', 'agent_worker.py', 'console']
+    return ['python', 'agent_worker.py', 'dev']
+
+def _is_alive(worker):
+    return worker is not None and worker["process"].poll() is None
+
+def _pin_cpu(pid, slot):
+    """Pin a worker (and the job processes it forks later) to one core"""
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not cpus:
+        return None
+    cpu = cpus[slot % len(cpus)]
     try:
-        if worker_process and worker_process.poll() is None:
-            print(f"Stopping existing worker process with PID {worker_process.pid}")
-            worker_process.terminate()
-            try:
-                worker_process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
-                print("Worker process didn't terminate gracefully, killing it")
-                worker_process.kill()
-                worker_process.wait()
-            worker_process = None
-        elif worker_process:
-            worker_process = None
-
-        worker_mode = config.get('worker_mode', 'dev')
-        print(f"Starting new worker in {worker_mode} mode")
-        
-        # Ensure agent_worker.py is generated before starting
-        # This call is already in api_routes.py before restart_worker, but good to double check
-        # generate_agent_code(config) 
-
-        if worker_mode == 'dev':
-            worker_process = subprocess.Popen(['python', 'agent_worker.py', 'dev'])
-        elif worker_mode == 'connect':
-            room_name = config.get('room_name', 'default-room')
-            worker_process = subprocess.Popen(['python', 'agent_worker.py', 'connect', '--room', room_name])
-        elif worker_mode == 'console':
-            worker_process = subprocess.Popen(['python', 'agent_worker.py', 'console'])
-        else:
-            worker_process = subprocess.Popen(['python', 'agent_worker.py', 'dev'])
-
-        print(f"Worker started with PID {worker_process.pid}")
-        return worker_process.pid
-    except Exception as e:
-        print(f"Error starting worker: {e}")
-        worker_process = None
+        os.sched_setaffinity(pid, {cpu})
+        return cpu
+    except OSError as e:
+        print(f"Could not pin worker {pid} to CPU {cpu}: {e}")
         return None
 
-def restart_worker():
-    """Gracefully restart the worker without ending the session"""
-    global worker_process
-    config = load_config() # Load the latest config here too
-    generate_agent_code(config) # Regenerate code before restarting
+def _launch_worker(slot, config):
+    """Spawn a worker process in a slot (the first free slot if None); returns the slot"""
+    with _pool_lock:
+        if slot is None:
+            # Draining workers keep their slot (and port) until they exit
+            slot = next(i for i in range(len(workers) + 1) if not _is_alive(workers.get(i)))
+        if _is_alive(workers.get(slot)):
+            print(f"Worker slot {slot} is already running (PID {workers[slot]['process'].pid})")
+            return slot
 
-    if worker_process and worker_process.poll() is None:
+        port = BASE_WORKER_PORT + slot
+        env = dict(
+            os.environ,
+            AGENT_WORKER_ID=str(slot),
+            AGENT_WORKER_PORT=str(port),
+            AGENT_WORKER_DRAIN_TIMEOUT=str(config.get('worker_drain_timeout', DEFAULT_DRAIN_TIMEOUT)),
+            PYTHONUNBUFFERED="1", # so captured logs arrive line by line
+        )
+        # The console talks to the terminal, every other mode is captured into the log buffer
+        capture = config.get('worker_mode', 'dev') != 'console'
+        pipe = subprocess.PIPE if capture else None
         try:
-            print(f"Sending SIGUSR1 to worker process {worker_process.pid} for graceful restart...")
-            # Note: SIGUSR1 handling is not explicitly shown in agent_worker.py,
-            # so a full terminate/start might be more reliable if not implemented.
-            # For now, assume it works or fallback to kill.
-            worker_process.terminate() # Send SIGTERM
-            worker_process.wait(timeout=5) # Wait for the process to exit after signal
-            worker_process = None # Clear the old process reference
-            print("Old worker process terminated after SIGUSR1 (or SIGTERM).")
-            return start_worker() # Start a new worker
-        except subprocess.TimeoutExpired:
-            print("Old worker process did not terminate, forcing restart.")
-            worker_process.kill()
-            worker_process.wait()
-            worker_process = None
-            return start_worker()
+            process = subprocess.Popen(_worker_command(config), env=env, stdout=pipe, stderr=pipe)
         except Exception as e:
-            print(f"Error signaling worker for restart: {e}")
-            return start_worker() # Fallback to full start if signal fails
-    else:
-        print("No running worker process found, starting a new one.")
-        return start_worker()
+            print(f"Error starting worker in slot {slot}: {e}")
+            return None
+        if capture:
+            capture_output(slot, process)
+
+        cpu = _pin_cpu(process.pid, slot) if config.get('worker_cpu_pinning') else None
+        workers[slot] = {
+            "process": process,
+            "port": port,
+            "cpu": cpu,
+            "state": "starting",
+            "started_at": time.time(),
+            "ready_at": None,
+            "health": None,  # last supervisor health probe
+            "telemetry": deque(maxlen=TELEMETRY_HISTORY),
+            "crashes": [],
+            "consecutive_crashes": 0,
+            "restart_count": 0,
+            "next_restart_at": None,
+        }
+        print(f"Worker {slot} started with PID {process.pid} (port {port}, cpu {cpu})")
+        publish("worker_started", {"worker": slot, "pid": process.pid, "port": port, "cpu": cpu})
+        return slot
+
+def start_pool_worker(slot=None, config=None):
+    """Start one worker process in a pool slot (the first free slot if none is given)"""
+    slot = _launch_worker(slot, config or load_config())
+    if slot is None:
+        return None
+    return workers[slot]["process"].pid
+
+def wait_until_ready(slot, timeout=DEFAULT_READY_TIMEOUT):
+    """Block until a worker answers on its health port; False if it exits or times out"""
+    worker = workers.get(slot)
+    deadline = time.time() + timeout
+    while worker is not None and time.time() < deadline:
+        if not _is_alive(worker):
+            return False
+        if _worker_health(worker) == "healthy":
+            worker["state"] = "serving"
+            worker["ready_at"] = time.time()
+            publish("worker_ready", {
+                "worker": slot,
+                "pid": worker["process"].pid,
+                "ready_ms": round((worker["ready_at"] - worker["started_at"]) * 1000, 1),
+            })
+            return True
+        time.sleep(READY_POLL_INTERVAL)
+    return False
+
+def drain_pool_worker(slot, timeout=DEFAULT_DRAIN_TIMEOUT):
+    """Stop routing new jobs to a worker and let its active sessions finish before it exits.
+
+    SIGTERM makes the LiveKit worker mark itself unavailable and wait for its
+    running jobs (up to AGENT_WORKER_DRAIN_TIMEOUT); we kill it if it is still
+    alive after our own deadline.
+    """
+    worker = workers.get(slot)
+    if not _is_alive(worker):
+        with _pool_lock:
+            workers.pop(slot, None)
+        return None
+
+    process = worker["process"]
+    worker["state"] = "draining"
+    worker["drain_started_at"] = time.time()
+    print(f"Draining worker {slot} (PID {process.pid}), deadline {timeout} s")
+    publish("worker_draining", {"worker": slot, "pid": process.pid, "deadline_s": timeout})
+    process.send_signal(signal.SIGTERM)
+    killed = False
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print(f"Worker {slot} still busy after drain deadline, killing it")
+        process.kill()
+        process.wait()
+        killed = True
+
+    with _pool_lock:
+        if workers.get(slot) is worker:
+            workers.pop(slot)
+    drain_ms = round((time.time() - worker["drain_started_at"]) * 1000, 1)
+    print(f"Worker {slot} drained in {drain_ms} ms")
+    publish("worker_drained", {"worker": slot, "pid": process.pid, "drain_ms": drain_ms, "killed": killed})
+    return {"slot": slot, "pid": process.pid, "drain_ms": drain_ms, "killed": killed}
+
+def stop_pool_worker(slot, timeout=5):
+    """Stop the worker process in one pool slot"""
+    with _pool_lock:
+        worker = workers.pop(slot, None)
+    if not _is_alive(worker):
+        print(f"No active worker in slot {slot} to stop.")
+        return False
+
+    process = worker["process"]
+    print(f"Stopping worker {slot} with PID {process.pid}")
+    process.terminate() # Send SIGTERM
+    try:
+        process.wait(timeout=timeout) # Wait for it to exit
+    except subprocess.TimeoutExpired:
+        print(f"Worker {slot} didn't terminate gracefully, killing it")
+        process.kill() # Send SIGKILL
+        process.wait()
+    publish("worker_stopped", {"worker": slot, "pid": process.pid, "exit_code": process.returncode})
+    return True
+
+def start_worker():
+    """Start the worker pool based on configuration"""
+    config = load_config() # Load the latest config
+
+    # agent_worker.py reads the config snapshot written by generate_agent_code
+    stop_worker()
+    size = get_pool_size(config)
+    print(f"Starting {size} worker(s) in {config.get('worker_mode', 'dev')} mode")
+    pids = [start_pool_worker(slot, config) for slot in range(size)]
+    started = [pid for pid in pids if pid is not None]
+    return started[0] if started else None
+
+def restart_worker():
+    """Restart the worker pool with the latest configuration"""
+    config = load_config() # Load the latest config here too
+    generate_agent_code(config) # Write the config snapshot before restarting
+
+    strategy = config.get('worker_restart_strategy', DEFAULT_RESTART_STRATEGY)
+    with _pool_lock:
+        serving = [slot for slot, w in workers.items() if _is_alive(w) and w["state"] != "draining"]
+    if strategy != "blue_green" or not serving or config.get('worker_mode', 'dev') == 'console':
+        # The console owns the terminal, so two workers cannot overlap there
+        return _stop_start_restart(config)
+    return _blue_green_restart(config, serving)
+
+def _restart_progress(record, phase, **details):
+    publish("restart_progress", dict(details, strategy=record["strategy"], phase=phase))
+
+def _record_restart(record):
+    restart_history.append(record)
+    _restart_progress(record, "finished", status=record["status"], gap_ms=record.get("gap_ms"))
+    print(f"Worker restart ({record['strategy']}): {record['status']}, cutover gap {record.get('gap_ms')} ms")
+
+def _stop_start_restart(config):
+    record = {"strategy": "stop_start", "started_at": time.time()}
+    _restart_progress(record, "stopping")
+    stop_worker()
+    stopped_at = time.time()
+    _restart_progress(record, "starting")
+    pid = start_worker()
+    slots = [slot for slot, w in workers.items() if _is_alive(w)]
+
+    def measure():
+        ready = [wait_until_ready(slot, config.get('worker_ready_timeout', DEFAULT_READY_TIMEOUT)) for slot in slots]
+        ready_times = [workers[slot]["ready_at"] for slot in slots if slot in workers and workers[slot]["ready_at"]]
+        record["status"] = "ok" if ready and all(ready) else "not_ready"
+        record["gap_ms"] = round((min(ready_times) - stopped_at) * 1000, 1) if ready_times else None
+        _record_restart(record)
+
+    # Measure the gap in the background so the caller is not held up by readiness
+    threading.Thread(target=measure, daemon=True).start()
+    return pid
+
+def _blue_green_restart(config, old_slots):
+    record = {"strategy": "blue_green", "started_at": time.time(), "old_slots": old_slots}
+    ready_timeout = config.get('worker_ready_timeout', DEFAULT_READY_TIMEOUT)
+    drain_timeout = config.get('worker_drain_timeout', DEFAULT_DRAIN_TIMEOUT)
+
+    # 1. Start the replacements next to the old workers
+    _restart_progress(record, "starting", old_workers=old_slots)
+    new_slots = [slot for slot in (_launch_worker(None, config) for _ in range(get_pool_size(config))) if slot is not None]
+
+    # 2. Only cut over once the replacements report ready
+    _restart_progress(record, "waiting_ready", new_workers=new_slots)
+    ready_slots = [slot for slot in new_slots if wait_until_ready(slot, ready_timeout)]
+    record["new_slots"] = ready_slots
+    if not ready_slots:
+        print("Replacement workers never became ready, keeping the old workers")
+        for slot in new_slots:
+            stop_pool_worker(slot)
+        record.update({"status": "aborted", "gap_ms": 0.0})
+        _record_restart(record)
+        return workers[old_slots[0]]["process"].pid
+
+    # 3. Old workers stop taking jobs and drain their sessions in the background
+    cutover_at = time.time()
+    first_ready_at = min(workers[slot]["ready_at"] for slot in ready_slots)
+    record.update({
+        "status": "ok",
+        "ready_ms": round((first_ready_at - record["started_at"]) * 1000, 1),
+        # New workers were accepting jobs before the old ones stopped, so there is no gap
+        "gap_ms": round(max(0.0, first_ready_at - cutover_at) * 1000, 1),
+        "overlap_ms": round(max(0.0, cutover_at - first_ready_at) * 1000, 1),
+        "drains": [],
+    })
+
+    _restart_progress(record, "draining", old_workers=old_slots, new_workers=ready_slots)
+
+    def drain(slot):
+        result = drain_pool_worker(slot, drain_timeout)
+        if result:
+            record["drains"].append(result)
+
+    for slot in old_slots:
+        threading.Thread(target=drain, args=(slot,), daemon=True).start()
+
+    _record_restart(record)
+    return workers[ready_slots[0]]["process"].pid
 
 def stop_worker():
-    """Stop the worker process"""
-    global worker_process
-    if worker_process and worker_process.poll() is None:
-        print(f"Stopping worker process with PID {worker_process.pid}")
-        worker_process.terminate() # Send SIGTERM
-        try:
-            worker_process.wait(timeout=5) # Wait for it to exit
-        except subprocess.TimeoutExpired:
-            print("Worker process didn't terminate gracefully, killing it")
-            worker_process.kill() # Send SIGKILL
-        worker_process = None
-        print("Worker stopped.")
-    else:
+    """Stop every worker process in the pool"""
+    with _pool_lock:
+        slots = list(workers)
+    if not slots:
         print("No active worker process to stop.")
+    for slot in slots:
+        stop_pool_worker(slot)
     return True
 
+def _process_tree(pid):
+    """CPU seconds of a process and all its descendants (job processes), keyed by pid, from /proc"""
+    ticks = os.sysconf("SC_CLK_TCK")
+    children = {}
+    usage = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        # fields[1] is ppid, fields[11]/[12] are utime/stime (after the comm field)
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        usage[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+
+    tree, stack = {}, [pid]
+    while stack:
+        current = stack.pop()
+        if current in usage:
+            tree[current] = usage[current]
+        stack.extend(children.get(current, []))
+    return tree
+
+def _sample_resources(worker):
+    """RSS, CPU, thread and open file descriptor totals of a worker's process tree"""
+    tree = _process_tree(worker["process"].pid)
+    rss_kb = threads = fds = 0
+    for pid in tree:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith("Threads:"):
+                        threads += int(line.split()[1])
+            fds += len(os.listdir(f"/proc/{pid}/fd"))
+        except OSError:
+            continue # the process exited while we were reading it
+
+    now = time.time()
+    cpu_seconds = sum(tree.values())
+    history = worker["telemetry"]
+    previous = history[-1] if history else None
+    cpu_percent = None
+    # Telemetry is kept across restarts of the slot; CPU time only compares within one process
+    if previous and previous.get("pid") == worker["process"].pid and now > previous["time"]:
+        cpu_percent = round((cpu_seconds - previous["cpu_seconds"]) / (now - previous["time"]) * 100, 1)
+    return {
+        "time": now,
+        "pid": worker["process"].pid,
+        "processes": len(tree),
+        "rss_mb": round(rss_kb / 1024, 1),
+        "cpu_seconds": round(cpu_seconds, 2),
+        "cpu_percent": cpu_percent,
+        "threads": threads,
+        "fds": fds,
+    }
+
+def _restart_backoff(consecutive_crashes):
+    return min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * 2 ** max(0, consecutive_crashes - 1))
+
+def _handle_exit(slot, worker, now):
+    """Record a worker exit and schedule its restart, unless it exited cleanly or is crash looping"""
+    exit_code = worker["process"].returncode
+    if exit_code == 0:
+        worker["state"] = "exited"
+        print(f"Worker {slot} exited cleanly, not restarting it")
+        publish("worker_exited", {"worker": slot, "pid": worker["process"].pid, "exit_code": 0})
+        return
+
+    worker["crashes"] = [t for t in worker["crashes"] if now - t < CRASH_LOOP_WINDOW] + [now]
+    worker["consecutive_crashes"] += 1
+    if len(worker["crashes"]) >= CRASH_LOOP_THRESHOLD:
+        worker["state"] = "crash_loop"
+        print(f"Worker {slot} crashed {len(worker['crashes'])} times in {CRASH_LOOP_WINDOW} s "
+              f"(exit code {exit_code}), giving up until it is started again")
+        publish("worker_crash_loop", {"worker": slot, "exit_code": exit_code, "crashes": len(worker["crashes"])})
+        return
+
+    backoff = _restart_backoff(worker["consecutive_crashes"])
+    worker["state"] = "crashed"
+    worker["next_restart_at"] = now + backoff
+    print(f"Worker {slot} crashed (exit code {exit_code}), restarting in {backoff} s")
+    publish("worker_crashed", {"worker": slot, "exit_code": exit_code, "restart_in_s": backoff})
+
+def _restart_crashed(slot, worker):
+    with _pool_lock:
+        if workers.get(slot) is not worker:
+            return # stopped or replaced meanwhile
+        if _launch_worker(slot, load_config()) is None:
+            worker["consecutive_crashes"] += 1
+            worker["next_restart_at"] = time.time() + _restart_backoff(worker["consecutive_crashes"])
+            return
+        # Keep the crash history and telemetry of the slot across supervised restarts
+        restarted = workers[slot]
+        for key in ("crashes", "consecutive_crashes", "telemetry"):
+            restarted[key] = worker[key]
+        restarted["restart_count"] = worker["restart_count"] + 1
+
+def supervise_once():
+    """Sample every worker's resources and restart crashed workers whose backoff has elapsed"""
+    now = time.time()
+    with _pool_lock:
+        items = list(workers.items())
+    samples = {}
+    for slot, worker in items:
+        if _is_alive(worker):
+            try:
+                samples[slot] = _sample_resources(worker)
+                worker["telemetry"].append(samples[slot])
+            except OSError as e:
+                print(f"Could not sample worker {slot}: {e}")
+            worker["health"] = _worker_health(worker)
+            if worker["consecutive_crashes"] and now - worker["started_at"] >= STABLE_UPTIME:
+                worker["consecutive_crashes"] = 0
+            continue
+        # Draining workers exit on purpose; crash loops wait for an operator
+        if worker["state"] in ("draining", "exited", "crash_loop"):
+            continue
+        if worker["state"] != "crashed":
+            _handle_exit(slot, worker, now)
+        if worker["state"] == "crashed" and now >= worker["next_restart_at"]:
+            _restart_crashed(slot, worker)
+    if samples:
+        # Samples are superseded by the next tick, so they are not kept for resuming clients
+        publish("worker_telemetry", {"workers": samples}, retain=False)
+
+def _supervisor_loop(interval):
+    while not _supervisor_stop.is_set():
+        try:
+            supervise_once()
+        except Exception as e:
+            print(f"Worker supervisor error: {e}")
+        _supervisor_stop.wait(interval)
+
+def start_supervisor(interval=None):
+    """Start the background thread that samples and restarts workers"""
+    global _supervisor_thread
+    interval = SUPERVISOR_INTERVAL if interval is None else interval
+    if interval <= 0:
+        print("Worker supervisor disabled")
+        return False
+    if _supervisor_thread and _supervisor_thread.is_alive():
+        return True
+    _supervisor_stop.clear()
+    _supervisor_thread = threading.Thread(target=_supervisor_loop, args=(interval,), daemon=True)
+    _supervisor_thread.start()
+    print(f"Worker supervisor started (every {interval} s)")
+    return True
+
+def stop_supervisor():
+    """Stop the background supervisor thread"""
+    _supervisor_stop.set()
+    return True
+
+def _worker_health(worker):
+    try:
+        response = requests.get(f"http://localhost:{worker['port']}/", timeout=HEALTH_CHECK_TIMEOUT)
+        return "healthy" if response.ok else "unhealthy"
+    except requests.exceptions.RequestException:
+        return "unreachable"
+
+def get_pool_status():
+    """Per-worker PID, load and health for every pool slot, from the supervisor's last tick.
+
+    Nothing is probed or sampled here, so polling the status costs nothing and
+    does not change the readings; without the supervisor load and health are None.
+    """
+    with _pool_lock:
+        items = sorted(workers.items())
+    result = []
+    for slot, worker in items:
+        alive = _is_alive(worker)
+        latest = worker["telemetry"][-1] if worker["telemetry"] else None
+        result.append({
+            "id": slot,
+            "pid": worker["process"].pid,
+            "status": "running" if alive else "exited",
+            "state": worker["state"] if alive or worker["state"] in ("crashed", "crash_loop") else "exited",
+            "exit_code": None if alive else worker["process"].returncode,
+            "port": worker["port"],
+            "cpu": worker["cpu"],
+            "uptime_s": round(time.time() - worker["started_at"], 1),
+            "cpu_percent": latest["cpu_percent"] if alive and latest else None,
+            "health": worker["health"] if alive else None,
+            "sampled_at": latest["time"] if latest else None,
+            "restart_count": worker["restart_count"],
+            "recent_crashes": len(worker["crashes"]),
+            "next_restart_in_s": round(max(0.0, worker["next_restart_at"] - time.time()), 1)
+                if worker["state"] == "crashed" and not alive else None,
+            "telemetry": list(worker["telemetry"]),
+        })
+    return result
+
+def running_worker_pid():
+    """PID of the first live pool worker, or None; a cheap check without health probes"""
+    with _pool_lock:
+        items = sorted(workers.items())
+    for _, worker in items:
+        if _is_alive(worker):
+            return worker["process"].pid
+    return None
+
 def get_worker_status():
-    """Get current worker status"""
-    global worker_process
+    """Get current worker pool status"""
+    pool = get_pool_status()
+    running = [w for w in pool if w["status"] == "running"]
     return {
-        "status": "running" if worker_process and worker_process.poll() is None else "stopped",
-        "pid": worker_process.pid if worker_process and worker_process.poll() is None else None
+        "status": "running" if running else "stopped",
+        "pid": running[0]["pid"] if running else None,
+        "pool_size": len(pool),
+        "running_workers": len(running),
+        "workers": pool,
+        "restarts": list(restart_history),
+        "supervisor": {
+            "running": bool(_supervisor_thread and _supervisor_thread.is_alive()),
+            "interval": SUPERVISOR_INTERVAL,
+            "crash_loop_threshold": CRASH_LOOP_THRESHOLD,
+            "crash_loop_window": CRASH_LOOP_WINDOW,
+        }
     }
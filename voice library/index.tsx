@@ -1,6 +1,7 @@
 import type { FC, FormEvent, ChangeEvent, useMemo  } from 'react'
 import { useTranslation } from 'react-i18next'
 import React, { useState, useEffect, useCallback, useRef } from 'react'
+import { io } from 'socket.io-client'
 import classNames from '@/utils/classnames'
 import './styles.css'
 
@@ -27,6 +28,7 @@ interface Config {
 
 interface Voice {
   id: string
+  provider?: ProviderType
   name: string
   description?: string
   language?: string
@@ -41,6 +43,27 @@ interface VoiceData {
   cartesia: Voice[]
 }
 
+interface VoiceCatalogResponse {
+  version: string
+  delta: boolean
+  voices?: Voice[]
+  upserted?: Voice[]
+  removed?: { provider: ProviderType, id: string }[]
+}
+
+interface StatusEvent {
+  seq: number | null
+  time: number
+  type: string
+  data: Record<string, any>
+}
+
+interface StatusEventsResponse {
+  seq: number
+  reset: boolean
+  events: StatusEvent[]
+}
+
 interface ToastData {
   id: string
   type: 'success' | 'error' | 'warning' | 'info'
@@ -83,6 +106,9 @@ const VoiceLibraryDashboard: FC = () => {
   // Refs
   const audioRef = useRef<HTMLAudioElement>(null)
   const downloadUrlRef = useRef<string>('')
+  const voiceCatalogVersionRef = useRef<string | null>(null)
+  const statusEventSeqRef = useRef<number | null>(null)
+  const statusRefreshTimerRef = useRef<ReturnType<typeof setTimeout>>()
 
   // Utility Functions
   const showLoading = useCallback(() => setIsLoading(true), [])
@@ -176,13 +202,37 @@ const VoiceLibraryDashboard: FC = () => {
   const loadVoices = useCallback(async (provider: ProviderType) => {
     try {
       showLoading()
-      const voicesData = await apiRequest(`/${provider}/voices`)
-      const voicesList = voicesData.voices || voicesData
-      
-      setVoices(prev => ({
-        ...prev,
-        [provider]: voicesList
-      }))
+      // One request for all providers; after the first load only the changes are sent
+      const since = voiceCatalogVersionRef.current
+      const catalog: VoiceCatalogResponse = await apiRequest(since ? `/voices?since=${encodeURIComponent(since)}` : '/voices')
+
+      setVoices(prev => {
+        if (!catalog.delta) {
+          const next: VoiceData = { elevenlabs: [], deepgram: [], cartesia: [] }
+          ;(catalog.voices || []).forEach(voice => {
+            if (voice.provider && next[voice.provider]) next[voice.provider].push(voice)
+          })
+          return next
+        }
+
+        const next: VoiceData = {
+          elevenlabs: [...prev.elevenlabs],
+          deepgram: [...prev.deepgram],
+          cartesia: [...prev.cartesia]
+        }
+        ;(catalog.removed || []).forEach(removed => {
+          next[removed.provider] = next[removed.provider].filter(v => v.id !== removed.id)
+        })
+        ;(catalog.upserted || []).forEach(voice => {
+          if (!voice.provider) return
+          const list = next[voice.provider]
+          const index = list.findIndex(v => v.id === voice.id)
+          if (index >= 0) list[index] = voice
+          else list.push(voice)
+        })
+        return next
+      })
+      voiceCatalogVersionRef.current = catalog.version
       
       showToast('success', 'Success', `Loaded ${provider} voices`)
     } catch (error) {
@@ -451,17 +501,63 @@ const VoiceLibraryDashboard: FC = () => {
     loadWorkerStatus()
   }, [loadConfig, loadWorkerStatus])
 
+  // Events come in bursts (e.g. during a restart), refresh once per burst
+  const scheduleStatusRefresh = useCallback((reloadConfig = false) => {
+    clearTimeout(statusRefreshTimerRef.current)
+    statusRefreshTimerRef.current = setTimeout(() => {
+      loadWorkerStatus().catch(() => {})
+      if (reloadConfig)
+        loadConfig().catch(() => {})
+    }, 250)
+  }, [loadConfig, loadWorkerStatus])
+
+  const handleStatusEvent = useCallback((event: StatusEvent) => {
+    if (event.seq !== null) {
+      // Already seen (replayed and pushed at the same time)
+      if (statusEventSeqRef.current !== null && event.seq <= statusEventSeqRef.current)
+        return
+      statusEventSeqRef.current = event.seq
+    }
+
+    if (event.type === 'worker_telemetry')
+      return
+    if (event.type === 'config_applied') {
+      scheduleStatusRefresh(true)
+      return
+    }
+    if (event.type === 'restart_progress' && event.data.phase === 'finished') {
+      showToast(event.data.status === 'ok' ? 'info' : 'warning', 'Worker restart',
+        `${event.data.strategy} restart ${event.data.status}`)
+    }
+    if (event.type === 'worker_crashed' || event.type === 'worker_crash_loop')
+      showToast('error', 'Worker crashed', `Worker ${event.data.worker} exited with code ${event.data.exit_code}`)
+    scheduleStatusRefresh()
+  }, [scheduleStatusRefresh, showToast])
+
   // Effects
   useEffect(() => {
     loadConfig()
     loadWorkerStatus()
-    
-    const interval = setInterval(() => {
-      loadWorkerStatus()
-    }, 30000)
-    
-    return () => clearInterval(interval)
-  }, [loadConfig, loadWorkerStatus])
+
+    // Server-pushed status events replace polling; on reconnect only the missed events are replayed
+    const socket = io(API_BASE_URL.replace(/\/api$/, ''))
+    socket.on('status_event', handleStatusEvent)
+    socket.on('connect', () => {
+      socket.emit('subscribe_status', { since: statusEventSeqRef.current }, (result: StatusEventsResponse) => {
+        if (statusEventSeqRef.current === null || result.reset) {
+          statusEventSeqRef.current = result.seq
+          scheduleStatusRefresh(true)
+          return
+        }
+        result.events.forEach(handleStatusEvent)
+      })
+    })
+
+    return () => {
+      socket.disconnect()
+      clearTimeout(statusRefreshTimerRef.current)
+    }
+  }, [loadConfig, loadWorkerStatus, handleStatusEvent, scheduleStatusRefresh])
 
   // Helper Functions
   const getStatusClass = (status: string) => {